@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+CARGA DE REPORTES DE AGENTES - Sistema de Inventario Tecnológico
+=================================================================
+Carga al inventario todos los JSON que dejó collection_agent.py en una
+carpeta, con una sola lectura y un solo guardado del Excel.
+
+Cada reporte se asocia a una fila existente de "Equipos de Cómputo" por
+serial, nombre de equipo o MAC (en ese orden) y actualiza sus columnas
+detectadas (nombre + verdes); si no hay coincidencia se crea un equipo
+nuevo con el siguiente código EQC. Al actualizar, los valores "No
+detectado" / "Requiere ..." no sobrescriben lo que ya tenga la fila.
+
+Los programas instalados de cada reporte se guardan en
+software_inventario.db (junto al Excel), escribiendo solo lo que cambió
+desde la última instantánea del equipo. Si otro técnico guardó el Excel
+mientras tanto y un equipo nuevo quedó con otro código, el software se
+guarda con el código definitivo (se vuelve a buscar cada reporte en lo
+guardado).
+
+Uso:
+    python agent_ingest.py \\\\servidor\\inventario\\agentes --excel inventario_hospital_v1.xlsx
+    python agent_ingest.py agentes --excel inventario_hospital_v1.xlsx --dry-run
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+
+from column_schema import DETECTED_FIELDS
+from detection import is_detected
+from inventory_repository import InventoryRepository
+from software_inventory import SoftwareStore, store_path_for
+
+
+EQUIPOS_SHEET = "Equipos de Cómputo"
+PROCESSED_DIR = "procesados"
+
+# Orden de coincidencia: campo del reporte → campo de la hoja
+MATCH_KEYS = [('serial', 'serial'), ('hostname', 'nombre_equipo'), ('mac_address', 'mac_address')]
+
+
+def _key(value):
+    return str(value).strip().upper() if is_detected(value) else None
+
+
+def load_reports(directory):
+    """
+    Leer los JSON de la carpeta, del más antiguo al más reciente.
+
+    Returns:
+        tuple: (lista de (ruta, reporte), lista de (ruta, error))
+    """
+    reports, errors = [], []
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                report = json.load(f)
+            if not isinstance(report.get("fields"), dict):
+                raise ValueError("no es un reporte de collection_agent (falta 'fields')")
+            reports.append((path, report))
+        except (OSError, ValueError) as e:
+            errors.append((path, e))
+    # Si un equipo tiene varios reportes, el más reciente se aplica de último
+    reports.sort(key=lambda item: item[1].get("collected_at") or "")
+    return reports, errors
+
+
+def _build_match_index(repo):
+    """{campo de la hoja: {valor normalizado: código}} en una sola pasada por la hoja."""
+    index = {sheet_field: {} for _, sheet_field in MATCH_KEYS}
+    for _, record in repo.rows(EQUIPOS_SHEET):
+        codigo = record.get('codigo')
+        if not codigo:
+            continue
+        for sheet_field, values in index.items():
+            key = _key(record.get(sheet_field))
+            if key:
+                values.setdefault(key, codigo)
+    return index
+
+
+def _match(index, report):
+    """(código, campo que coincidió) o (None, None)."""
+    for report_field, sheet_field in MATCH_KEYS:
+        key = _key(report.get(report_field) or report["fields"].get(sheet_field))
+        if key and key in index[sheet_field]:
+            return index[sheet_field][key], sheet_field
+    return None, None
+
+
+def ingest_reports(repo, reports):
+    """
+    Aplicar los reportes sobre la sesión del repositorio (sin guardar).
+
+    Returns:
+        list: (ruta, acción 'actualizado'/'nuevo', código, campo que coincidió)
+    """
+    index = _build_match_index(repo)
+    applied = []
+
+    for path, report in reports:
+        fields = report["fields"]
+        codigo, matched_by = _match(index, report)
+
+        if codigo:
+            data = {f: fields[f] for f in DETECTED_FIELDS if f in fields and is_detected(fields[f])}
+            repo.update(EQUIPOS_SHEET, codigo, data)
+            action = "actualizado"
+        else:
+            data = {f: fields.get(f, '') for f in DETECTED_FIELDS}
+            codigo = repo.add(EQUIPOS_SHEET, data)['codigo']
+            action = "nuevo"
+
+        # Los siguientes reportes del mismo equipo coinciden con esta fila
+        for report_field, sheet_field in MATCH_KEYS:
+            key = _key(report.get(report_field) or fields.get(sheet_field))
+            if key:
+                index[sheet_field][key] = codigo
+
+        applied.append((path, action, codigo, matched_by))
+    return applied
+
+
+def resolve_saved_codes(repo, reports, applied):
+    """
+    Código definitivo de cada reporte después de guardar.
+
+    Al guardar, un equipo nuevo cuya fila o código ya ocupó otro técnico se
+    reubica con el siguiente código, y una fila que ya no existe se descarta;
+    cada reporte se vuelve a buscar (serial, nombre, MAC) en lo guardado.
+
+    Returns:
+        list: como ingest_reports, con código None si el reporte no quedó en el Excel
+    """
+    index = _build_match_index(repo)
+    resolved = []
+    for (_, report), (path, action, _, matched_by) in zip(reports, applied):
+        codigo, _ = _match(index, report)
+        resolved.append((path, action, codigo, matched_by))
+    return resolved
+
+
+def print_applied(applied):
+    for path, action, codigo, matched_by in applied:
+        by = f" (por {matched_by})" if matched_by else ""
+        if codigo:
+            print(f"   {codigo} {action}{by}: {os.path.basename(path)}")
+        else:
+            print(f"   ⚠️ No guardado{by}: {os.path.basename(path)}")
+
+
+def store_software(store, reports, applied):
+    """
+    Guardar los programas de cada reporte bajo el código del equipo.
+
+    Returns:
+        int: equipos cuyo software cambió
+    """
+    changed = 0
+    for (_, report), (_, _, codigo, _) in zip(reports, applied):
+        if codigo and report.get("software"):
+            delta = store.save_snapshot(codigo, report["software"])
+            changed += not delta['sin_cambios']
+    return changed
+
+
+def archive_reports(paths, directory):
+    """Mover los JSON ya cargados a la subcarpeta 'procesados'."""
+    target = os.path.join(directory, PROCESSED_DIR)
+    os.makedirs(target, exist_ok=True)
+    for path in paths:
+        shutil.move(path, os.path.join(target, os.path.basename(path)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cargar al inventario los JSON de collection_agent.py")
+    parser.add_argument("directory", help="Carpeta con los JSON de los agentes")
+    parser.add_argument("--excel", default="inventario_hospital_v1.xlsx",
+                        help="Inventario (.xlsx o .db)")
+    parser.add_argument("--dry-run", action="store_true", help="Mostrar qué se haría, sin guardar")
+    parser.add_argument("--keep", action="store_true",
+                        help="No mover los JSON cargados a 'procesados'")
+    args = parser.parse_args(argv)
+
+    reports, errors = load_reports(args.directory)
+    for path, error in errors:
+        print(f"⚠️ {os.path.basename(path)} ignorado: {error}")
+    if not reports:
+        print("No hay reportes para cargar")
+        return 0
+
+    repo = InventoryRepository.open(args.excel)
+    try:
+        applied = ingest_reports(repo, reports)
+
+        if args.dry_run:
+            print_applied(applied)
+            repo.session.discard()
+            print(f"\n🔎 Simulación: {len(applied)} reportes, nada guardado")
+            return 0
+
+        repo.save()  # Un solo guardado para todos los reportes
+
+        # Otro técnico guardó antes: filas reubicadas o descartadas al revalidar
+        conflicts = repo.session.take_conflicts()
+        if conflicts:
+            print("⚠️ El inventario cambió mientras se guardaba:")
+            for conflict in conflicts:
+                print(f"   • {conflict}")
+            applied = resolve_saved_codes(repo, reports, applied)
+        print_applied(applied)
+    finally:
+        repo.close()
+
+    with SoftwareStore(store_path_for(args.excel)) as store:
+        software_changed = store_software(store, reports, applied)
+
+    # Los reportes que no quedaron en el Excel se dejan para la próxima carga
+    saved = [item for item in applied if item[2]]
+    if not args.keep:
+        archive_reports([path for path, _, _, _ in saved], args.directory)
+
+    nuevos = sum(1 for _, action, _, _ in saved if action == "nuevo")
+    print(f"\n✅ {len(saved)} reportes cargados: {len(saved) - nuevos} actualizados, {nuevos} nuevos")
+    if len(saved) < len(applied):
+        print(f"   ⚠️ {len(applied) - len(saved)} reportes no se guardaron (quedan en la carpeta)")
+    print(f"   Software: {software_changed} equipos con cambios")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
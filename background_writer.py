@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+ESCRITOR EN SEGUNDO PLANO - Sistema de Inventario Tecnológico
+==============================================================
+Un único hilo que ejecuta, en orden, las escrituras a disco del
+inventario (diario, Excel o SQLite) para que la ventana no se congele
+mientras se serializa el archivo.
+
+Los callbacks (éxito, error, estado) se devuelven al hilo de Tk con
+root.after, de modo que pueden tocar widgets y mostrar messagebox.
+"""
+
+import queue
+import threading
+
+
+class BackgroundWriter:
+    """
+    Cola serializada de trabajos de guardado.
+
+    Uso:
+        writer = BackgroundWriter(root, on_status=actualizar_estado)
+        writer.submit(session.prepare_save(), on_error=mostrar_error,
+                      description="Mantenimiento")
+        ...
+        writer.wait()   # antes de cerrar la sesión o la aplicación
+        writer.stop()
+    """
+
+    def __init__(self, root, on_status=None):
+        self.root = root
+        self.on_status = on_status  # on_status(pendientes, descripción, error)
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="inventory-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        """Trabajos encolados o en ejecución."""
+        return self._pending
+
+    def submit(self, job, on_success=None, on_error=None, description=""):
+        """Encolar un trabajo; job() se ejecuta en el hilo escritor."""
+        with self._pending_lock:
+            self._pending += 1
+        self._notify(description, None)
+        self._queue.put((job, on_success, on_error, description))
+
+    def wait(self):
+        """Bloquear hasta que todos los trabajos encolados terminen."""
+        self._queue.join()
+
+    def stop(self):
+        """Terminar el hilo después de los trabajos ya encolados."""
+        self._queue.put(None)
+        self._thread.join()
+
+    # ------------------------------------------------------------------
+    # Hilo escritor
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+
+            job, on_success, on_error, description = item
+            error = None
+            try:
+                job()
+            except Exception as e:
+                error = e
+                print(f"❌ Error al guardar {description}: {e}")
+
+            with self._pending_lock:
+                self._pending -= 1
+
+            if error is None and on_success:
+                self._call_in_ui(on_success)
+            elif error is not None and on_error:
+                self._call_in_ui(on_error, error)
+            self._notify(description, error)
+            self._queue.task_done()
+
+    def _call_in_ui(self, callback, *args):
+        """Ejecutar el callback en el hilo de Tk."""
+        try:
+            self.root.after(0, lambda: callback(*args))
+        except RuntimeError:
+            # La ventana ya se cerró (main loop detenido)
+            pass
+
+    def _notify(self, description, error):
+        if self.on_status:
+            self._call_in_ui(self.on_status, self._pending, description, error)
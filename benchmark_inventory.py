@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""
+BENCHMARK DEL INVENTARIO - Sistema de Inventario Tecnológico
+=============================================================
+Mide cómo escalan las operaciones de datos con el tamaño del inventario.
+
+Genera workbooks sintéticos (por defecto 300, 3.000 y 30.000 filas por
+hoja) con valores tomados de config_listas.py, ejecuta cada operación a
+través de InventoryRepository (sin interfaz gráfica) y escribe un JSON
+con los tiempos, para comparar entre versiones.
+
+Uso:
+    python benchmark_inventory.py
+    python benchmark_inventory.py --rows 300 3000 --backend xlsx sqlite
+    python benchmark_inventory.py --output nueva.json --compare anterior.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import config_listas as cl
+from column_schema import SCHEMAS
+from inventory_repository import BAJAS_SHEET, MANTENIMIENTOS_SHEET, SHEET_PREFIXES, InventoryRepository
+from sqlite_backend import migrate_excel_to_sqlite
+from workbook_session import sheet_for_code
+
+try:
+    import openpyxl
+    HAS_OPENPYXL = True
+except ImportError:
+    HAS_OPENPYXL = False
+
+
+DEFAULT_ROWS = (300, 3000, 30000)
+DEFAULT_REPEAT = 50
+SAVE_REPEAT = 3  # Guardar a disco reescribe el archivo: pocas repeticiones
+RESULTS_FILE = "benchmark_results.json"
+REGRESSION_PERCENT = 20   # --compare marca la mediana que empeora más de este %...
+REGRESSION_MIN_MS = 0.5   # ...y más de estos ms (ignora ruido en operaciones de microsegundos)
+
+# ============================================================================
+# VALORES SINTÉTICOS (listas desplegables reales)
+# ============================================================================
+
+_AREAS = cl.AREAS_SERVICIO
+
+# Campo → valores posibles (por hoja cuando el mismo nombre cambia de lista)
+FIELD_VALUES = {
+    'tipo_equipo': cl.TIPOS_EQUIPO,
+    'area_servicio': _AREAS,
+    'macroproceso': cl.LISTA_MACROPROCESOS,
+    'uso_sihos': cl.USO_SIHOS,
+    'uso_office_basico': cl.USO_OFFICE_BASICO,
+    'software_especializado': cl.SOFTWARE_ESPECIALIZADO_OPCIONES,
+    'horario_uso': cl.HORARIOS_USO,
+    'estado_operativo': cl.ESTADOS_OPERATIVOS,
+    'periodicidad_mtto': cl.PERIODICIDADES_MTTO,
+    'responsable_mtto': cl.TECNICOS_RESPONSABLES,
+    'marca': cl.MARCAS_EQUIPOS,
+    'sistema_operativo': cl.SISTEMAS_OPERATIVOS,
+    'arquitectura_so': cl.ARQUITECTURA_SO,
+    'procesador': cl.TIPOS_PROCESADOR,
+    'ram_gb': cl.CAPACIDADES_RAM,
+    'disco1_tipo': cl.TIPOS_DISCO,
+    'disco2_tipo': cl.TIPOS_DISCO,
+    'navegador_predeterminado': cl.NAVEGADORES,
+    'version_office': cl.VERSIONES_OFFICE,
+    'licencia_office': cl.TIPOS_LICENCIA_OFFICE,
+    'licencia_windows': cl.TIPOS_LICENCIA_WINDOWS,
+    'estado_licencia_windows': cl.ESTADO_LICENCIA_WINDOWS,
+    'tipo_conexion': cl.TIPOS_CONEXION,
+    'antivirus_instalado': cl.ANTIVIRUS,
+    'estado_antivirus': cl.ESTADO_ANTIVIRUS,
+    'otro_acceso_remoto': cl.ACCESO_REMOTO,
+    'tipo_usuario_local': cl.TIPO_USUARIO_LOCAL,
+    'cifrado_disco': cl.SI_NO,
+    'area': _AREAS,
+    'tecnico': cl.TECNICOS_RESPONSABLES,
+    'estado_post': cl.ESTADO_POST_MTTO,
+    'motivo': cl.MOTIVOS_BAJA,
+    'destino': cl.DESTINOS_BAJA,
+    'responsable': cl.RESPONSABLES_BAJA,
+}
+
+SHEET_FIELD_VALUES = {
+    "Impresoras y Escáneres": {'tipo': cl.TIPOS_IMPRESORA, 'marca': cl.MARCAS_IMPRESORA,
+                               'funcion': cl.FUNCIONES_IMPRESORA, 'estado': cl.ESTADOS_IMPRESORA},
+    "Periféricos": {'tipo': cl.TIPOS_PERIFERICO, 'marca': cl.MARCAS_PERIFERICO,
+                    'estado': cl.ESTADOS_PERIFERICO},
+    "Equipos de Red": {'tipo': cl.TIPOS_EQUIPO_RED, 'marca': cl.MARCAS_RED,
+                       'ubicacion': cl.UBICACIONES_RED, 'estado': cl.ESTADOS_RED},
+    "Mantenimientos": {'tipo': cl.TIPOS_MANTENIMIENTO_MTTO, 'descripcion': cl.ACTIVIDADES_MANTENIMIENTO},
+}
+
+CODED_SHEETS = list(SHEET_PREFIXES)
+BASE_DATE = date(2024, 1, 1)
+
+
+def _random_value(rng, sheet_name, field, i):
+    """Valor sintético plausible para un campo."""
+    values = SHEET_FIELD_VALUES.get(sheet_name, {}).get(field) or FIELD_VALUES.get(field)
+    if values:
+        return rng.choice(values)
+    if field.startswith(('conf_', 'int_', 'crit_')):
+        return rng.choice(cl.SI_NO)
+    if field in ('fecha_mtto', 'fecha_baja', 'proximo'):
+        return datetime.combine(BASE_DATE + timedelta(days=rng.randrange(900)), datetime.min.time())
+    if field in ('ip', 'direccion_ip'):
+        return f"192.168.{rng.randrange(1, 20)}.{rng.randrange(2, 254)}"
+    if field == 'mac_address':
+        return ":".join(f"{rng.randrange(256):02X}" for _ in range(6))
+    if 'serial' in field:
+        return f"SN{rng.randrange(10**9):09d}"
+    if 'capacidad' in field:
+        return f"{rng.choice((128, 256, 480, 512, 1000))} GB"
+    return f"{field.upper()}-{i}"
+
+
+def _synthetic_row(rng, sheet_name, schema, i, rows):
+    """Fila i (1-based) de la hoja como lista de valores según column_schema."""
+    data = {f: _random_value(rng, sheet_name, f, i) for f in schema.columns}
+    prefix = SHEET_PREFIXES.get(sheet_name)
+    if prefix:
+        data['consecutivo'] = i
+        data['codigo'] = f"{prefix}-{i:04d}"
+    elif sheet_name == MANTENIMIENTOS_SHEET:
+        data['consecutivo'] = i
+        data['codigo_equipo'] = f"EQC-{rng.randrange(1, rows + 1):04d}"
+    elif sheet_name == BAJAS_SHEET:
+        data['codigo_original'] = f"{rng.choice(list(SHEET_PREFIXES.values()))}-{rows + i:04d}"
+    return [data.get(f) if f else None for f in schema.fields]
+
+
+def build_workbook(path, rows, seed=2025):
+    """Crear un Excel sintético con `rows` filas en cada una de las seis hojas."""
+    if not HAS_OPENPYXL:
+        raise RuntimeError("openpyxl no instalado")
+
+    rng = random.Random(seed)
+    wb = openpyxl.Workbook(write_only=True)  # Escritura en streaming: 30.000 filas sin agotar memoria
+    for sheet_name, schema in SCHEMAS.items():
+        ws = wb.create_sheet(sheet_name)
+        ws.append([f or "" for f in schema.fields])
+        for i in range(1, rows + 1):
+            ws.append(_synthetic_row(rng, sheet_name, schema, i, rows))
+    wb.save(path)
+    return path
+
+
+# ============================================================================
+# MEDICIÓN
+# ============================================================================
+
+def _timed(func, repeat):
+    """Ejecutar func repeat veces; tiempos en milisegundos."""
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _summary(backend, rows, case, samples):
+    return {
+        "backend": backend,
+        "rows": rows,
+        "case": case,
+        "repeat": len(samples),
+        "min_ms": round(min(samples), 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "mean_ms": round(statistics.mean(samples), 4),
+        "max_ms": round(max(samples), 4),
+    }
+
+
+def run_cases(path, backend, rows, repeat, seed=2025):
+    """
+    Medir cada ruta de datos sobre una copia abierta del inventario.
+
+    Casos "*_cold" son la primera llamada tras abrir (construye índices y
+    asignadores); el resto son llamadas repetidas sobre la sesión caliente.
+    """
+    rng = random.Random(seed)
+    results = []
+
+    def record(case, samples):
+        results.append(_summary(backend, rows, case, samples))
+        print(f"   {case:<22} mediana {results[-1]['median_ms']:>10.3f} ms  (n={len(samples)})")
+
+    # Apertura: la sesión carga el archivo al primer acceso (sheetnames)
+    repo = InventoryRepository.open(path)
+    record("open", _timed(lambda i: repo.session.sheetnames, 1))
+
+    try:
+        codes = [f"{SHEET_PREFIXES[s]}-{rng.randrange(1, rows + 1):04d}" for s in CODED_SHEETS
+                 for _ in range(max(1, repeat // len(CODED_SHEETS)))]
+        rng.shuffle(codes)
+
+        record("next_code_cold", _timed(lambda i: [repo.next_code(s) for s in CODED_SHEETS], 1))
+        record("next_code", _timed(lambda i: repo.next_code(CODED_SHEETS[i % len(CODED_SHEETS)]), repeat))
+        record("lookup", _timed(lambda i: repo.get(codes[i % len(codes)]), repeat))
+        record("search", _timed(lambda i: repo.search("Periféricos", area=_AREAS[i % len(_AREAS)]), min(repeat, 5)))
+
+        def add(i):
+            sheet_name = CODED_SHEETS[i % len(CODED_SHEETS)]
+            schema = SCHEMAS[sheet_name]
+            repo.add(sheet_name, schema.record(_synthetic_row(rng, sheet_name, schema, i, rows)))
+        record("add", _timed(add, repeat))
+
+        def update(i):
+            codigo = codes[i % len(codes)]
+            sheet_name = sheet_for_code(codigo)
+            repo.update(sheet_name, codigo, {SCHEMAS[sheet_name].estado_field: "Bueno"})
+        record("update", _timed(update, repeat))
+
+        record("decommission", _timed(
+            lambda i: repo.decommission(codes[i % len(codes)], {'motivo': rng.choice(cl.MOTIVOS_BAJA)}), repeat))
+        record("add_maintenance", _timed(
+            lambda i: repo.add_maintenance({'codigo_equipo': codes[i % len(codes)], 'tipo': "Preventivo"}), repeat))
+
+        # Guardar un registro nuevo: ruta completa que paga el técnico en cada formulario
+        def save_new_row(i):
+            repo.add("Periféricos", {'tipo': "Mouse", 'area': rng.choice(_AREAS)})
+            repo.save()
+        repo.save()  # Persistir lo anterior para medir solo un registro por guardado
+        record("save_new_row", _timed(save_new_row, SAVE_REPEAT))
+    finally:
+        repo.close()
+
+    return results
+
+
+# ============================================================================
+# PROGRAMA
+# ============================================================================
+
+def run(rows_list, backends, repeat, workdir, seed=2025):
+    results = []
+    for rows in rows_list:
+        source = os.path.join(workdir, f"bench_{rows}.xlsx")
+        if not os.path.exists(source):
+            print(f"📄 Generando workbook sintético de {rows} filas por hoja...")
+            start = time.perf_counter()
+            build_workbook(source, rows, seed)
+            print(f"   listo en {time.perf_counter() - start:.1f} s")
+
+        for backend in backends:
+            print(f"⏱️ {backend} · {rows} filas")
+            if backend == "sqlite":
+                path = os.path.join(workdir, f"bench_{rows}.db")
+                migrate_excel_to_sqlite(source, path)
+            else:
+                # Copia de trabajo: los casos escriben en el archivo
+                path = os.path.join(workdir, f"bench_{rows}_run.xlsx")
+                with open(source, "rb") as src, open(path, "wb") as dst:
+                    dst.write(src.read())
+            results.extend(run_cases(path, backend, rows, repeat, seed))
+    return results
+
+
+def compare(previous_path, results):
+    """Imprimir la variación de la mediana frente a un JSON anterior."""
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous = {(r["backend"], r["rows"], r["case"]): r for r in json.load(f)["results"]}
+
+    print(f"\n📊 Comparación con {previous_path}")
+    for r in results:
+        old = previous.get((r["backend"], r["rows"], r["case"]))
+        if not old or not old["median_ms"]:
+            continue
+        change = (r["median_ms"] - old["median_ms"]) / old["median_ms"] * 100
+        regression = change > REGRESSION_PERCENT and r["median_ms"] - old["median_ms"] > REGRESSION_MIN_MS
+        flag = "⚠️" if regression else "  "
+        print(f"{flag} {r['backend']:<7}{r['rows']:>7} {r['case']:<22}"
+              f"{old['median_ms']:>11.3f} → {r['median_ms']:>11.3f} ms ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de las operaciones de datos del inventario")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS),
+                        help="Filas por hoja de cada workbook sintético")
+    parser.add_argument("--backend", nargs="+", choices=("xlsx", "sqlite"), default=["xlsx", "sqlite"])
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="Repeticiones de cada operación en memoria")
+    parser.add_argument("--workdir", help="Carpeta para los workbooks generados (se reutilizan)")
+    parser.add_argument("--output", default=RESULTS_FILE, help="Archivo JSON de resultados")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--seed", type=int, default=2025)
+    args = parser.parse_args(argv)
+
+    if not HAS_OPENPYXL:
+        print("❌ Necesitas instalar openpyxl")
+        return 1
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="inventario_bench_")
+    os.makedirs(workdir, exist_ok=True)
+
+    results = run(args.rows, args.backend, args.repeat, workdir, args.seed)
+
+    report = {
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "openpyxl": openpyxl.__version__,
+        "seed": args.seed,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Resultados en {args.output}")
+
+    if args.compare:
+        compare(args.compare, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+DIARIO DE CAMBIOS - Sistema de Inventario Tecnológico
+======================================================
+Registro de solo-anexar (write-ahead) de las celdas modificadas.
+
+Cada guardado agrega una línea JSON con las celdas cambiadas
+(hoja, fila, columna → valor) y vuelve de inmediato, sin reescribir el
+.xlsx. La compactación aplica el lote al Excel cuando la aplicación está
+inactiva o se cierra; si el programa se interrumpe antes, al abrir el
+Excel se vuelven a aplicar los cambios pendientes del diario.
+
+Formato (una línea por guardado):
+    {"cells": [["Mantenimientos", 15, 3, "2025-01-20"], ...]}
+"""
+
+import json
+import os
+import socket
+from datetime import date, datetime
+
+
+JOURNAL_SUFFIX = ".journal"
+
+
+def journal_path_for(excel_path):
+    """
+    Ruta del diario de este equipo para un Excel (ej: inventario.xlsx.PC-SIS-01.journal).
+
+    Cada equipo tiene su propio diario, así varios técnicos pueden trabajar
+    sobre el mismo Excel compartido sin mezclar sus cambios pendientes.
+    """
+    return f"{excel_path}.{socket.gethostname()}{JOURNAL_SUFFIX}"
+
+
+def _encode_value(value):
+    """Fechas como {"$dt"/"$d": iso}; el resto tal cual (str, int, float, bool, None)."""
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"$d": value.isoformat()}
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "$dt" in value:
+            return datetime.fromisoformat(value["$dt"])
+        if "$d" in value:
+            return date.fromisoformat(value["$d"])
+    return value
+
+
+class ChangeJournal:
+    """
+    Archivo de diario junto al Excel.
+
+    Uso:
+        journal = ChangeJournal("inventario_hospital_v1.xlsx.journal")
+        journal.append([("Mantenimientos", 15, 3, "2025-01-20")])
+        for sheet, row, column, value in journal.read():
+            ...
+        journal.clear()  # tras compactar en el Excel
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.pending = 0  # Guardados en el diario aún no compactados
+
+    def exists(self):
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    def append(self, cells):
+        """Agregar un guardado al diario y forzarlo a disco."""
+        if not cells:
+            return
+        record = {"cells": [
+            [sheet, row, column, _encode_value(value)]
+            for sheet, row, column, value in cells
+        ]}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.pending += 1
+
+    def read(self):
+        """
+        Celdas registradas, en el orden en que se guardaron.
+
+        Una última línea incompleta (corte durante la escritura) se ignora.
+        """
+        cells = []
+        records = 0
+        if not os.path.exists(self.path):
+            self.pending = 0
+            return cells
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    print(f"⚠️ Línea incompleta en diario ignorada: {self.path}")
+                    break
+                for sheet, row, column, value in record.get("cells", []):
+                    cells.append((sheet, int(row), int(column), _decode_value(value)))
+                records += 1
+
+        self.pending = records
+        return cells
+
+    def clear(self):
+        """Vaciar el diario (los cambios ya están en el Excel)."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.pending = 0
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+SONDA CIM (POWERSHELL) - Sistema de Inventario Tecnológico
+===========================================================
+Alternativa a las sondas de hardware, sistema operativo, licencia de
+Windows, unidades de red y Windows Update: un solo proceso de PowerShell
+consulta todo por CIM y devuelve un JSON compacto. Evita lanzar cscript
+(slmgr.vbs) y "net use" y las consultas WMI/registro por separado.
+
+La interpretación (parse_cim_output) no depende de Windows: se puede
+revisar en Linux con salidas grabadas en un equipo real.
+
+Uso:
+    from cim_probe import CIM_PROBE
+    verde_data, results = collect(alternatives=(CIM_PROBE,))
+
+    python cim_probe.py --record salida_cim.json   # En Windows: grabar la salida
+    python cim_probe.py --parse salida_cim.json    # En cualquier equipo: interpretarla
+"""
+
+import argparse
+import base64
+import json
+import subprocess
+import sys
+
+from detection import SIN_SERIAL, disk_fields, license_type, valid_serial
+from probe_registry import TTL_DIAS, note_strategy, register_probe
+
+
+CIM_PROBE = "CIM (PowerShell)"
+CIM_SCRIPT_TIMEOUT = 35  # Segundos para el proceso de PowerShell
+
+# Sondas que la consulta CIM reemplaza
+CIM_REPLACES = ["Hardware (WMI)", "Sistema operativo", "Licencia Windows",
+                "Unidades de red", "Windows Update"]
+
+# -Property pide solo lo necesario (igual que las consultas WQL de wmi_session)
+CIM_SCRIPT = r"""
+$ErrorActionPreference = 'SilentlyContinue'
+[Console]::OutputEncoding = [Text.Encoding]::UTF8
+function Cim($class, $props, $filter) {
+    if ($filter) { $rows = Get-CimInstance -ClassName $class -Property $props -Filter $filter }
+    else { $rows = Get-CimInstance -ClassName $class -Property $props }
+    @($rows | Select-Object -Property $props)
+}
+$wu = Get-ItemProperty 'HKLM:\SOFTWARE\Microsoft\Windows\CurrentVersion\WindowsUpdate\Auto Update\Results\Install'
+$hotfix = Get-HotFix | Where-Object InstalledOn | Sort-Object InstalledOn -Descending | Select-Object -First 1
+[pscustomobject]@{
+    System   = Cim Win32_ComputerSystem Manufacturer,Model
+    OS       = Cim Win32_OperatingSystem Caption,Version,OSArchitecture
+    CPU      = Cim Win32_Processor Name
+    BIOS     = Cim Win32_BIOS SerialNumber
+    Board    = Cim Win32_BaseBoard SerialNumber
+    Product  = Cim Win32_ComputerSystemProduct IdentifyingNumber
+    Disks    = Cim Win32_DiskDrive Size,MediaType,SerialNumber,Manufacturer,Model
+    License  = Cim SoftwareLicensingProduct Description,ProductKeyChannel,PartialProductKey,LicenseStatus "PartialProductKey IS NOT NULL AND Name LIKE 'Windows%'"
+    Drives   = Cim Win32_LogicalDisk DeviceID,ProviderName "DriveType=4"
+    LastUpdate = $wu.LastSuccessTime
+    LastHotFix = if ($hotfix) { $hotfix.InstalledOn.ToString('yyyy-MM-dd') } else { $null }
+} | ConvertTo-Json -Compress -Depth 3
+"""
+
+
+def run_cim_script(timeout=CIM_SCRIPT_TIMEOUT):
+    """Ejecutar CIM_SCRIPT en un solo proceso de PowerShell y devolver su salida (texto JSON)."""
+    # -EncodedCommand (UTF-16LE en base64) evita problemas de comillas
+    encoded = base64.b64encode(CIM_SCRIPT.encode("utf-16-le")).decode("ascii")
+    result = subprocess.run(
+        ['powershell', '-NoProfile', '-NonInteractive', '-ExecutionPolicy', 'Bypass',
+         '-EncodedCommand', encoded],
+        capture_output=True,
+        timeout=timeout
+    )
+    output = result.stdout.decode("utf-8", errors="replace").strip()
+    if result.returncode != 0 or not output:
+        error = result.stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"PowerShell terminó con código {result.returncode}: {error[:200]}")
+    return output
+
+
+def _rows(data, key):
+    """ConvertTo-Json deja un objeto suelto en lugar de lista si hay uno solo."""
+    value = data.get(key) or []
+    return value if isinstance(value, list) else [value]
+
+
+def _first(data, key):
+    rows = _rows(data, key)
+    return rows[0] if rows else {}
+
+
+def parse_cim_output(text):
+    """
+    Convertir la salida JSON de CIM_SCRIPT en campos verdes.
+
+    Returns:
+        dict: {campo: valor} con los mismos campos que las sondas reemplazadas
+    """
+    data = json.loads(text.lstrip("\ufeff"))
+    fields = {}
+
+    # ===== SISTEMA =====
+    system = _first(data, 'System')
+    fields['marca'] = system.get('Manufacturer') or 'No detectado'
+    fields['modelo'] = system.get('Model') or 'No detectado'
+
+    os_info = _first(data, 'OS')
+    caption = (os_info.get('Caption') or '').replace('Microsoft ', '', 1).strip()
+    fields['sistema_operativo'] = caption or 'No detectado'
+    fields['arquitectura_so'] = "64 bits" if "64" in (os_info.get('OSArchitecture') or '') else "32 bits"
+    fields['procesador'] = (_first(data, 'CPU').get('Name') or '').strip() or 'No detectado'
+
+    # ===== SERIAL (mismo orden de respaldo que detect_hardware_wmi) =====
+    fields['serial'] = SIN_SERIAL
+    for key, prop, prefix, strategy in [('BIOS', 'SerialNumber', '', "BIOS"),
+                                        ('Board', 'SerialNumber', 'MB-', "BaseBoard"),
+                                        ('Product', 'IdentifyingNumber', '', "ComputerSystemProduct")]:
+        serial = next((row.get(prop) for row in _rows(data, key) if valid_serial(row.get(prop))), None)
+        if serial:
+            fields['serial'] = prefix + serial.strip()
+            note_strategy(f"CIM/{strategy}")
+            break
+    else:
+        note_strategy("CIM/Sin serial")
+
+    # ===== DISCOS =====
+    disks = _rows(data, 'Disks')
+    for number in (1, 2):
+        if len(disks) >= number:
+            fields.update(disk_fields(number, disks[number - 1]))
+        else:
+            missing = 'No detectado' if number == 1 else 'No tiene'
+            for suffix in ('capacidad', 'tipo', 'serial', 'marca', 'modelo'):
+                fields[f'disco{number}_{suffix}'] = missing
+
+    # ===== LICENCIA WINDOWS =====
+    license_info = _first(data, 'License')
+    if license_info:
+        channel = license_info.get('ProductKeyChannel') or license_info.get('Description') or ''
+        fields['licencia_windows'] = license_type(channel)
+        fields['key_windows'] = license_info.get('PartialProductKey') or 'XXXXX'
+        fields['estado_licencia_windows'] = 'Activado' if license_info.get('LicenseStatus') == 1 else 'No activado'
+    else:
+        fields['licencia_windows'] = fields['key_windows'] = fields['estado_licencia_windows'] = 'No detectado'
+
+    # ===== UNIDADES DE RED =====
+    drives = sorted({row['DeviceID'] for row in _rows(data, 'Drives') if row.get('DeviceID')})
+    fields['unidades_red_mapeadas'] = ', '.join(drives) if drives else "Ninguna"
+
+    # ===== WINDOWS UPDATE (registro; si no existe, último parche instalado) =====
+    last_update = (data.get('LastUpdate') or '')[:10] or data.get('LastHotFix')
+    fields['ultima_act_windows'] = last_update or "No detectado"
+
+    return fields
+
+
+@register_probe(CIM_PROBE, requires=('windows',), timeout=CIM_SCRIPT_TIMEOUT + 5, replaces=CIM_REPLACES,
+                ttl=TTL_DIAS,  # Incluye la licencia y Windows Update: la vigencia más corta
+                fields=['marca', 'modelo', 'serial',
+                        'disco1_capacidad', 'disco1_tipo', 'disco1_serial', 'disco1_marca', 'disco1_modelo',
+                        'disco2_capacidad', 'disco2_tipo', 'disco2_serial', 'disco2_marca', 'disco2_modelo',
+                        'sistema_operativo', 'arquitectura_so', 'procesador',
+                        'licencia_windows', 'key_windows', 'estado_licencia_windows',
+                        'unidades_red_mapeadas', 'ultima_act_windows'])
+def probe_cim():
+    return parse_cim_output(run_cim_script())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grabar o interpretar la salida de la sonda CIM")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--record", metavar="ARCHIVO", help="Ejecutar el script (Windows) y guardar su salida")
+    group.add_argument("--parse", metavar="ARCHIVO", help="Interpretar una salida grabada")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        text = run_cim_script()
+        with open(args.record, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"✅ Salida CIM guardada en {args.record}")
+    else:
+        with open(args.parse, "r", encoding="utf-8") as f:
+            text = f.read()
+    print(json.dumps(parse_cim_output(text), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
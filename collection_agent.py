@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+AGENTE DE RECOPILACIÓN - Sistema de Inventario Tecnológico
+===========================================================
+Ejecuta las mismas sondas que "Recopilación Automática", sin interfaz
+gráfica, y guarda un JSON por equipo (clave: nombre de equipo + serial).
+
+Arranque rápido: no importa tkinter, customtkinter, PIL ni tkcalendar,
+solo detection.py y sus dependencias opcionales (wmi, psutil, winreg).
+Pensado para ejecutarse por GPO o desde una memoria USB; los JSON se
+cargan luego al Excel en un solo paso.
+
+Uso:
+    python collection_agent.py --output \\\\servidor\\inventario\\agentes
+    python collection_agent.py --stdout
+    python collection_agent.py --cim --output ...   # Un solo proceso PowerShell/CIM
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import sys
+import time
+from datetime import datetime
+
+from cim_probe import CIM_PROBE
+from detection import collect, is_detected
+from file_lock import atomic_replace
+from probe_cache import ProbeCache
+from probe_executor import append_timing_log
+from software_inventory import get_software_snapshot, snapshot_hash
+
+
+AGENT_FORMAT_VERSION = 1
+
+
+def build_report(verde_data, results, duration):
+    """Documento JSON del equipo: identificación, campos verdes, programas y tiempos de sondas."""
+    software = get_software_snapshot()
+    return {
+        "format_version": AGENT_FORMAT_VERSION,
+        "hostname": verde_data.get('nombre_equipo') or socket.gethostname(),
+        "serial": verde_data['serial'] if is_detected(verde_data.get('serial')) else '',
+        "mac_address": verde_data.get('mac_address', ''),
+        "collected_at": datetime.now().isoformat(timespec="seconds"),
+        "duration_s": round(duration, 3),
+        "fields": verde_data,
+        "software_hash": snapshot_hash(software),
+        "software": software,
+        "probes": [
+            {
+                "name": r.name,
+                "status": r.status,
+                "strategy": r.strategy,
+                "seconds": round(r.elapsed, 3),
+                "error": str(r.error) if r.error else None,
+            }
+            for r in results.values()
+        ],
+    }
+
+
+def report_filename(report):
+    """inventario_<equipo>_<serial>.json (caracteres no válidos reemplazados)."""
+    key = f"{report['hostname']}_{report['serial'] or 'SIN-SERIAL'}"
+    return "inventario_" + re.sub(r'[^A-Za-z0-9._-]+', '-', key).strip('-') + ".json"
+
+
+def write_report(report, output_dir):
+    """Escribir el JSON de forma atómica (la carpeta puede ser compartida)."""
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, report_filename(report))
+    text = json.dumps(report, ensure_ascii=False, indent=2, default=str)
+
+    def write(temp_path):
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    atomic_replace(path, write)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recopilar datos del equipo sin interfaz gráfica (JSON)")
+    parser.add_argument("--output", default=".", help="Carpeta donde escribir el JSON (local o compartida)")
+    parser.add_argument("--stdout", action="store_true", help="Imprimir el JSON en lugar de escribir archivo")
+    parser.add_argument("--timings", help="CSV donde agregar los tiempos por sonda")
+    parser.add_argument("--quiet", action="store_true", help="No mostrar el avance de cada sonda")
+    parser.add_argument("--cim", action="store_true",
+                        help="Usar una sola consulta PowerShell/CIM en lugar de WMI, slmgr y net use")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Ejecutar todas las sondas aunque haya resultados vigentes en caché")
+    parser.add_argument("--no-cache", action="store_true", help="No leer ni guardar la caché de sondas")
+    args = parser.parse_args(argv)
+
+    def on_result(result):
+        if not args.quiet:
+            strategy = f" vía {result.strategy}" if result.strategy else ""
+            print(f"   {result.status:<8} {result.name} ({result.elapsed:.1f} s{strategy})", file=sys.stderr)
+
+    start = time.monotonic()
+    alternatives = (CIM_PROBE,) if args.cim else ()
+    cache = None if args.no_cache else ProbeCache.for_host()
+    verde_data, results = collect(on_result=on_result, alternatives=alternatives,
+                                  cache=cache, refresh=args.refresh)
+    report = build_report(verde_data, results, time.monotonic() - start)
+
+    if args.timings:
+        try:
+            append_timing_log(args.timings, report["hostname"], results)
+        except OSError as e:
+            print(f"⚠️ No se pudo registrar tiempos de sondas: {e}", file=sys.stderr)
+
+    if args.stdout:
+        print(json.dumps(report, ensure_ascii=False, indent=2, default=str))
+        return 0
+
+    try:
+        path = write_report(report, args.output)
+    except OSError as e:
+        print(f"❌ No se pudo escribir el JSON: {e}", file=sys.stderr)
+        return 1
+    print(f"✅ {report['hostname']} ({report['duration_s']} s): {path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
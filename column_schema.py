@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+ESQUEMA DE COLUMNAS - Sistema de Inventario Tecnológico
+========================================================
+Única declaración de las columnas de cada hoja del Excel.
+
+Cada hoja es una lista ordenada de campos (posición 0 = columna 1).
+Un campo None es una columna que el programa no administra: nunca se
+escribe y se conserva tal como esté en el Excel.
+
+A partir de la lista se precalculan los mapas campo → columna, de modo
+que los formularios leen y escriben filas completas por nombre de campo
+(session.read_row / session.write_row) sin números de columna sueltos.
+Para mover o agregar una columna basta con editar la lista.
+"""
+
+# ============================================================================
+# EQUIPOS DE CÓMPUTO (78 COLUMNAS)
+# ============================================================================
+
+EQUIPOS_ID_FIELDS = ['consecutivo', 'codigo', 'nombre_equipo']  # Cols 1-3
+
+# Cols 4-38: NARANJAS (datos manuales)
+EQUIPOS_NARANJA_FIELDS = (
+    # Básicos (7)
+    ['tipo_equipo', 'area_servicio', 'ubicacion_especifica', 'responsable_custodio',
+     'macroproceso', 'proceso', 'subproceso'] +
+    # Software (5)
+    ['uso_sihos', 'uso_office_basico', 'software_especializado',
+     'descripcion_software', 'funcion_principal'] +
+    # Cuestionario de clasificación: 9 Confidencialidad, 3 Integridad, 6 Criticidad
+    [f'conf_{i}' for i in range(1, 10)] +
+    [f'int_{i}' for i in range(1, 4)] +
+    [f'crit_{i}' for i in range(1, 7)] +
+    # Operativos (5)
+    ['horario_uso', 'estado_operativo', 'observaciones_tecnicas',
+     'periodicidad_mtto', 'responsable_mtto']
+)
+
+# Cols 39-71: VERDES (detección automática de hardware y software)
+EQUIPOS_VERDE_FIELDS = [
+    'marca', 'modelo', 'serial', 'sistema_operativo', 'arquitectura_so',
+    'procesador', 'ram_gb',
+    # DISCO 1 (5 campos)
+    'disco1_capacidad', 'disco1_tipo', 'disco1_serial', 'disco1_marca', 'disco1_modelo',
+    # DISCO 2 (5 campos)
+    'disco2_capacidad', 'disco2_tipo', 'disco2_serial', 'disco2_marca', 'disco2_modelo',
+    # Resto
+    'uso_navegador_web', 'version_office', 'licencia_office',
+    'uso_teams', 'uso_outlook', 'licencia_windows', 'key_windows',
+    'estado_licencia_windows',
+    'direccion_ip',
+    'mac_address',
+    'tipo_conexion',
+    'navegador_predeterminado',
+    'unidades_red_mapeadas',
+    'antivirus_instalado', 'ultima_act_windows', 'windows_update_activo'
+]
+
+# Campos que llena la recopilación automática (nombre del equipo + verdes)
+DETECTED_FIELDS = ['nombre_equipo'] + EQUIPOS_VERDE_FIELDS
+
+# Cols 72-78: AZULES (mixtos con validación)
+EQUIPOS_AZUL_FIELDS = [
+    'switch_puerto', 'vlan_asignada', 'id_anydesk',
+    'otro_acceso_remoto', 'estado_antivirus',
+    'cifrado_disco', 'tipo_usuario_local'
+]
+
+
+class SheetSchema:
+    """
+    Columnas de una hoja y sus mapas precalculados.
+
+    Uso:
+        schema = SCHEMAS["Periféricos"]
+        schema.column('serial')                 # 7
+        cells = schema.cells({'serial': 'X1'})  # {7: 'X1'}
+        data = schema.record(session.read_row("Periféricos", fila, schema.width))
+    """
+
+    def __init__(self, sheet_name, fields, tipo_field='tipo', estado_field=None, default_tipo=''):
+        self.sheet_name = sheet_name
+        self.fields = tuple(fields)
+        self.width = len(self.fields)
+        self.columns = {field: i for i, field in enumerate(self.fields, start=1) if field}
+        self.tipo_field = tipo_field      # Campo con el tipo de equipo (autocompletar bajas)
+        self.estado_field = estado_field  # Campo que pasa a "DADO DE BAJA"
+        self.default_tipo = default_tipo
+
+    def column(self, field):
+        """Número de columna (1-based) del campo, o None si la hoja no lo tiene."""
+        return self.columns.get(field)
+
+    def cells(self, data, default=None, fields=None):
+        """
+        Convertir {campo: valor} en {columna: valor} para session.write_row.
+
+        Args:
+            data: valores por campo (los campos que la hoja no tiene se ignoran)
+            default: si no es None, los campos ausentes en data se escriben con
+                     este valor; si es None, solo se escriben los presentes
+            fields: limitar a estos campos (ej: solo las columnas naranjas)
+        """
+        cells = {}
+        for field in (fields if fields is not None else self.columns):
+            column = self.columns.get(field)
+            if column is None:
+                continue
+            if field in data:
+                cells[column] = data[field]
+            elif default is not None:
+                cells[column] = default
+        return cells
+
+    def record(self, values):
+        """Convertir la tupla de una fila (session.read_row) en {campo: valor}."""
+        values = tuple(values or ())
+        return {
+            field: (values[i] if i < len(values) else None)
+            for i, field in enumerate(self.fields) if field
+        }
+
+
+SCHEMAS = {
+    "Equipos de Cómputo": SheetSchema(
+        "Equipos de Cómputo",
+        EQUIPOS_ID_FIELDS + EQUIPOS_NARANJA_FIELDS + EQUIPOS_VERDE_FIELDS + EQUIPOS_AZUL_FIELDS,
+        tipo_field='tipo_equipo', estado_field='estado_operativo', default_tipo="Computador"
+    ),
+    "Impresoras y Escáneres": SheetSchema(
+        "Impresoras y Escáneres",
+        ['consecutivo', 'codigo', 'codigo_asignado', 'tipo', 'marca', 'modelo', 'serial',
+         'area', 'ubicacion', 'funcion', 'ip', 'estado', None, None, 'observaciones'],
+        estado_field='estado', default_tipo="Impresora"
+    ),
+    "Periféricos": SheetSchema(
+        "Periféricos",
+        ['consecutivo', 'codigo', 'codigo_asignado', 'tipo', 'marca', 'modelo', 'serial',
+         'area', 'estado', None, 'observaciones'],
+        estado_field='estado', default_tipo="Periférico"
+    ),
+    "Equipos de Red": SheetSchema(
+        "Equipos de Red",
+        ['consecutivo', 'codigo', 'tipo', 'marca', 'modelo', 'serial', 'ip', 'puertos',
+         'ubicacion', 'area', 'estado', None, None, 'observaciones'],
+        estado_field='estado', default_tipo="Equipo de Red"
+    ),
+    "Mantenimientos": SheetSchema(
+        "Mantenimientos",
+        ['consecutivo', 'codigo_equipo', 'fecha_mtto', 'tipo', 'tecnico', 'descripcion',
+         'repuestos', 'estado_post', 'proximo', 'observaciones']
+    ),
+    "Equipos Dados de Baja": SheetSchema(
+        "Equipos Dados de Baja",
+        ['codigo_original', 'tipo', 'marca', 'modelo', 'serial', 'fecha_baja',
+         'motivo', 'destino', 'responsable', 'observaciones']
+    ),
+}
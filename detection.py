@@ -0,0 +1,759 @@
+# -*- coding: utf-8 -*-
+"""
+DETECCIÓN AUTOMÁTICA - Sistema de Inventario Tecnológico
+=========================================================
+Funciones que detectan el hardware y software del equipo (columnas
+verdes de "Equipos de Cómputo").
+
+No importa tkinter ni customtkinter. Las detecciones se registran como
+sondas independientes (probe_registry) que probe_executor ejecuta en
+paralelo, cada una con su tiempo límite.
+"""
+
+import os
+import platform
+import re
+import socket
+import subprocess
+import sys
+from datetime import datetime
+
+from probe_executor import STATUS_OK, STATUS_SKIPPED, STATUS_TIMEOUT, run_probes
+from probe_registry import (PROBES, TTL_DIAS, TTL_HORAS, TTL_MINUTOS, note_strategy,
+                            register_probe, registered_probes)
+from software_inventory import clear_snapshot, find_package, get_software_snapshot
+from wmi_session import HAS_WMI, get_wmi_session, wmi_available
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+if not HAS_WMI:
+    print("WMI no disponible - Detección de hardware limitada", file=sys.stderr)
+
+try:
+    import winreg
+    HAS_WINREG = True
+except ImportError:
+    HAS_WINREG = False
+
+
+TIEMPO_AGOTADO = "No detectado (tiempo agotado)"
+
+# Office en el inventario de software (sin idiomas, herramientas ni componentes sueltos)
+OFFICE_PATTERN = r"^Microsoft (Office|365)\b"
+OFFICE_COMPONENTS = r"proofing|click-to-run|component|\bmui\b|language|idioma|shared|runtime|visio|project"
+
+
+def is_detected(value):
+    """False para valores vacíos o marcadores ("No detectado...", "Requiere psutil", ...)."""
+    value = str(value or '').strip()
+    return bool(value) and not value.startswith(("No detectado", "Requiere"))
+
+
+# ============================================================================
+# INTERPRETACIÓN COMÚN (WMI Y CIM)
+# ============================================================================
+
+SERIALES_INVALIDOS = ['default string', 'to be filled by o.e.m.',
+                      'system serial number', 'base board serial number',
+                      'chassis serial number', '']
+SIN_SERIAL = "No detectado (PC genérico/armado)"
+
+# Propiedades de Win32_DiskDrive que usa disk_fields()
+DISK_PROPERTIES = ["Size", "MediaType", "SerialNumber", "Manufacturer", "Model"]
+
+
+def valid_serial(value):
+    """False para seriales vacíos o genéricos de fábrica ("Default string", ...)."""
+    serial = str(value or '').strip()
+    return bool(serial) and serial.lower() not in SERIALES_INVALIDOS
+
+
+def disk_fields(number, disk):
+    """Campos disco<N>_* a partir de un Win32_DiskDrive como dict."""
+    prefix = f"disco{number}_"
+    fields = {}
+    
+    # Capacidad en GB
+    try:
+        size_bytes = int(disk.get('Size') or 0)
+        fields[prefix + 'capacidad'] = str(round(size_bytes / (1024**3)))
+    except (TypeError, ValueError):
+        fields[prefix + 'capacidad'] = 'No detectado'
+    
+    # Tipo (SSD o HDD)
+    media_type = str(disk.get('MediaType') or '')
+    if 'SSD' in media_type.upper() or 'Solid State' in media_type:
+        fields[prefix + 'tipo'] = 'SSD'
+    else:
+        fields[prefix + 'tipo'] = 'HDD'
+    
+    serial_disk = str(disk.get('SerialNumber') or '').strip()
+    fields[prefix + 'serial'] = serial_disk if serial_disk else 'No detectado'
+    
+    marca_disk = str(disk.get('Manufacturer') or '').strip()
+    if marca_disk and marca_disk.lower() != '(standard disk drives)':
+        fields[prefix + 'marca'] = marca_disk
+    else:
+        fields[prefix + 'marca'] = 'No detectado'
+    
+    modelo_disk = str(disk.get('Model') or '').strip()
+    fields[prefix + 'modelo'] = modelo_disk if modelo_disk else 'No detectado'
+    return fields
+
+
+def license_type(text):
+    """Canal de la licencia de Windows (OEM, Retail, Volume) según el texto de slmgr o CIM."""
+    for channel in ('OEM', 'Retail', 'Volume'):
+        if channel in text:
+            return channel
+    return 'Detectado'
+
+
+# ============================================================================
+# FUNCIONES DE DETECCIÓN
+# ============================================================================
+
+def detect_hardware_wmi():
+    """
+    Detectar hardware usando WMI.
+    """
+    info = {
+        'marca': 'No detectado',
+        'modelo': 'No detectado',
+        'serial': 'No detectado',
+        # DISCO 1 (Primario)
+        'disco1_capacidad': 'No detectado',  
+        'disco1_tipo': 'No detectado',      
+        'disco1_serial': 'No detectado',
+        'disco1_marca': 'No detectado',
+        'disco1_modelo': 'No detectado',
+        # DISCO 2 (Secundario)
+        'disco2_capacidad': 'No tiene',
+        'disco2_tipo': 'No tiene',
+        'disco2_serial': 'No tiene',
+        'disco2_marca': 'No tiene',
+        'disco2_modelo': 'No tiene'
+    }
+    
+    if not wmi_available():
+        return info
+    
+    try:
+        # Conexión compartida (COM se inicializa una sola vez, en el hilo de la sesión)
+        c = get_wmi_session()
+        
+        # ===== INFORMACIÓN DEL SISTEMA =====
+        for system in c.select("Win32_ComputerSystem", ["Manufacturer", "Model"]):
+            info['marca'] = system['Manufacturer'] or 'No detectado'
+            info['modelo'] = system['Model'] or 'No detectado'
+        
+        # ===== SERIAL DEL EQUIPO =====
+        serial_found = False
+        
+        # Intentar BIOS primero
+        for bios in c.select("Win32_BIOS", ["SerialNumber"]):
+            if valid_serial(bios['SerialNumber']):
+                info['serial'] = bios['SerialNumber'].strip()
+                serial_found = True
+                note_strategy("BIOS")
+                break
+        
+        # Intentar BaseBoard
+        if not serial_found:
+            for board in c.select("Win32_BaseBoard", ["SerialNumber"]):
+                if valid_serial(board['SerialNumber']):
+                    info['serial'] = f"MB-{board['SerialNumber'].strip()}"
+                    serial_found = True
+                    note_strategy("BaseBoard")
+                    break
+        
+        # Intentar ComputerSystemProduct
+        if not serial_found:
+            for product in c.select("Win32_ComputerSystemProduct", ["IdentifyingNumber"]):
+                if valid_serial(product['IdentifyingNumber']):
+                    info['serial'] = product['IdentifyingNumber'].strip()
+                    serial_found = True
+                    note_strategy("ComputerSystemProduct")
+                    break
+        
+        if not serial_found:
+            info['serial'] = SIN_SERIAL
+            note_strategy("Sin serial")
+        
+        # ===== DISCOS FÍSICOS =====
+        disks = c.select("Win32_DiskDrive", DISK_PROPERTIES)
+        
+        # Disco 1 (primario) y disco 2 (secundario)
+        for number, disk in enumerate(disks[:2], start=1):
+            info.update(disk_fields(number, disk))
+    
+    except Exception as e:
+        print(f"Error WMI: {e}")
+    
+    return info
+
+
+def detect_office_version():
+    """Detectar versión de Office: Busca ejecutables incluso sin licencia."""
+    if not HAS_WINREG:
+        return "No detectado", "No detectado"
+    
+    try:
+        # ESTRATEGIA 1: Buscar en InstallRoot (instalación completa licenciada)
+        key_paths = [
+            r"SOFTWARE\Microsoft\Office\16.0\Common\InstallRoot",  # Office 2016/2019/365
+            r"SOFTWARE\Microsoft\Office\15.0\Common\InstallRoot",  # Office 2013
+            r"SOFTWARE\Microsoft\Office\14.0\Common\InstallRoot",  # Office 2010
+        ]
+        
+        for key_path in key_paths:
+            try:
+                key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path)
+                path = winreg.QueryValueEx(key, "Path")[0]
+                winreg.CloseKey(key)
+                
+                if "16.0" in key_path:
+                    version = "Office 2016/2019/365"
+                elif "15.0" in key_path:
+                    version = "Office 2013"
+                elif "14.0" in key_path:
+                    version = "Office 2010"
+                else:
+                    version = "Detectado"
+                
+                licencia = "Retail/Volume"
+                note_strategy("InstallRoot")
+                return version, licencia
+            except:
+                continue
+        
+        # ESTRATEGIA 2: Buscar en el inventario de software (una sola lectura de Uninstall)
+        office = find_package(get_software_snapshot(), OFFICE_PATTERN, exclude=OFFICE_COMPONENTS)
+        if office:
+            note_strategy("Inventario de software")
+            return office['nombre'], "Instalado (verificar licencia)"
+        
+        # ESTRATEGIA 3: Buscar ejecutables de Office (incluso sin licencia completa)
+        office_paths = [
+            (r"C:\Program Files\Microsoft Office\root\Office16\WINWORD.EXE", "Office 2016/2019/365"),
+            (r"C:\Program Files (x86)\Microsoft Office\root\Office16\WINWORD.EXE", "Office 2016/2019/365"),
+            (r"C:\Program Files\Microsoft Office\Office16\WINWORD.EXE", "Office 2016/2019/365"),
+            (r"C:\Program Files (x86)\Microsoft Office\Office16\WINWORD.EXE", "Office 2016/2019/365"),
+            (r"C:\Program Files\Microsoft Office\Office15\WINWORD.EXE", "Office 2013"),
+            (r"C:\Program Files (x86)\Microsoft Office\Office15\WINWORD.EXE", "Office 2013"),
+            (r"C:\Program Files\Microsoft Office\Office14\WINWORD.EXE", "Office 2010"),
+            (r"C:\Program Files (x86)\Microsoft Office\Office14\WINWORD.EXE", "Office 2010"),
+        ]
+        
+        for path, version in office_paths:
+            if os.path.exists(path):
+                note_strategy("Ejecutable")
+                return version, "Instalado (verificar licencia)"
+        
+        return "No instalado", "N/A"
+    
+    except Exception as e:
+        return "No detectado", "No detectado"
+
+
+def detect_office_apps():
+    """Detectar si Teams y Outlook están instalados."""
+    teams = "No"
+    outlook = "No"
+    
+    # Inventario de software (Teams clásico y Outlook independiente figuran en Uninstall)
+    packages = get_software_snapshot()
+    if find_package(packages, r"\bTeams\b"):
+        teams = "Sí"
+    if find_package(packages, r"\bOutlook\b"):
+        outlook = "Sí"
+    
+    # Rutas comunes de Teams
+    teams_paths = [
+        r"C:\Users\{}\AppData\Local\Microsoft\Teams\current\Teams.exe",
+        r"C:\Program Files\Microsoft\Teams\current\Teams.exe",
+        r"C:\Program Files (x86)\Microsoft\Teams\current\Teams.exe"
+    ]
+    
+    username = os.environ.get('USERNAME', '')
+    for path in teams_paths if teams == "No" else []:
+        full_path = path.format(username)
+        if os.path.exists(full_path):
+            teams = "Sí"
+            break
+    
+    # Rutas comunes de Outlook
+    outlook_paths = [
+        r"C:\Program Files\Microsoft Office\root\Office16\OUTLOOK.EXE",
+        r"C:\Program Files (x86)\Microsoft Office\root\Office16\OUTLOOK.EXE",
+        r"C:\Program Files\Microsoft Office\Office16\OUTLOOK.EXE",
+        r"C:\Program Files (x86)\Microsoft Office\Office16\OUTLOOK.EXE",
+    ]
+    
+    for path in outlook_paths if outlook == "No" else []:
+        if os.path.exists(path):
+            outlook = "Sí"
+            break
+    
+    return teams, outlook
+
+
+def detect_windows_license():
+    """Detectar información de licencia de Windows."""
+    licencia_info = {
+        'tipo': 'No detectado',
+        'key': 'No detectado',
+        'estado': 'No detectado'
+    }
+    
+    try:
+        # Ejecutar slmgr para obtener info de licencia
+        result = subprocess.run(
+            ['cscript', '//nologo', r'C:\Windows\System32\slmgr.vbs', '/dli'],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+        
+        output = result.stdout
+        
+        # Parsear tipo de licencia
+        licencia_info['tipo'] = license_type(output)
+        
+        # Estado
+        if 'Licensed' in output or 'Licenciado' in output:
+            licencia_info['estado'] = 'Activado'
+        else:
+            licencia_info['estado'] = 'No activado'
+        
+        # Últimos 5 dígitos de la key (misma salida de /dli, sin segunda llamada a slmgr)
+        key_match = re.search(r'([A-Z0-9]{5})$', output, re.MULTILINE)
+        if key_match:
+            licencia_info['key'] = key_match.group(1)
+        else:
+            licencia_info['key'] = 'XXXXX'
+    
+    except Exception as e:
+        print(f"Error detectando licencia Windows: {e}")
+    
+    return licencia_info
+
+
+def detect_last_windows_update():
+    """Detectar última actualización de Windows."""
+    try:
+        if not HAS_WINREG:
+            return "No detectado"
+        
+        key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, 
+                             r"SOFTWARE\Microsoft\Windows\CurrentVersion\WindowsUpdate\Auto Update\Results\Install")
+        last_success = winreg.QueryValueEx(key, "LastSuccessTime")[0]
+        winreg.CloseKey(key)
+        
+        # Formatear fecha
+        if last_success:
+            # Formato: YYYY-MM-DD HH:MM:SS
+            try:
+                date_obj = datetime.strptime(last_success, "%Y-%m-%d %H:%M:%S")
+                return date_obj.strftime("%Y-%m-%d")
+            except:
+                return last_success[:10]  # Primeros 10 caracteres (fecha)
+        
+        return "No detectado"
+    
+    except Exception as e:
+        return "No detectado"
+    
+def detect_mac_address():
+    """Detectar dirección MAC de la interfaz de red principal."""
+    try:
+        import uuid
+        mac = ':'.join(['{:02x}'.format((uuid.getnode() >> elements) & 0xff)
+                       for elements in range(0,2*6,2)][::-1])
+        return mac.upper()
+    except:
+        return "No detectado"
+
+
+def detect_default_browser():
+    """Detectar navegador predeterminado en Windows."""
+    if not HAS_WINREG:
+        return "No detectado"
+    
+    try:
+        # Leer asociación de protocolo http
+        key = winreg.OpenKey(
+            winreg.HKEY_CURRENT_USER,
+            r"Software\\Microsoft\\Windows\\Shell\\Associations\\UrlAssociations\\http\\UserChoice"
+        )
+        prog_id = winreg.QueryValueEx(key, "ProgId")[0]
+        winreg.CloseKey(key)
+        
+        # Mapear ProgId a nombre de navegador
+        browser_map = {
+            'ChromeHTML': 'Google Chrome',
+            'FirefoxURL': 'Mozilla Firefox',
+            'MSEdgeHTM': 'Microsoft Edge',
+            'IE.HTTP': 'Internet Explorer',
+            'BraveHTML': 'Brave',
+            'OperaStable': 'Opera'
+        }
+        
+        for key_name, browser_name in browser_map.items():
+            if key_name in prog_id:
+                note_strategy("UserChoice")
+                return browser_name
+        
+        return "Otro navegador"
+    
+    except Exception as e:
+        # Fallback: buscar ejecutables comunes
+        browsers = [
+            (r"C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe", "Google Chrome"),
+            (r"C:\\Program Files (x86)\\Google\\Chrome\\Application\\chrome.exe", "Google Chrome"),
+            (r"C:\\Program Files\\Mozilla Firefox\\firefox.exe", "Mozilla Firefox"),
+            (r"C:\\Program Files (x86)\\Mozilla Firefox\\firefox.exe", "Mozilla Firefox"),
+            (r"C:\\Program Files (x86)\\Microsoft\\Edge\\Application\\msedge.exe", "Microsoft Edge"),
+        ]
+        
+        for path, name in browsers:
+            if os.path.exists(path):
+                note_strategy("Ejecutable")
+                return f"{name} (detectado)"
+        
+        return "No detectado"
+
+
+def detect_network_drives():
+    """Detectar unidades de red mapeadas (ej: Z:\\, Y:\\)."""
+    try:
+        # Ejecutar comando "net use" para listar unidades de red
+        result = subprocess.run(
+            ['net', 'use'],
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+        
+        output = result.stdout
+        drives = []
+        
+        # Parsear salida de "net use"
+        for line in output.split('\\n'):
+            # Buscar líneas con unidades (formato: OK   Z:   \\\\servidor\\carpeta)
+            if ':' in line and '\\\\\\\\' in line:
+                parts = line.split()
+                for part in parts:
+                    if ':' in part and len(part) == 2:
+                        drives.append(part)
+        
+        if drives:
+            return ', '.join(sorted(set(drives)))
+        else:
+            return "Ninguna"
+    
+    except Exception as e:
+        return "No detectado"
+
+
+def detect_ip_local(adapters=None):
+    """
+    IP local sin tráfico de red.
+
+    Se usa cuando no hay un adaptador físico activo: toma la dirección de
+    los adaptadores que ya leyó psutil (activos primero, luego los no
+    virtuales) y solo si no hay ninguno consulta el nombre del equipo con
+    getaddrinfo (que puede resolver por DNS/NetBIOS y demorar).
+    """
+    adapters = read_adapters() if adapters is None else adapters
+    if adapters:
+        note_strategy("Adaptadores (psutil)")
+        return min(adapters, key=lambda a: (not a['activo'], a['virtual']))['ip']
+    
+    try:
+        infos = socket.getaddrinfo(socket.gethostname(), None, socket.AF_INET)
+    except (OSError, UnicodeError):
+        return "No detectado"
+    
+    ips = [info[4][0] for info in infos]
+    usable = [ip for ip in ips if not ip.startswith(("127.", "169.254."))]
+    if not ips:
+        return "No detectado"
+    note_strategy("Hostname")
+    return (usable or ips)[0]
+
+
+# Adaptadores que no son la conexión del equipo (virtuales, túneles, Bluetooth)
+VIRTUAL_ADAPTER_RE = re.compile(
+    r"loopback|^lo$|vethernet|hyper-v|vmware|virtualbox|vbox|bluetooth|docker|^veth|^br-|"
+    r"virbr|^tap|^tun|npcap|pseudo|teredo|isatap|zerotier|wsl", re.IGNORECASE)
+WIFI_ADAPTER_RE = re.compile(r"wi-?fi|wireless|wlan|^wl|802\.11|inal[aá]mbrica", re.IGNORECASE)
+
+
+def read_adapters():
+    """
+    Adaptadores con IPv4 (sin loopback ni APIPA), activos o no, en una lectura de psutil.
+
+    Returns:
+        list: dicts {nombre, ip, mac, velocidad_mbps, tipo, activo, virtual}
+    """
+    if not HAS_PSUTIL:
+        return []
+    
+    stats = psutil.net_if_stats()
+    adapters = []
+    for name, addresses in psutil.net_if_addrs().items():
+        ips = [a.address for a in addresses if a.family == socket.AF_INET
+               and not a.address.startswith(("127.", "169.254."))]
+        macs = [a.address for a in addresses if a.family == psutil.AF_LINK and a.address]
+        if not ips:
+            continue
+        
+        stat = stats.get(name)
+        adapters.append({
+            'nombre': name,
+            'ip': ips[0],
+            'mac': macs[0].replace('-', ':').upper() if macs else "No detectado",
+            'velocidad_mbps': stat.speed if stat else 0,  # 0 si el sistema no la informa
+            'tipo': "WiFi" if WIFI_ADAPTER_RE.search(name) else "Cableado",
+            'activo': bool(stat and stat.isup),
+            'virtual': bool(VIRTUAL_ADAPTER_RE.search(name)),
+        })
+    return adapters
+
+
+def detect_network_interfaces(adapters=None):
+    """
+    Adaptadores físicos activos con IPv4, sin tráfico de red (psutil).
+
+    Args:
+        adapters: resultado de read_adapters() si ya se leyó
+
+    Returns:
+        list: dicts {nombre, ip, mac, velocidad_mbps, tipo ('Cableado'/'WiFi')},
+              primero los cableados y los más rápidos
+    """
+    adapters = read_adapters() if adapters is None else adapters
+    interfaces = [
+        {key: a[key] for key in ('nombre', 'ip', 'mac', 'velocidad_mbps', 'tipo')}
+        for a in adapters if a['activo'] and not a['virtual']
+    ]
+    interfaces.sort(key=lambda i: (i['tipo'] != "Cableado", -i['velocidad_mbps']))
+    return interfaces
+
+
+def detect_system_info():
+    """Sistema operativo, arquitectura y procesador."""
+    return {
+        'sistema_operativo': f"{platform.system()} {platform.release()}",
+        'arquitectura_so': "64 bits" if "64" in platform.machine() else "32 bits",
+        'procesador': platform.processor() or "No detectado",
+    }
+
+
+def detect_memory():
+    """RAM (redondeada al tamaño comercial) y almacenamiento de C:."""
+    if not HAS_PSUTIL:
+        return {'ram_gb': "Requiere psutil", 'almacenamiento_gb': "Requiere psutil"}
+    
+    # Obtener RAM utilizable
+    ram_bytes = psutil.virtual_memory().total
+    ram_gib_usable = ram_bytes / (1024**3)  # GiB utilizables
+    
+    # Tamaños comerciales estándar
+    common_sizes = [2, 4, 6, 8, 12, 16, 24, 32, 48, 64, 128]
+    
+    # Redondeo inteligente: el tamaño comercial más probable
+    # considerando que puede haber RAM reservada
+    best_match = None
+    min_diff = float('inf')
+    
+    for size in common_sizes:
+        # Considerar margen de -20% (por GPU integrada, BIOS, etc)
+        expected_usable = size * 0.80  # 80% del tamaño comercial
+        diff = abs(ram_gib_usable - expected_usable)
+        
+        # También considerar coincidencia directa
+        direct_diff = abs(ram_gib_usable - size)
+        
+        # Usar la mejor coincidencia
+        actual_diff = min(diff, direct_diff)
+        
+        if actual_diff < min_diff:
+            min_diff = actual_diff
+            best_match = size
+    
+    info = {'ram_gb': str(best_match)}
+    
+    # Almacenamiento
+    try:
+        disk = psutil.disk_usage('C:\\\\')
+        info['almacenamiento_gb'] = str(round(disk.total / (1024**3)))
+    except:
+        info['almacenamiento_gb'] = "No detectado"
+    
+    return info
+
+
+# ============================================================================
+# SONDAS DE RECOPILACIÓN
+# ============================================================================
+
+@register_probe("Hardware (WMI)", requires=('wmi',), timeout=30, ttl=90 * TTL_DIAS, fields=[
+    'marca', 'modelo', 'serial',
+    'disco1_capacidad', 'disco1_tipo', 'disco1_serial', 'disco1_marca', 'disco1_modelo',
+    'disco2_capacidad', 'disco2_tipo', 'disco2_serial', 'disco2_marca', 'disco2_modelo'])
+def probe_hardware():
+    return detect_hardware_wmi()
+
+
+@register_probe("Sistema operativo", ttl=TTL_DIAS, fields=['sistema_operativo', 'arquitectura_so', 'procesador'])
+def probe_system():
+    return detect_system_info()
+
+
+@register_probe("Memoria", requires=('psutil',), ttl=30 * TTL_DIAS, fields=['ram_gb', 'almacenamiento_gb'])
+def probe_memory():
+    return detect_memory()
+
+
+@register_probe("Software instalado", requires=('winreg',), timeout=20, fields=['software_instalado'])
+def probe_software():
+    # Solo informativo (log); la lista completa se guarda con software_inventory.SoftwareStore
+    return {'software_instalado': f"{len(get_software_snapshot())} programas"}
+
+
+@register_probe("Office", requires=('winreg',), timeout=15, ttl=3 * TTL_DIAS, fields=['version_office', 'licencia_office'])
+def probe_office():
+    version, licencia = detect_office_version()
+    return {'version_office': version, 'licencia_office': licencia}
+
+
+@register_probe("Teams / Outlook", ttl=TTL_DIAS, fields=['uso_teams', 'uso_outlook'])
+def probe_office_apps():
+    teams, outlook = detect_office_apps()
+    return {'uso_teams': teams, 'uso_outlook': outlook}
+
+
+@register_probe("Licencia Windows", requires=('windows',), timeout=25, ttl=3 * TTL_DIAS,
+                fields=['licencia_windows', 'key_windows', 'estado_licencia_windows'])
+def probe_windows_license():
+    lic_info = detect_windows_license()
+    return {'licencia_windows': lic_info['tipo'], 'key_windows': lic_info['key'],
+            'estado_licencia_windows': lic_info['estado']}
+
+
+@register_probe("Red", ttl=10 * TTL_MINUTOS, fields=['direccion_ip', 'mac_address', 'tipo_conexion', 'interfaces_red'])
+def probe_network():
+    adapters = read_adapters()
+    interfaces = detect_network_interfaces(adapters)
+    if not interfaces:
+        # Sin adaptador físico activo: otro adaptador ya leído o, sin psutil, el nombre del equipo
+        return {'direccion_ip': detect_ip_local(adapters), 'mac_address': detect_mac_address(),
+                'tipo_conexion': "No detectado", 'interfaces_red': "No detectado"}
+    
+    note_strategy("Interfaces (psutil)")
+    tipos = {i['tipo'] for i in interfaces}
+    primary = interfaces[0]
+    return {
+        'direccion_ip': primary['ip'],
+        'mac_address': primary['mac'],
+        'tipo_conexion': "Ambos" if len(tipos) > 1 else primary['tipo'],
+        # Solo informativo (log y JSON del agente): no tiene columna en el Excel
+        'interfaces_red': "; ".join(
+            f"{i['nombre']}: {i['ip']} {i['mac']} {i['velocidad_mbps'] or '?'} Mb/s ({i['tipo']})"
+            for i in interfaces),
+    }
+
+
+@register_probe("Navegador", requires=('winreg',), ttl=TTL_DIAS, fields=['navegador_predeterminado'])
+def probe_browser():
+    return {'navegador_predeterminado': detect_default_browser()}
+
+
+@register_probe("Unidades de red", requires=('windows',), ttl=TTL_HORAS, fields=['unidades_red_mapeadas'])
+def probe_network_drives():
+    return {'unidades_red_mapeadas': detect_network_drives()}
+
+
+@register_probe("Windows Update", requires=('winreg',), ttl=TTL_DIAS, fields=['ultima_act_windows'])
+def probe_windows_update():
+    return {'ultima_act_windows': detect_last_windows_update()}
+
+
+def default_verde_data():
+    """Valores que no se detectan (fijos) y el nombre del equipo."""
+    return {
+        'nombre_equipo': socket.gethostname(),
+        'uso_navegador_web': "Sí",
+        'antivirus_instalado': "Windows Defender",
+        'windows_update_activo': "Sí",
+    }
+
+
+def collect(on_result=None, alternatives=(), on_start=None, cache=None, refresh=False):
+    """
+    Ejecutar las sondas registradas y armar los datos verdes.
+
+    Los campos de una sonda sin respuesta quedan "No detectado (tiempo
+    agotado)"; los de una sonda sin requisitos, "Requiere ...".
+
+    Con cache (probe_cache.ProbeCache), las sondas con resultado vigente no
+    se ejecutan (estado "cached") y los resultados nuevos completamente
+    detectados se guardan; refresh=True ejecuta todas y renueva la caché.
+
+    Args:
+        on_result: on_result(ProbeResult) al terminar cada sonda (para el log)
+        alternatives: sondas alternativas a usar (ej. cim_probe.CIM_PROBE)
+        on_start: on_start(nombre) al lanzar cada sonda
+        cache: caché de resultados por equipo (None = sin caché)
+        refresh: ignorar los resultados en caché
+
+    Returns:
+        tuple: (verde_data, {nombre: ProbeResult})
+    """
+    verde_data = default_verde_data()
+    clear_snapshot()  # Cada recopilación lee el registro de programas una vez
+
+    def apply(result):
+        if result.ok:
+            verde_data.update(result.fields)
+        else:
+            if result.status == STATUS_TIMEOUT:
+                value = TIEMPO_AGOTADO
+            elif result.status == STATUS_SKIPPED:
+                value = result.error  # "Requiere wmi", ...
+            else:
+                value = "No detectado"
+            for field in PROBES[result.name].fields:
+                verde_data[field] = value
+        if on_result:
+            on_result(result)
+
+    probes = registered_probes(alternatives)
+    results = {}
+    if cache is not None and not refresh:
+        for probe in probes:
+            cached = cache.get(probe)
+            if cached:
+                results[probe.name] = cached
+                apply(cached)
+    
+    pending = [p for p in probes if p.name not in results]
+    results.update(run_probes(pending, on_result=apply, on_start=on_start))
+    
+    if cache is not None:
+        # Un "No detectado" no se guarda: la próxima recopilación lo reintenta
+        for probe in pending:
+            result = results[probe.name]
+            if result.status == STATUS_OK and all(is_detected(v) for v in result.fields.values()):
+                cache.put(probe, result)
+        try:
+            cache.save()
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar la caché de sondas: {e}", file=sys.stderr)
+    return verde_data, results
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+BLOQUEO DE ARCHIVO - Sistema de Inventario Tecnológico
+=======================================================
+Bloqueo entre procesos (y entre equipos, sobre una carpeta compartida)
+para el Excel de inventario, mediante un archivo .lock junto al Excel.
+
+El archivo se crea de forma exclusiva (O_CREAT | O_EXCL) y guarda quién
+tiene el bloqueo (equipo, usuario, PID, hora y un token único). Mientras
+lo tiene, el dueño lo refresca cada refresh_every segundos, así un guardado
+largo no parece abandonado. Un bloqueo se considera abandonado si su último
+refresco tiene más de stale_after segundos y, además, no cambió mientras
+este proceso lo observaba (lo segundo no depende del reloj de cada equipo),
+o si es de un proceso que ya no existe en este mismo equipo.
+
+Para tomarlo, el bloqueo abandonado se renombra a un nombre único y se
+verifica que sigue siendo el mismo (mismo token); si otro proceso ya lo
+había reemplazado por uno nuevo, se restaura y se sigue esperando. Así dos
+procesos que ven el mismo bloqueo abandonado no lo toman ambos.
+
+También incluye atomic_replace(), que escribe en un temporal de la misma
+carpeta y lo intercambia con os.replace para que nadie lea un Excel a
+medio escribir.
+"""
+
+import getpass
+import importlib.util
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+
+# psutil se importa solo si hay que revisar un bloqueo ajeno (arranque rápido)
+HAS_PSUTIL = importlib.util.find_spec("psutil") is not None
+
+
+LOCK_SUFFIX = ".lock"
+LOCK_TIMEOUT = 15       # Segundos esperando a que otro técnico termine de guardar
+LOCK_STALE_AFTER = 120  # Segundos sin refrescar tras los cuales un bloqueo se considera abandonado
+LOCK_REFRESH_EVERY = 10  # Segundos entre refrescos del bloqueo propio
+
+
+class FileLockTimeout(Exception):
+    """Otro proceso tiene el bloqueo y no lo liberó dentro del tiempo de espera."""
+
+    def __init__(self, path, holder):
+        self.path = path
+        self.holder = holder or {}
+        since = self.holder.get("since")
+        since_text = time.strftime("%H:%M:%S", time.localtime(since)) if since else "?"
+        super().__init__(
+            f"El inventario está siendo guardado por {self.holder.get('host', '?')} "
+            f"({self.holder.get('user', '?')}) desde las {since_text}. "
+            f"Intente de nuevo en unos segundos."
+        )
+
+
+def _process_alive(pid):
+    if HAS_PSUTIL:
+        import psutil
+        return psutil.pid_exists(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+class FileLock:
+    """
+    Bloqueo exclusivo de un archivo compartido.
+
+    Uso:
+        with FileLock("inventario_hospital_v1.xlsx"):
+            ... leer, modificar y guardar el Excel ...
+    """
+
+    def __init__(self, target_path, timeout=LOCK_TIMEOUT, stale_after=LOCK_STALE_AFTER,
+                 refresh_every=LOCK_REFRESH_EVERY):
+        self.lock_path = target_path + LOCK_SUFFIX
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.refresh_every = refresh_every
+        self._held = False
+        self._info = None
+        self._stop_refresh = None
+        self._refresh_thread = None
+        self._observed = None  # (token, refreshed) del bloqueo ajeno y hora local en que se vio
+
+    def _read_holder(self, path=None):
+        try:
+            with open(path or self.lock_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _holder_key(holder):
+        return (holder.get("token"), holder.get("refreshed", holder.get("since")))
+
+    def _is_stale(self, holder):
+        """Bloqueo abandonado: sin refrescar hace rato o de un proceso muerto en este equipo."""
+        if not holder:
+            return False  # Se liberó, o se está escribiendo en este momento
+        if holder.get("host") == socket.gethostname():
+            pid = holder.get("pid")
+            if pid and pid != os.getpid() and not _process_alive(pid):
+                return True
+
+        # Observación local con reloj monotónico: inmune a diferencias de hora entre equipos
+        key = self._holder_key(holder)
+        now = time.monotonic()
+        if self._observed is None or self._observed[0] != key:
+            self._observed = (key, now)
+        unchanged_for = now - self._observed[1]
+
+        refreshed = key[1]
+        if not refreshed or time.time() - refreshed <= self.stale_after:
+            return False
+        # El reloj dice que es viejo; confirmar que el dueño tampoco lo refresca
+        return unchanged_for > 2 * self.refresh_every
+
+    def _take_over(self, holder):
+        """
+        Quitar un bloqueo abandonado solo si sigue siendo el mismo.
+
+        Returns:
+            bool: True si se eliminó; False si otro proceso ya lo había reemplazado
+        """
+        moved_path = f"{self.lock_path}.{uuid.uuid4().hex}.stale"
+        try:
+            os.rename(self.lock_path, moved_path)
+        except OSError:
+            return False  # Otro proceso lo movió o lo liberó primero
+
+        moved = self._read_holder(moved_path)
+        if moved and self._holder_key(moved) == self._holder_key(holder):
+            print(f"⚠️ Bloqueo abandonado eliminado: {self.lock_path} ({holder})")
+            try:
+                os.remove(moved_path)
+            except OSError:
+                pass
+            return True
+
+        # Era el bloqueo nuevo de otro proceso: devolverlo a su lugar y seguir esperando
+        try:
+            fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(moved or {}, f)
+        except OSError:
+            pass
+        try:
+            os.remove(moved_path)
+        except OSError:
+            pass
+        return False
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        # Un bloqueo que parece viejo puede necesitar un poco más para confirmarse
+        confirm_deadline = deadline + 2 * self.refresh_every + 1
+        now = time.time()
+        info = {
+            "host": socket.gethostname(),
+            "user": getpass.getuser(),
+            "pid": os.getpid(),
+            "since": now,
+            "refreshed": now,
+            "token": uuid.uuid4().hex,
+        }
+        self._observed = None
+        while True:
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                holder = self._read_holder()
+                if self._is_stale(holder) and self._take_over(holder):
+                    continue
+                now_mono = time.monotonic()
+                if now_mono >= confirm_deadline or (
+                        now_mono >= deadline and not self._awaiting_confirmation(holder)):
+                    raise FileLockTimeout(self.lock_path, holder)
+                time.sleep(0.25)
+                continue
+
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(info, f)
+            self._info = info
+            self._held = True
+            self._start_refresh()
+            return
+
+    def _awaiting_confirmation(self, holder):
+        if not holder or self._observed is None:
+            return False
+        refreshed = self._holder_key(holder)[1]
+        return bool(refreshed) and time.time() - refreshed > self.stale_after
+
+    def _start_refresh(self):
+        """Hilo que refresca el bloqueo propio mientras se tenga."""
+        stop = self._stop_refresh = threading.Event()
+        info = dict(self._info)
+
+        def refresh():
+            while not stop.wait(self.refresh_every):
+                info["refreshed"] = time.time()
+                try:
+                    # r+ no recrea el archivo si otro proceso ya lo quitó
+                    with open(self.lock_path, "r+", encoding="utf-8") as f:
+                        current = json.load(f)
+                        if current.get("token") != info["token"]:
+                            return
+                        f.seek(0)
+                        json.dump(info, f)
+                        f.truncate()
+                except (OSError, ValueError):
+                    return
+
+        self._refresh_thread = threading.Thread(target=refresh, name="file-lock-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def release(self):
+        if self._held:
+            self._held = False
+            self._stop_refresh.set()
+            self._refresh_thread.join(5)  # Que no quede un refresco a medio escribir
+            holder = self._read_holder()
+            # Solo borrar el bloqueo propio (no uno que otro proceso creó después)
+            if holder and holder.get("token") == self._info["token"]:
+                try:
+                    os.remove(self.lock_path)
+                except OSError:
+                    pass
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+def atomic_replace(target_path, write_func):
+    """
+    Escribir target_path de forma atómica.
+
+    write_func(ruta_temporal) escribe el contenido completo; luego el
+    temporal reemplaza al archivo original con os.replace.
+    """
+    directory = os.path.dirname(os.path.abspath(target_path))
+    base = os.path.basename(target_path)
+    temp_path = os.path.join(directory, f"~{base}.{os.getpid()}.tmp")
+    try:
+        write_func(temp_path)
+        os.replace(temp_path, target_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        raise
@@ -9,21 +9,25 @@ VERSIÓN: 1.0
 FECHA: Enero 2026
 """
 
+from startup_timing import detailed_report_requested, elapsed_ms, format_startup_report, mark
+
 import tkinter as tk
 from tkinter import messagebox, filedialog
-from tkcalendar import DateEntry
 
 import customtkinter as ctk
-import platform
-import socket
-import subprocess
+import importlib.util
 import os
-import re
+import socket
+import sqlite3
+import sys
 import threading
+import time
 
 from datetime import datetime
 from pathlib import Path
 
+mark("Importar tkinter/customtkinter")
+
 # Configurar tema CustomTkinter
 ctk.set_appearance_mode("light")
 ctk.set_default_color_theme("green")
@@ -35,42 +39,34 @@ except ImportError:
     messagebox.showerror("Error", "No se encontró config_listas.py\nAsegúrate de tener ambos archivos en la misma carpeta")
     exit(1)
 
-# Librerías opcionales
-try:
-    import openpyxl
-    from openpyxl import load_workbook
-    HAS_OPENPYXL = True
-except ImportError:
-    HAS_OPENPYXL = False
+# Librerías opcionales: openpyxl, PIL y la detección (wmi, psutil) se
+# importan al primer uso; aquí solo se verifica que estén instaladas
+HAS_OPENPYXL = importlib.util.find_spec("openpyxl") is not None
+if not HAS_OPENPYXL:
     messagebox.showwarning("Advertencia", "openpyxl no instalado. Ejecuta:\npip install openpyxl")
 
-try:
-    import psutil
-    HAS_PSUTIL = True
-except ImportError:
-    HAS_PSUTIL = False
-
-try:
-    import wmi
-    HAS_WMI = True
-except ImportError:
-    HAS_WMI = False
-    print("WMI no disponible - Detección de hardware limitada")
-
-try:
-    import winreg
-    HAS_WINREG = True
-except ImportError:
-    HAS_WINREG = False
+from change_journal import journal_path_for
+from workbook_session import recover_journal, sheet_for_code
+from column_schema import SCHEMAS, DETECTED_FIELDS, EQUIPOS_NARANJA_FIELDS, EQUIPOS_AZUL_FIELDS
+from background_writer import BackgroundWriter
+from sqlite_backend import is_sqlite_path, migrate_excel_to_sqlite
+from inventory_repository import InventoryRepository
+from probe_registry import registered_probes
+from probe_executor import STATUS_CACHED, STATUS_SKIPPED, STATUS_TIMEOUT, append_timing_log, format_timing_table
+from probe_cache import ProbeCache, local_data_dir
+from software_inventory import (SoftwareStore, collected_snapshot, find_package, get_software_snapshot,
+                                store_path_for)
+from progress_channel import (ProgressChannel, EVENT_MESSAGE, EVENT_PROBE_STARTED,
+                              EVENT_PROBE_FINISHED, EVENT_DONE)
+from workbook_prefetch import WorkbookPrefetch
 
 # PIL para cargar imágenes (logo)
-try:
-    from PIL import Image, ImageDraw
-    HAS_PIL = True
-except ImportError:
-    HAS_PIL = False
+HAS_PIL = importlib.util.find_spec("PIL") is not None
+if not HAS_PIL:
     print("PIL/Pillow no disponible - Logo no se mostrará")
 
+mark("Importar módulos del inventario")
+
 
 # ============================================================================
 # COLORES INSTITUCIONALES
@@ -82,41 +78,84 @@ COLOR_NARANJA = "#F4B183"
 COLOR_FONDO = "#F5F5F5"
 COLOR_ERROR = "#DC3545"
 
+# Diario de cambios (opcional, INVENTARIO_DIARIO=1): los guardados se anotan en un
+# archivo por equipo y se vuelcan al Excel tras JOURNAL_IDLE_SECONDS sin guardar.
+# Los códigos nuevos solo se revalidan contra el Excel compartido al volcar, así que
+# dos equipos pueden recibir el mismo código hasta entonces: usarlo solo si un único
+# equipo guarda en el Excel. Sin diario, cada guardado escribe el Excel bajo el bloqueo
+# del archivo y revalida los códigos contra lo que otros ya guardaron.
+USE_CHANGE_JOURNAL = os.environ.get("INVENTARIO_DIARIO") == "1"
+JOURNAL_IDLE_SECONDS = 20
+JOURNAL_CHECK_MS = 5000
+
+# Tiempos de cada sonda de detección, por equipo (CSV junto al Excel)
+PROBE_TIMINGS_FILE = "tiempos_sondas.csv"
+
+# Sondas alternativas: "CIM (PowerShell)" (cim_probe.CIM_PROBE) reemplaza hardware,
+# sistema, licencia, unidades de red y Windows Update por un solo proceso de
+# PowerShell. Se activa con --cim o INVENTARIO_CIM=1 (como --cim en el agente)
+CIM_PROBE_NAME = "CIM (PowerShell)"
+USE_CIM_PROBE = "--cim" in sys.argv or os.environ.get("INVENTARIO_CIM") == "1"
+PROBE_ALTERNATIVES = (CIM_PROBE_NAME,) if USE_CIM_PROBE else ()
+
+# Inventario por defecto (la base SQLite, si ya se migró, tiene prioridad)
+DEFAULT_EXCEL_FILE = "inventario_hospital_v1.xlsx"
+DEFAULT_SQLITE_FILE = "inventario_hospital_v1.db"
+
+# Cada cuánto revisa la ventana si terminó la lectura anticipada del Excel
+PREFETCH_POLL_MS = 50
+
+# Espera antes de mostrar un tooltip (pasar rápido por encima no lo muestra)
+TOOLTIP_DELAY_MS = 350
+
+# Logo del encabezado
+LOGO_PATHS = ["logo_hospital.png", "logo.png", "hospital_logo.png"]
+LOGO_CIRCLE_SIZE = 90
+LOGO_HEIGHT = 65
+
 # ============================================================================
 # 1. CLASE TOOLTIP
 # ============================================================================
 
-class ToolTip:
+class TooltipManager:
     """
-    Clase para mostrar tooltips al pasar el mouse sobre un widget.
+    Una sola ventana de tooltip por aplicación, compartida por todos los ToolTip.
+    
+    La ventana se crea la primera vez y después solo se mueve, cambia de
+    texto y se oculta (withdraw). El tooltip aparece tras TOOLTIP_DELAY_MS
+    con el mouse encima: pasar rápido por las filas no muestra nada.
     """
-    def __init__(self, widget, text):
-        self.widget = widget
-        self.text = text
-        self.tooltip = None
-        self.widget.bind("<Enter>", self.show_tooltip)
-        self.widget.bind("<Leave>", self.hide_tooltip)
+    _instances = {}  # Ventana raíz de Tk → TooltipManager
     
-    def show_tooltip(self, event=None):
-        if self.tooltip:
+    def __init__(self, root, delay_ms=None):
+        self.root = root
+        self.delay_ms = TOOLTIP_DELAY_MS if delay_ms is None else delay_ms
+        self.window = None
+        self.label = None
+        self._owner = None    # Widget cuyo tooltip está pendiente o visible
+        self._pending = None  # id de root.after del tooltip por mostrar
+    
+    @classmethod
+    def for_widget(cls, widget):
+        root = widget._root()
+        if root not in cls._instances:
+            cls._instances[root] = cls(root)
+        return cls._instances[root]
+    
+    def _ensure_window(self):
+        if self.window is not None and self.window.winfo_exists():
             return
-        
-        x, y, _, _ = self.widget.bbox("insert")
-        x += self.widget.winfo_rootx() + 25
-        y += self.widget.winfo_rooty() + 25
-        
-        self.tooltip = tk.Toplevel(self.widget)
-        self.tooltip.wm_overrideredirect(True)
-        self.tooltip.wm_geometry(f"+{x}+{y}")
+        self.window = tk.Toplevel(self.root)
+        self.window.wm_overrideredirect(True)
+        self.window.withdraw()
         
         # Frame con borde
-        frame = tk.Frame(self.tooltip, bg="#FFFFCC", relief=tk.SOLID, borderwidth=1)
+        frame = tk.Frame(self.window, bg="#FFFFCC", relief=tk.SOLID, borderwidth=1)
         frame.pack()
         
         # Label con texto (máximo 600px de ancho)
-        label = tk.Label(
-            frame, 
-            text=self.text, 
+        self.label = tk.Label(
+            frame,
             bg="#FFFFCC",
             fg="#000000",
             font=("Segoe UI", 10),
@@ -125,474 +164,56 @@ class ToolTip:
             padx=10,
             pady=8
         )
-        label.pack()
+        self.label.pack()
     
-    def hide_tooltip(self, event=None):
-        if self.tooltip:
-            self.tooltip.destroy()
-            self.tooltip = None
-
+    def schedule(self, widget, text):
+        """Mostrar el texto junto al widget si el mouse sigue encima tras la espera."""
+        self.hide()
+        self._owner = widget
+        self._pending = self.root.after(self.delay_ms, lambda: self._show(widget, text))
+    
+    def _show(self, widget, text):
+        self._pending = None
+        if widget is not self._owner or not widget.winfo_exists():
+            return
+        self._ensure_window()
+        self.label.configure(text=text)
+        x = widget.winfo_rootx() + 25
+        y = widget.winfo_rooty() + 25
+        self.window.wm_geometry(f"+{x}+{y}")
+        self.window.deiconify()
+        self.window.lift()
+    
+    def hide(self, widget=None):
+        """Ocultar (si widget se indica, solo cuando el tooltip es suyo)."""
+        if widget is not None and widget is not self._owner:
+            return
+        if self._pending:
+            self.root.after_cancel(self._pending)
+            self._pending = None
+        self._owner = None
+        if self.window is not None and self.window.winfo_exists():
+            self.window.withdraw()
 
-# ============================================================================
-# FUNCIONES DE DETECCIÓN
-# ============================================================================
 
-def detect_hardware_wmi():
+class ToolTip:
     """
-    Detectar hardware usando WMI.
+    Clase para mostrar tooltips al pasar el mouse sobre un widget
+    (usa la ventana compartida de TooltipManager).
     """
-    info = {
-        'marca': 'No detectado',
-        'modelo': 'No detectado',
-        'serial': 'No detectado',
-        # DISCO 1 (Primario)
-        'disco1_capacidad': 'No detectado',  
-        'disco1_tipo': 'No detectado',      
-        'disco1_serial': 'No detectado',
-        'disco1_marca': 'No detectado',
-        'disco1_modelo': 'No detectado',
-        # DISCO 2 (Secundario)
-        'disco2_capacidad': 'No tiene',
-        'disco2_tipo': 'No tiene',
-        'disco2_serial': 'No tiene',
-        'disco2_marca': 'No tiene',
-        'disco2_modelo': 'No tiene'
-    }
-    
-    if not HAS_WMI:
-        return info
-    
-    try:
-        # Inicializar COM
-        try:
-            import pythoncom
-            pythoncom.CoInitialize()
-        except:
-            pass
-        
-        c = wmi.WMI()
-        
-        # ===== INFORMACIÓN DEL SISTEMA =====
-        for system in c.Win32_ComputerSystem():
-            info['marca'] = system.Manufacturer or 'No detectado'
-            info['modelo'] = system.Model or 'No detectado'
-        
-        # ===== SERIAL DEL EQUIPO =====
-        serial_found = False
-        serials_invalidos = ['default string', 'to be filled by o.e.m.', 
-                            'system serial number', 'base board serial number', 
-                            'chassis serial number', '']
-        
-        # Intentar BIOS primero
-        for bios in c.Win32_BIOS():
-            serial = (bios.SerialNumber or '').strip()
-            if serial and serial.lower() not in serials_invalidos:
-                info['serial'] = serial
-                serial_found = True
-                break
-        
-        # Intentar BaseBoard
-        if not serial_found:
-            for board in c.Win32_BaseBoard():
-                serial = (board.SerialNumber or '').strip()
-                if serial and serial.lower() not in serials_invalidos:
-                    info['serial'] = f"MB-{serial}"
-                    serial_found = True
-                    break
-        
-        # Intentar ComputerSystemProduct
-        if not serial_found:
-            for product in c.Win32_ComputerSystemProduct():
-                serial = (product.IdentifyingNumber or '').strip()
-                if serial and serial.lower() not in serials_invalidos:
-                    info['serial'] = serial
-                    serial_found = True
-                    break
-        
-        if not serial_found:
-            info['serial'] = "No detectado (PC genérico/armado)"
-        
-        # ===== DISCOS FÍSICOS =====
-        disks = list(c.Win32_DiskDrive())
-        
-        # DISCO 1 (PRIMARIO)
-        if len(disks) > 0:
-            disk1 = disks[0]
-            
-            # Capacidad en GB
-            try:
-                size_bytes = int(disk1.Size) if disk1.Size else 0
-                size_gb = round(size_bytes / (1024**3))
-                info['disco1_capacidad'] = str(size_gb) 
-            except:
-                info['disco1_capacidad'] = 'No detectado'
-            
-            # Tipo (SSD o HDD)
-            media_type = disk1.MediaType or ''
-            if 'SSD' in media_type.upper() or 'Solid State' in media_type:
-                info['disco1_tipo'] = 'SSD'
-            else:
-                info['disco1_tipo'] = 'HDD'  
-            
-            # Serial
-            serial_disk = (disk1.SerialNumber or '').strip()
-            info['disco1_serial'] = serial_disk if serial_disk else 'No detectado'
-            
-            # Marca
-            marca_disk = (disk1.Manufacturer or '').strip()
-            if marca_disk and marca_disk.lower() not in ['(standard disk drives)', '']:
-                info['disco1_marca'] = marca_disk
-            else:
-                info['disco1_marca'] = 'No detectado'
-            
-            # Modelo
-            modelo_disk = (disk1.Model or '').strip()
-            info['disco1_modelo'] = modelo_disk if modelo_disk else 'No detectado'
-        
-        # DISCO 2 (SECUNDARIO)
-        if len(disks) > 1:
-            disk2 = disks[1]
-            
-            try:
-                size_bytes = int(disk2.Size) if disk2.Size else 0
-                size_gb = round(size_bytes / (1024**3))
-                info['disco2_capacidad'] = str(size_gb)
-            except:
-                info['disco2_capacidad'] = 'Detectado'
-            
-            media_type = disk2.MediaType or ''
-            if 'SSD' in media_type.upper() or 'Solid State' in media_type:
-                info['disco2_tipo'] = 'SSD'
-            else:
-                info['disco2_tipo'] = 'HDD'
-            
-            serial_disk2 = (disk2.SerialNumber or '').strip()
-            info['disco2_serial'] = serial_disk2 if serial_disk2 else 'No detectado'
-            
-            marca_disk2 = (disk2.Manufacturer or '').strip()
-            if marca_disk2 and marca_disk2.lower() not in ['(standard disk drives)', '']:
-                info['disco2_marca'] = marca_disk2
-            else:
-                info['disco2_marca'] = 'No detectado'
-            
-            modelo_disk2 = (disk2.Model or '').strip()
-            info['disco2_modelo'] = modelo_disk2 if modelo_disk2 else 'No detectado'
-    
-    except Exception as e:
-        print(f"Error WMI: {e}")
-    
-    return info
-
-
-def detect_office_version():
-    """Detectar versión de Office: Busca ejecutables incluso sin licencia."""
-    if not HAS_WINREG:
-        return "No detectado", "No detectado"
-    
-    try:
-        # ESTRATEGIA 1: Buscar en InstallRoot (instalación completa licenciada)
-        key_paths = [
-            r"SOFTWARE\Microsoft\Office\16.0\Common\InstallRoot",  # Office 2016/2019/365
-            r"SOFTWARE\Microsoft\Office\15.0\Common\InstallRoot",  # Office 2013
-            r"SOFTWARE\Microsoft\Office\14.0\Common\InstallRoot",  # Office 2010
-        ]
-        
-        for key_path in key_paths:
-            try:
-                key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path)
-                path = winreg.QueryValueEx(key, "Path")[0]
-                winreg.CloseKey(key)
-                
-                if "16.0" in key_path:
-                    version = "Office 2016/2019/365"
-                elif "15.0" in key_path:
-                    version = "Office 2013"
-                elif "14.0" in key_path:
-                    version = "Office 2010"
-                else:
-                    version = "Detectado"
-                
-                licencia = "Retail/Volume"
-                return version, licencia
-            except:
-                continue
-        
-        # ESTRATEGIA 2: Buscar ejecutables de Office (incluso sin licencia completa)
-        office_paths = [
-            (r"C:\Program Files\Microsoft Office\root\Office16\WINWORD.EXE", "Office 2016/2019/365"),
-            (r"C:\Program Files (x86)\Microsoft Office\root\Office16\WINWORD.EXE", "Office 2016/2019/365"),
-            (r"C:\Program Files\Microsoft Office\Office16\WINWORD.EXE", "Office 2016/2019/365"),
-            (r"C:\Program Files (x86)\Microsoft Office\Office16\WINWORD.EXE", "Office 2016/2019/365"),
-            (r"C:\Program Files\Microsoft Office\Office15\WINWORD.EXE", "Office 2013"),
-            (r"C:\Program Files (x86)\Microsoft Office\Office15\WINWORD.EXE", "Office 2013"),
-            (r"C:\Program Files\Microsoft Office\Office14\WINWORD.EXE", "Office 2010"),
-            (r"C:\Program Files (x86)\Microsoft Office\Office14\WINWORD.EXE", "Office 2010"),
-        ]
-        
-        for path, version in office_paths:
-            if os.path.exists(path):
-                return version, "Instalado (verificar licencia)"
-        
-        # ESTRATEGIA 3: Buscar en registro de desinstalación
-        try:
-            for hive in [winreg.HKEY_LOCAL_MACHINE, winreg.HKEY_CURRENT_USER]:
-                try:
-                    key = winreg.OpenKey(hive, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall")
-                    for i in range(winreg.QueryInfoKey(key)[0]):
-                        try:
-                            subkey_name = winreg.EnumKey(key, i)
-                            if 'Office' in subkey_name or 'Microsoft 365' in subkey_name:
-                                subkey = winreg.OpenKey(key, subkey_name)
-                                try:
-                                    display_name = winreg.QueryValueEx(subkey, "DisplayName")[0]
-                                    if 'Office' in display_name or 'Microsoft 365' in display_name:
-                                        winreg.CloseKey(subkey)
-                                        winreg.CloseKey(key)
-                                        return display_name, "Instalado (verificar licencia)"
-                                except:
-                                    pass
-                                winreg.CloseKey(subkey)
-                        except:
-                            continue
-                    winreg.CloseKey(key)
-                except:
-                    continue
-        except:
-            pass
-        
-        return "No instalado", "N/A"
-    
-    except Exception as e:
-        return "No detectado", "No detectado"
-
-
-def detect_office_apps():
-    """Detectar si Teams y Outlook están instalados."""
-    teams = "No"
-    outlook = "No"
-    
-    # Rutas comunes de Teams
-    teams_paths = [
-        r"C:\Users\{}\AppData\Local\Microsoft\Teams\current\Teams.exe",
-        r"C:\Program Files\Microsoft\Teams\current\Teams.exe",
-        r"C:\Program Files (x86)\Microsoft\Teams\current\Teams.exe"
-    ]
-    
-    username = os.environ.get('USERNAME', '')
-    for path in teams_paths:
-        full_path = path.format(username)
-        if os.path.exists(full_path):
-            teams = "Sí"
-            break
-    
-    # Rutas comunes de Outlook
-    outlook_paths = [
-        r"C:\Program Files\Microsoft Office\root\Office16\OUTLOOK.EXE",
-        r"C:\Program Files (x86)\Microsoft Office\root\Office16\OUTLOOK.EXE",
-        r"C:\Program Files\Microsoft Office\Office16\OUTLOOK.EXE",
-        r"C:\Program Files (x86)\Microsoft Office\Office16\OUTLOOK.EXE",
-    ]
-    
-    for path in outlook_paths:
-        if os.path.exists(path):
-            outlook = "Sí"
-            break
-    
-    return teams, outlook
-
-
-def detect_windows_license():
-    """Detectar información de licencia de Windows."""
-    licencia_info = {
-        'tipo': 'No detectado',
-        'key': 'No detectado',
-        'estado': 'No detectado'
-    }
-    
-    try:
-        # Ejecutar slmgr para obtener info de licencia
-        result = subprocess.run(
-            ['cscript', '//nologo', r'C:\Windows\System32\slmgr.vbs', '/dli'],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        
-        output = result.stdout
-        
-        # Parsear tipo de licencia
-        if 'OEM' in output:
-            licencia_info['tipo'] = 'OEM'
-        elif 'Retail' in output:
-            licencia_info['tipo'] = 'Retail'
-        elif 'Volume' in output:
-            licencia_info['tipo'] = 'Volume'
-        else:
-            licencia_info['tipo'] = 'Detectado'
-        
-        # Estado
-        if 'Licensed' in output or 'Licenciado' in output:
-            licencia_info['estado'] = 'Activado'
-        else:
-            licencia_info['estado'] = 'No activado'
-        
-        # Obtener últimos 5 dígitos de la key
-        key_result = subprocess.run(
-            ['cscript', '//nologo', r'C:\Windows\System32\slmgr.vbs', '/dli'],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        
-        key_output = key_result.stdout
-        # Buscar patrón de product key (últimos 5)
-        key_match = re.search(r'([A-Z0-9]{5})$', key_output, re.MULTILINE)
-        if key_match:
-            licencia_info['key'] = key_match.group(1)
-        else:
-            licencia_info['key'] = 'XXXXX'
-    
-    except Exception as e:
-        print(f"Error detectando licencia Windows: {e}")
-    
-    return licencia_info
-
-
-def detect_last_windows_update():
-    """Detectar última actualización de Windows."""
-    try:
-        if not HAS_WINREG:
-            return "No detectado"
-        
-        key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, 
-                             r"SOFTWARE\Microsoft\Windows\CurrentVersion\WindowsUpdate\Auto Update\Results\Install")
-        last_success = winreg.QueryValueEx(key, "LastSuccessTime")[0]
-        winreg.CloseKey(key)
-        
-        # Formatear fecha
-        if last_success:
-            # Formato: YYYY-MM-DD HH:MM:SS
-            try:
-                date_obj = datetime.strptime(last_success, "%Y-%m-%d %H:%M:%S")
-                return date_obj.strftime("%Y-%m-%d")
-            except:
-                return last_success[:10]  # Primeros 10 caracteres (fecha)
-        
-        return "No detectado"
-    
-    except Exception as e:
-        return "No detectado"
-    
-def detect_mac_address():
-    """Detectar dirección MAC de la interfaz de red principal."""
-    try:
-        import uuid
-        mac = ':'.join(['{:02x}'.format((uuid.getnode() >> elements) & 0xff)
-                       for elements in range(0,2*6,2)][::-1])
-        return mac.upper()
-    except:
-        return "No detectado"
-
-
-def detect_default_browser():
-    """Detectar navegador predeterminado en Windows."""
-    if not HAS_WINREG:
-        return "No detectado"
-    
-    try:
-        # Leer asociación de protocolo http
-        key = winreg.OpenKey(
-            winreg.HKEY_CURRENT_USER,
-            r"Software\\Microsoft\\Windows\\Shell\\Associations\\UrlAssociations\\http\\UserChoice"
-        )
-        prog_id = winreg.QueryValueEx(key, "ProgId")[0]
-        winreg.CloseKey(key)
-        
-        # Mapear ProgId a nombre de navegador
-        browser_map = {
-            'ChromeHTML': 'Google Chrome',
-            'FirefoxURL': 'Mozilla Firefox',
-            'MSEdgeHTM': 'Microsoft Edge',
-            'IE.HTTP': 'Internet Explorer',
-            'BraveHTML': 'Brave',
-            'OperaStable': 'Opera'
-        }
-        
-        for key_name, browser_name in browser_map.items():
-            if key_name in prog_id:
-                return browser_name
-        
-        return "Otro navegador"
+    def __init__(self, widget, text):
+        self.widget = widget
+        self.text = text
+        self.manager = TooltipManager.for_widget(widget)
+        self.widget.bind("<Enter>", self.show_tooltip)
+        self.widget.bind("<Leave>", self.hide_tooltip)
+        self.widget.bind("<ButtonPress>", self.hide_tooltip, add="+")
     
-    except Exception as e:
-        # Fallback: buscar ejecutables comunes
-        browsers = [
-            (r"C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe", "Google Chrome"),
-            (r"C:\\Program Files (x86)\\Google\\Chrome\\Application\\chrome.exe", "Google Chrome"),
-            (r"C:\\Program Files\\Mozilla Firefox\\firefox.exe", "Mozilla Firefox"),
-            (r"C:\\Program Files (x86)\\Mozilla Firefox\\firefox.exe", "Mozilla Firefox"),
-            (r"C:\\Program Files (x86)\\Microsoft\\Edge\\Application\\msedge.exe", "Microsoft Edge"),
-        ]
-        
-        for path, name in browsers:
-            if os.path.exists(path):
-                return f"{name} (detectado)"
-        
-        return "No detectado"
-
-
-def detect_network_drives():
-    """Detectar unidades de red mapeadas (ej: Z:\\, Y:\\)."""
-    try:
-        import subprocess
-        
-        # Ejecutar comando "net use" para listar unidades de red
-        result = subprocess.run(
-            ['net', 'use'],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        output = result.stdout
-        drives = []
-        
-        # Parsear salida de "net use"
-        for line in output.split('\\n'):
-            # Buscar líneas con unidades (formato: OK   Z:   \\\\servidor\\carpeta)
-            if ':' in line and '\\\\\\\\' in line:
-                parts = line.split()
-                for part in parts:
-                    if ':' in part and len(part) == 2:
-                        drives.append(part)
-        
-        if drives:
-            return ', '.join(sorted(set(drives)))
-        else:
-            return "Ninguna"
+    def show_tooltip(self, event=None):
+        self.manager.schedule(self.widget, self.text)
     
-    except Exception as e:
-        return "No detectado"
-
-
-def detect_ip_local():
-    """Detectar IP local del equipo."""
-    try:
-        # Método 1: Conectar a servidor externo (más confiable)
-        import socket
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        local_ip = s.getsockname()[0]
-        s.close()
-        return local_ip
-    except:
-        try:
-            # Método 2: Usar hostname
-            hostname = socket.gethostname()
-            local_ip = socket.gethostbyname(hostname)
-            return local_ip
-        except:
-            return "No detectado"
+    def hide_tooltip(self, event=None):
+        self.manager.hide(self.widget)
 
 
 # ============================================================================
@@ -602,8 +223,10 @@ def detect_ip_local():
 class InventoryManagerApp:
     """Aplicación principal con CustomTkinter."""
     
-    def __init__(self, root):
+    def __init__(self, root, prefetch=None):
         self.root = root
+        self.prefetch = prefetch  # WorkbookPrefetch iniciado en main() (o None)
+        self.loading_frame = None  # Aviso "Cargando inventario..." mientras llega el Excel
         self.root.title("Sistema de Inventario Tecnológico - HRAJS")
         
         # Configurar tamaño de ventana inicial (1400x900 o 90% de pantalla)
@@ -622,6 +245,8 @@ class InventoryManagerApp:
         
         # Variables de estado
         self.excel_path = None
+        self.session = None  # Workbook en memoria (WorkbookSession)
+        self.repo = None     # Operaciones de datos sobre la sesión (InventoryRepository)
         self.current_row = None
         self.current_sheet = "Equipos de Cómputo"  # Sheet actual
         self.equipment_data = {}
@@ -631,6 +256,8 @@ class InventoryManagerApp:
         # Widgets de formulario (para acceso posterior)
         self.manual_widgets = {}
         self.main_container = None  # Contenedor principal para cambiar vistas
+        self.forms = {}             # Formularios ya construidos (tipo → frame), ocultos con pack_forget
+        self.visible_form = None    # Tipo del formulario que se está mostrando
         
         # PRIMERO: Crear menú nativo (por encima de todo)
         self.create_native_menu()
@@ -638,12 +265,21 @@ class InventoryManagerApp:
         # SEGUNDO: Crear header
         self.create_header()
         
+        # Hilo único para las escrituras a disco (la interfaz no espera al guardado)
+        self.writer = BackgroundWriter(self.root, on_status=self.update_save_status)
+        
         # TERCERO: Contenedor principal para las vistas
         self.main_container = ctk.CTkFrame(self.root, fg_color=COLOR_FONDO)
         self.main_container.pack(fill="both", expand=True, padx=0, pady=0)
         
-        # CUARTO: Intentar cargar Excel automáticamente (después de que la ventana esté lista)
-        self.root.after(100, self.auto_load_excel)
+        mark("Construir ventana")
+        
+        # CUARTO: Logo y Excel cuando la ventana ya está en pantalla
+        self.root.after_idle(self.on_window_shown)
+        
+        # Compactar el diario al quedar inactiva la aplicación y al cerrar
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.root.after(JOURNAL_CHECK_MS, self.compact_journal_if_idle)
     
     
     def create_native_menu(self):
@@ -657,8 +293,10 @@ class InventoryManagerApp:
         menu_archivo = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Archivo", menu=menu_archivo)
         menu_archivo.add_command(label="Cargar Excel", command=self.browse_excel)
+        menu_archivo.add_command(label="Migrar a SQLite", command=self.migrate_to_sqlite)
+        menu_archivo.add_command(label="Exportar a Excel", command=self.export_sqlite_to_excel)
         menu_archivo.add_separator()
-        menu_archivo.add_command(label="Salir", command=self.root.quit)
+        menu_archivo.add_command(label="Salir", command=self.on_closing)
         
         # MENÚ INVENTARIOS
         menu_inventarios = tk.Menu(menubar, tearoff=0)
@@ -703,35 +341,83 @@ class InventoryManagerApp:
             messagebox.showwarning("Advertencia", "Primero debes cargar un archivo Excel.\n\nVe a: Archivo → Cargar Excel")
             return
         
-        # Limpiar contenedor principal
+        self.show_form(tipo)
+    
+    # ========================================================================
+    # FORMULARIOS EN CACHÉ (se construyen una vez; después se ocultan y muestran)
+    # ========================================================================
+    
+    def form_handlers(self):
+        """Por tipo de formulario: (función que lo construye, función que lo deja como nuevo)."""
+        return {
+            "Equipos de Cómputo": (self.create_equipos_form, self.reset_equipos_form),
+            "Impresoras": (self.create_impresoras_form, self.reset_impresoras_form),
+            "Periféricos": (self.create_perifericos_form, self.reset_perifericos_form),
+            "Red": (self.create_red_form, self.reset_red_form),
+            "Mantenimiento": (self.create_mantenimientos_form, self.reset_mantenimientos_form),
+            "Dados de Baja": (self.create_baja_form, self.reset_baja_form),
+        }
+    
+    def show_form(self, tipo):
+        """
+        Mostrar un formulario: la primera vez se construye; las siguientes
+        solo se vuelve a empacar, vacío y con el siguiente código.
+        """
+        build, reset = self.form_handlers()[tipo]
+        
+        # Quitar avisos (cargando / sin archivo) y ocultar el formulario visible
         for widget in self.main_container.winfo_children():
-            widget.destroy()
+            if widget not in self.forms.values():
+                widget.destroy()
+        self.loading_frame = None
+        if self.visible_form and self.visible_form != tipo:
+            self.forms[self.visible_form].pack_forget()
+        
+        frame = self.forms.get(tipo)
+        if frame is None:
+            frame = ctk.CTkFrame(self.main_container, fg_color="transparent", corner_radius=0)
+            build(frame)
+            self.forms[tipo] = frame
+        else:
+            reset()
         
-        # Mostrar formulario correspondiente
-        if tipo == "Equipos de Cómputo":
-            self.show_manual_form_in_container()
-        elif tipo == "Impresoras":
-            self.create_impresoras_form_directo()
-        elif tipo == "Periféricos":
-            self.create_perifericos_form_directo()
-        elif tipo == "Red":
-            self.create_red_form_directo()
-        elif tipo == "Mantenimiento":
-            self.create_mantenimientos_form_directo()
-        elif tipo == "Dados de Baja":
-            self.create_baja_form_directo()
+        frame.pack(fill="both", expand=True)
+        self.visible_form = tipo
     
-    def show_manual_form_in_container(self):
-        """Mostrar formulario manual:"""
-        # Limpiar contenedor
+    def discard_forms(self):
+        """Destruir todo el contenido del contenedor, formularios en caché incluidos."""
         for widget in self.main_container.winfo_children():
             widget.destroy()
-        
+        self.forms = {}
+        self.visible_form = None
+        self.loading_frame = None
+    
+    def clear_form_widgets(self, widgets):
+        """Vaciar los campos de un formulario; las fechas vuelven a hoy."""
+        for widget in widgets.values():
+            try:
+                if isinstance(widget, tk.StringVar):
+                    widget.set("")
+                elif hasattr(widget, 'set_date'):
+                    widget.set_date(datetime.now().date())
+                elif isinstance(widget, ctk.CTkEntry):
+                    widget.delete(0, "end")
+                elif isinstance(widget, ctk.CTkComboBox):
+                    widget.set("")
+            except tk.TclError:
+                pass
+    
+    def show_manual_form_in_container(self):
+        """Mostrar formulario de equipos de cómputo (nuevo equipo)."""
+        self.show_form("Equipos de Cómputo")
+    
+    def create_equipos_form(self, parent):
+        """Formulario manual de Equipos de Cómputo."""
         self.manual_widgets = {}
         
         # Frame scrollable
         form_frame = ctk.CTkScrollableFrame(
-            self.main_container, 
+            parent, 
             fg_color="#F5F5F5",
             corner_radius=0
         )
@@ -860,50 +546,24 @@ class InventoryManagerApp:
         
         info_cuestionario = ctk.CTkLabel(
             form_frame,
-            text="Selecciona Sí o No • Pasa el mouse sobre el texto para ver la pregunta completa",
+            text="Abre cada bloque y selecciona Sí o No • Pasa el mouse sobre el texto para ver la pregunta completa",
             font=("Segoe UI", 11, "italic"),
             text_color="gray"
         )
         info_cuestionario.pack(pady=(0, 15))
         
+        # Bloques colapsados: las filas se construyen al abrirlos por primera vez
         # CONFIDENCIALIDAD (9 preguntas - RadioButtons)
-        label_conf = ctk.CTkLabel(
-            form_frame,
-            text="📋 CONFIDENCIALIDAD (Tipo de información):",
-            font=("Segoe UI", 12, "bold"),
-            text_color="#6F42C1"
-        )
-        label_conf.pack(anchor="w", padx=40, pady=(10, 5))
-        
-        for i, (label_text, tooltip_text) in enumerate(zip(CONF_LABELS, CONF_TOOLTIPS), 1):
-            field_name = f"conf_{i}"
-            self.create_radio_field_centered(form_frame, label_text, field_name, tooltip_text)
+        self.create_questionnaire_section(form_frame, "📋 CONFIDENCIALIDAD (Tipo de información)", "#6F42C1",
+                                          "conf", CONF_LABELS, CONF_TOOLTIPS, pady=(10, 5))
         
         # INTEGRIDAD (3 preguntas - RadioButtons)
-        label_int = ctk.CTkLabel(
-            form_frame,
-            text="🔐 INTEGRIDAD (Compromiso de información):",
-            font=("Segoe UI", 12, "bold"),
-            text_color="#FD7E14"
-        )
-        label_int.pack(anchor="w", padx=40, pady=(15, 5))
-        
-        for i, (label_text, tooltip_text) in enumerate(zip(INT_LABELS, INT_TOOLTIPS), 1):
-            field_name = f"int_{i}"
-            self.create_radio_field_centered(form_frame, label_text, field_name, tooltip_text)
+        self.create_questionnaire_section(form_frame, "🔐 INTEGRIDAD (Compromiso de información)", "#FD7E14",
+                                          "int", INT_LABELS, INT_TOOLTIPS)
         
         # CRITICIDAD (6 preguntas - RadioButtons)
-        label_crit = ctk.CTkLabel(
-            form_frame,
-            text="⚠️ CRITICIDAD (Impacto operacional):",
-            font=("Segoe UI", 12, "bold"),
-            text_color="#DC3545"
-        )
-        label_crit.pack(anchor="w", padx=40, pady=(15, 5))
-        
-        for i, (label_text, tooltip_text) in enumerate(zip(CRIT_LABELS, CRIT_TOOLTIPS), 1):
-            field_name = f"crit_{i}"
-            self.create_radio_field_centered(form_frame, label_text, field_name, tooltip_text)
+        self.create_questionnaire_section(form_frame, "⚠️ CRITICIDAD (Impacto operacional)", "#DC3545",
+                                          "crit", CRIT_LABELS, CRIT_TOOLTIPS)
         
         # ===== BOTONES (3 HORIZONTALES IGUALES) =====
         separator5 = ctk.CTkFrame(form_frame, height=2, fg_color="#CCCCCC")
@@ -953,6 +613,31 @@ class InventoryManagerApp:
             width=BTN_WIDTH
         )
         btn_collect.pack(side="left", padx=8)
+        
+        # Sin marcar, la recopilación reutiliza los resultados vigentes de este PC
+        self.force_refresh_var = tk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            form_frame,
+            text="Forzar actualización (ignorar datos en caché de este equipo)",
+            variable=self.force_refresh_var,
+            font=("Segoe UI", 11)
+        ).pack(pady=(0, 15))
+
+    def reset_equipos_form(self):
+        """Dejar el formulario de equipos vacío, en modo nuevo y con el siguiente código."""
+        self.equipo_update_row = None
+        self.equipo_update_code = None
+        
+        self.clear_form_widgets(self.manual_widgets)
+        self.manual_widgets["proceso"].configure(values=["Selecciona primero Macroproceso"])
+        self.manual_widgets["subproceso"].configure(values=["Selecciona primero Proceso"])
+        self.btn_save_equipo.configure(text="💾 GUARDAR")
+        
+        try:
+            codigo_text = f"Equipo: {self.get_next_codigo()}"
+        except Exception:
+            codigo_text = "Equipo: EQC-0001"
+        self.form_title_label.configure(text=codigo_text)
 
     def on_macroproceso_change(self, selected_macroproceso):
         """Actualizar lista de Procesos cuando cambia el Macroproceso."""
@@ -987,44 +672,54 @@ class InventoryManagerApp:
         # Actualizar lista de subprocesos
         self.manual_widgets["subproceso"].configure(values=subprocesos)
 
-    def create_impresoras_form_directo(self):
-        """Crear formulario de impresoras directamente."""
-        for widget in self.main_container.winfo_children():
-            widget.destroy()
-        self.create_impresoras_form(self.main_container)
-    
-    def create_perifericos_form_directo(self):
-        """Crear formulario de periféricos directamente."""
-        for widget in self.main_container.winfo_children():
-            widget.destroy()
-        self.create_perifericos_form(self.main_container)
-    
-    def create_red_form_directo(self):
-        """Crear formulario de red directamente."""
-        for widget in self.main_container.winfo_children():
-            widget.destroy()
-        self.create_red_form(self.main_container)
-    
-    def create_mantenimientos_form_directo(self):
-        """Crear formulario de mantenimientos directamente."""
-        for widget in self.main_container.winfo_children():
-            widget.destroy()
-        self.create_mantenimientos_form(self.main_container)
-    
-    def create_baja_form_directo(self):
-        """Crear formulario de baja directamente."""
-        for widget in self.main_container.winfo_children():
-            widget.destroy()
-        self.create_baja_form(self.main_container)
-
-    def get_next_available_row(self, sheet_name, check_column=1, max_rows=500):
+    def reset_impresoras_form(self):
+        """Impresoras: campos vacíos, modo nuevo y siguiente código."""
+        self.imp_update_row = None
+        self.imp_update_code = None
+        self.imp_next_code = self.detect_next_code("Impresoras y Escáneres", "IMP")
+        self.imp_scroll.configure(label_text=f"🖨️ IMPRESORAS Y ESCÁNERES - Código: {self.imp_next_code}")
+        self.btn_save_imp.configure(text="💾 GUARDAR NUEVO")
+        self.clear_form_widgets(self.imp_widgets)
+    
+    def reset_perifericos_form(self):
+        """Periféricos: campos vacíos, modo nuevo y siguiente código."""
+        self.per_update_row = None
+        self.per_update_code = None
+        self.per_next_code = self.detect_next_code("Periféricos", "PER")
+        self.per_scroll.configure(label_text=f"🖱️ PERIFÉRICOS - Código: {self.per_next_code}")
+        self.btn_save_per.configure(text="💾 GUARDAR NUEVO")
+        self.clear_form_widgets(self.per_widgets)
+    
+    def reset_red_form(self):
+        """Equipos de red: campos vacíos, modo nuevo y siguiente código."""
+        self.red_update_row = None
+        self.red_update_code = None
+        self.red_next_code = self.detect_next_code("Equipos de Red", "RED")
+        self.red_scroll.configure(label_text=f"🌐 EQUIPOS DE RED - Código: {self.red_next_code}")
+        self.btn_save_red.configure(text="💾 GUARDAR NUEVO")
+        self.clear_form_widgets(self.red_widgets)
+    
+    def reset_mantenimientos_form(self):
+        """Mantenimientos: campos vacíos y siguiente consecutivo."""
+        self.mtt_next_consecutive = self.detect_next_consecutive_mantenimiento()
+        self.mtt_scroll.configure(label_text=f"🔧 MANTENIMIENTOS - Registro #{self.mtt_next_consecutive}")
+        self.clear_form_widgets(self.mtt_widgets)
+    
+    def reset_baja_form(self):
+        """Bajas: campos vacíos y siguiente número de baja."""
+        self.baja_next = self.detect_next_baja()
+        self.baja_scroll.configure(label_text=f"📦 EQUIPOS DADOS DE BAJA - Baja #{self.baja_next}")
+        self.clear_form_widgets(self.baja_widgets)
+
+    def get_next_available_row(self, sheet_name):
         """
-        Función optimizada para buscar siguiente fila disponible en cualquier hoja.
+        Primera fila libre (columna 1 vacía) de cualquier hoja.
+        
+        Se consulta el asignador de la sesión en memoria: sin releer el
+        archivo y sin límite de filas.
         
         Args:
             sheet_name: Nombre de la hoja Excel
-            check_column: Columna a verificar (default 1 = Consecutivo)
-            max_rows: Máximo de filas a buscar (default 500)
         
         Returns:
             int: Número de la siguiente fila disponible
@@ -1033,90 +728,10 @@ class InventoryManagerApp:
             return 2
         
         try:
-            wb = load_workbook(self.excel_path, read_only=True)
-            ws = wb[sheet_name]
-            
-            for row in range(2, max_rows + 2):
-                if ws.cell(row=row, column=check_column).value is None:
-                    wb.close()
-                    return row
-            
-            wb.close()
-            return max_rows + 2
-            
+            return self.session.next_free_row(sheet_name)
         except Exception as e:
             print(f"Error buscando siguiente fila: {e}")
             return 2
-        
-    # ============================================================================
-    # MÉTODO 1: get_next_consecutivo()
-    # ============================================================================
-
-    def get_next_consecutivo(self):
-        """
-        Obtener el siguiente número consecutivo para Equipos de Cómputo.
-        
-        Busca el último consecutivo en la columna 1 de "Equipos de Cómputo"
-        y retorna el siguiente número.
-        
-        Returns:
-            int: Siguiente consecutivo (ej: si el último es 5, retorna 6)
-        """
-        if not self.excel_path or not HAS_OPENPYXL:
-            return 1
-        
-        try:
-            wb = load_workbook(self.excel_path, read_only=True)
-            
-            # Verificar que la hoja existe
-            if "Equipos de Cómputo" not in wb.sheetnames:
-                wb.close()
-                return 1
-            
-            ws = wb["Equipos de Cómputo"]
-            
-            # Buscar el ÚLTIMO consecutivo en columna 1
-            last_consecutive = 0
-            for row in range(2, 500):
-                value = ws.cell(row=row, column=1).value
-                if value is not None:
-                    try:
-                        consecutivo = int(value)
-                        if consecutivo > last_consecutive:
-                            last_consecutive = consecutivo
-                    except:
-                        pass
-                else:
-                    break  # Primera fila vacía, detener
-            
-            wb.close()
-            
-            # Retornar siguiente consecutivo
-            return last_consecutive + 1
-            
-        except Exception as e:
-            print(f"❌ Error obteniendo consecutivo: {e}")
-            return 1
-
-
-    # ============================================================================
-    # MÉTODO 2: get_next_codigo()
-    # ============================================================================
-
-    def get_next_codigo(self):
-        """
-        Obtener el siguiente código para Equipos de Cómputo.
-        
-        Usa get_next_consecutivo() y retorna el código formateado.
-        
-        Returns:
-            str: Código formateado (ej: "EQC-0001", "EQC-0142")
-        """
-        try:
-            next_consecutive = self.get_next_consecutivo()
-            return f"EQC-{next_consecutive:04d}"
-        except:
-            return "EQC-0001"
     
     def create_header(self):
         """Crear encabezado con logo en círculo blanco."""
@@ -1127,70 +742,11 @@ class InventoryManagerApp:
         content_frame = ctk.CTkFrame(header_frame, fg_color="transparent")
         content_frame.pack(pady=18)
         
-        # Intentar cargar logo
-        if HAS_PIL:
-            logo_paths = [
-                "logo_hospital.png",
-                "logo.png", 
-                "hospital_logo.png"
-            ]
-            
-            for logo_path in logo_paths:
-                if os.path.exists(logo_path):
-                    try:
-                        from PIL import Image, ImageDraw
-                        
-                        # 1. Cargar logo original
-                        logo_original = Image.open(logo_path)
-                        
-                        # 2. Convertir a RGBA si no lo es
-                        if logo_original.mode != 'RGBA':
-                            logo_original = logo_original.convert('RGBA')
-                        
-                        # 3. Redimensionar logo
-                        aspect_ratio = logo_original.width / logo_original.height
-                        new_height = 65
-                        new_width = int(new_height * aspect_ratio)
-                        logo_resized = logo_original.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                        
-                        # 4. Crear círculo blanco de fondo
-                        circle_size = 90
-                        background = Image.new('RGBA', (circle_size, circle_size), (0, 0, 0, 0))
-                        
-                        # Dibujar círculo blanco sólido
-                        draw = ImageDraw.Draw(background)
-                        draw.ellipse([0, 0, circle_size-1, circle_size-1], 
-                                    fill=(255, 255, 255, 255))
-                        
-                        # 5. Centrar logo sobre círculo blanco
-                        x_offset = (circle_size - new_width) // 2
-                        y_offset = (circle_size - new_height) // 2
-                        
-                        # Pegar logo
-                        background.paste(logo_resized, (x_offset, y_offset), logo_resized)
-                        
-                        # 6. Convertir a CTkImage
-                        logo_ctk = ctk.CTkImage(
-                            light_image=background, 
-                            dark_image=background, 
-                            size=(circle_size, circle_size)
-                        )
-                        
-                        logo_label = ctk.CTkLabel(
-                            content_frame,
-                            image=logo_ctk,
-                            text=""
-                        )
-                        logo_label.pack(side="left", padx=(0, 25))
-                        print(f"✓ Logo cargado en círculo blanco: {logo_path}")
-                        break
-                        
-                    except Exception as e:
-                        print(f"✗ Error al cargar logo {logo_path}: {e}")
-        
-        # Texto del header
+        # Texto del header (el logo se agrega a su izquierda en load_header_logo)
         text_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
         text_frame.pack(side="left")
+        self.header_content = content_frame
+        self.header_text = text_frame
         
         title_label = ctk.CTkLabel(
             text_frame,
@@ -1208,28 +764,274 @@ class InventoryManagerApp:
         )
         subtitle_label.pack(pady=(2, 0))
         
-        # Status label
-        self.status_label = ctk.CTkLabel(
-            header_frame,
-            text="",
-            font=("Segoe UI", 10),
-            text_color="white",
-            fg_color="transparent"
-        )
-        self.status_label.place(relx=0.98, rely=0.5, anchor="e")
+        # Status label
+        self.status_label = ctk.CTkLabel(
+            header_frame,
+            text="",
+            font=("Segoe UI", 10),
+            text_color="white",
+            fg_color="transparent"
+        )
+        self.status_label.place(relx=0.98, rely=0.5, anchor="e")
+    
+    def load_header_logo(self):
+        """
+        Logo en círculo blanco a la izquierda del título.
+        
+        La imagen compuesta (redimensionada con LANCZOS sobre el círculo) se
+        guarda en la carpeta local de la aplicación; los siguientes arranques
+        la abren directamente mientras el logo original no cambie.
+        """
+        if not HAS_PIL:
+            return
+        
+        for logo_path in LOGO_PATHS:
+            if not os.path.exists(logo_path):
+                continue
+            try:
+                from PIL import Image, ImageDraw
+                
+                stat = os.stat(logo_path)
+                cached_path = os.path.join(local_data_dir(), f"logo_{stat.st_size}_{stat.st_mtime_ns}.png")
+                if os.path.exists(cached_path):
+                    background = Image.open(cached_path)
+                else:
+                    # 1. Cargar logo original
+                    logo_original = Image.open(logo_path)
+                    
+                    # 2. Convertir a RGBA si no lo es
+                    if logo_original.mode != 'RGBA':
+                        logo_original = logo_original.convert('RGBA')
+                    
+                    # 3. Redimensionar logo
+                    aspect_ratio = logo_original.width / logo_original.height
+                    new_height = LOGO_HEIGHT
+                    new_width = int(new_height * aspect_ratio)
+                    logo_resized = logo_original.resize((new_width, new_height), Image.Resampling.LANCZOS)
+                    
+                    # 4. Crear círculo blanco de fondo
+                    circle_size = LOGO_CIRCLE_SIZE
+                    background = Image.new('RGBA', (circle_size, circle_size), (0, 0, 0, 0))
+                    draw = ImageDraw.Draw(background)
+                    draw.ellipse([0, 0, circle_size-1, circle_size-1], 
+                                fill=(255, 255, 255, 255))
+                    
+                    # 5. Centrar logo sobre círculo blanco
+                    x_offset = (circle_size - new_width) // 2
+                    y_offset = (circle_size - new_height) // 2
+                    background.paste(logo_resized, (x_offset, y_offset), logo_resized)
+                    
+                    try:
+                        os.makedirs(local_data_dir(), exist_ok=True)
+                        background.save(cached_path)
+                    except OSError as e:
+                        print(f"⚠️ No se pudo guardar el logo en caché: {e}")
+                
+                # 6. Convertir a CTkImage
+                logo_ctk = ctk.CTkImage(
+                    light_image=background, 
+                    dark_image=background, 
+                    size=(LOGO_CIRCLE_SIZE, LOGO_CIRCLE_SIZE)
+                )
+                
+                logo_label = ctk.CTkLabel(
+                    self.header_content,
+                    image=logo_ctk,
+                    text=""
+                )
+                logo_label.pack(side="left", padx=(0, 25), before=self.header_text)
+                print(f"✓ Logo cargado en círculo blanco: {logo_path}")
+                break
+                
+            except Exception as e:
+                print(f"✗ Error al cargar logo {logo_path}: {e}")
+    
+    def on_window_shown(self):
+        """Primera pasada del event loop: la ventana ya se ve; cargar logo e inventario."""
+        mark("Mostrar ventana")
+        self.load_header_logo()
+        mark("Cargar logo")
+        self.status_label.configure(text="⏳ Cargando inventario...")
+        self.root.after(10, self.auto_load_excel)
+    
+    def report_startup_timing(self):
+        """Mostrar en consola cuánto tardó el arranque (tabla completa con --tiempos)."""
+        if detailed_report_requested():
+            print(format_startup_report())
+        else:
+            print(f"⏱️ Arranque completo en {elapsed_ms():.0f} ms (detalle: --tiempos)")
+    
+    def open_excel_session(self, excel_path, repo=None):
+        """
+        Abrir sesión para el inventario: Excel en memoria o base SQLite (.db).
+        
+        repo: repositorio ya leído en segundo plano (WorkbookPrefetch), si lo hay
+        """
+        if self.session:
+            self.writer.wait()
+            self.session.close()
+        
+        self.excel_path = excel_path
+        self.repo = repo or InventoryRepository.open(excel_path, journal=USE_CHANGE_JOURNAL)
+        self.session = self.repo.session
+        if is_sqlite_path(excel_path):
+            return
+        
+        # Cambios que quedaron en el diario (cierre inesperado): aplicarlos al Excel en el
+        # hilo escritor, como compact_journal_if_idle (reescribe el libro; la ventana no espera)
+        session = self.session
+        if session.journal is not None:
+            if not session.journal.exists():
+                return
+            
+            def recover():
+                session.compact()
+                print(f"🔁 Diario recuperado: {session.recovered_changes} celdas aplicadas al Excel")
+        elif os.path.exists(journal_path_for(excel_path)):
+            def recover():
+                print(f"🔁 Diario recuperado: {recover_journal(excel_path)} celdas aplicadas al Excel")
+        else:
+            return
+        
+        # Si falla, el diario se conserva y se vuelve a aplicar la próxima vez
+        self.writer.submit(
+            recover,
+            on_success=lambda: self.report_save_conflicts(session),
+            description="diario pendiente"
+        )
+    
+    def save_in_background(self, description, after_save=None):
+        """
+        Encolar en el hilo escritor los cambios hechos sobre la sesión.
+        
+        Los cambios ya están en memoria; si la escritura falla se descartan,
+        se recarga desde disco y se avisa al usuario. after_save() corre en el
+        hilo escritor una vez guardado el Excel (sus errores solo se registran).
+        """
+        session = self.session
+        write = session.prepare_save()
+        if after_save is not None:
+            save_excel = write
+            
+            def write():
+                save_excel()
+                try:
+                    after_save()
+                except Exception as e:
+                    print(f"⚠️ Error después de guardar {description}: {e}")
+        
+        def on_error(error):
+            session.discard()
+            messagebox.showerror(
+                "Error al Guardar",
+                f"❌ No se pudo guardar en {description}:\n\n{error}\n\n"
+                f"El último registro no quedó guardado; verifíquelo e ingréselo de nuevo."
+            )
+        
+        self.writer.submit(
+            write,
+            on_success=lambda: self.report_save_conflicts(session),
+            on_error=on_error,
+            description=description
+        )
+    
+    def report_save_conflicts(self, session):
+        """Avisar si otro técnico guardó antes y hubo que reubicar o descartar registros."""
+        conflicts = session.take_conflicts()
+        if conflicts:
+            messagebox.showwarning(
+                "Excel modificado por otro técnico",
+                "⚠️ El inventario cambió mientras se guardaba:\n\n• " + "\n• ".join(conflicts)
+            )
+    
+    def update_save_status(self, pending, description, error):
+        """Indicador de guardado en el header (llamado en el hilo de Tk)."""
+        if not self.status_label.winfo_exists():
+            return
+        if pending:
+            self.status_label.configure(text=f"⏳ Guardando {description}... ({pending} en cola)")
+        elif error is not None:
+            self.status_label.configure(text=f"❌ Error al guardar {description}")
+        else:
+            self.status_label.configure(text=f"✅ {description} guardado")
+    
+    def compact_journal_if_idle(self):
+        """Volcar el diario al Excel cuando lleva JOURNAL_IDLE_SECONDS sin guardados."""
+        session = self.session
+        if (session and session.has_pending_changes and not self.writer.pending
+                and time.monotonic() - session.last_journal_write >= JOURNAL_IDLE_SECONDS):
+            # El diario se conserva si falla; se reintenta en la próxima revisión
+            self.writer.submit(
+                session.compact,
+                on_success=lambda: self.report_save_conflicts(session),
+                description="Excel (diario)"
+            )
+        
+        self.root.after(JOURNAL_CHECK_MS, self.compact_journal_if_idle)
+    
+    def on_closing(self):
+        """Cerrar la aplicación esperando las escrituras en cola y compactando el diario."""
+        self.writer.wait()
+        if self.session:
+            self.session.close()
+            self.session = None
+        self.writer.stop()
+        self.root.destroy()
+    
+    def migrate_to_sqlite(self):
+        """Crear inventario_hospital_v1.db a partir del Excel cargado."""
+        if not self.excel_path or is_sqlite_path(self.excel_path):
+            messagebox.showwarning("Advertencia", "Primero debes cargar el archivo Excel del inventario.")
+            return
+        
+        db_path = os.path.splitext(self.excel_path)[0] + ".db"
+        if os.path.exists(db_path) and not messagebox.askyesno(
+            "Confirmar",
+            f"⚠️ Ya existe {os.path.basename(db_path)}.\n\n¿Reemplazar su contenido con el Excel actual?"
+        ):
+            return
+        
+        try:
+            # La migración lee el .xlsx: aplicar antes lo que esté en el diario
+            self.writer.wait()
+            self.session.compact()
+            migrate_excel_to_sqlite(self.excel_path, db_path)
+            self.open_excel_session(db_path)
+            self.status_label.configure(text=f"✅ {os.path.basename(db_path)} cargado")
+            messagebox.showinfo(
+                "Éxito",
+                f"✅ Inventario migrado a SQLite:\n{os.path.basename(db_path)}\n\n"
+                f"Use Archivo → Exportar a Excel para regenerar el .xlsx."
+            )
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al migrar a SQLite:\n{e}")
+    
+    def export_sqlite_to_excel(self):
+        """Regenerar el Excel desde la base SQLite (conserva estilos del .xlsx existente)."""
+        if not self.excel_path or not is_sqlite_path(self.excel_path):
+            messagebox.showwarning("Advertencia", "La exportación solo aplica cuando el inventario está en SQLite (.db).")
+            return
+        
+        excel_path = os.path.splitext(self.excel_path)[0] + ".xlsx"
+        try:
+            self.writer.wait()  # Incluir los registros aún en cola
+            self.session.export_to_excel(excel_path, template_path=excel_path)
+            messagebox.showinfo("Éxito", f"✅ Excel regenerado:\n{os.path.basename(excel_path)}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al exportar a Excel:\n{e}")
     
     def browse_excel(self):
         """Abrir diálogo para seleccionar Excel."""
         filename = filedialog.askopenfilename(
             title="Seleccionar archivo Excel - inventario_hospital_v1.xlsx",
-            filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")]
+            filetypes=[("Excel files", "*.xlsx"), ("SQLite", "*.db"), ("All files", "*.*")]
         )
         
         if filename:
-            self.excel_path = filename
+            self.open_excel_session(filename)
             
             # Detectar siguiente fila
-            self.current_row = self.get_next_available_row("Equipos de Cómputo", check_column=1)
+            self.current_row = self.get_next_available_row("Equipos de Cómputo")
             self.current_row = self.current_row-1
             
             # Actualizar status
@@ -1243,14 +1045,26 @@ class InventoryManagerApp:
     
     def auto_load_excel(self):
         """Cargar Excel automáticamente si existe en el directorio actual."""
-        default_file = "inventario_hospital_v1.xlsx"
+        # Mientras se leía, el usuario abrió otro archivo con el botón: no reemplazarlo
+        # (ni mostrar el aviso de carga encima de su formulario)
+        if self.session:
+            self.discard_prefetch()
+            return
         
-        if os.path.exists(default_file):
-            self.excel_path = default_file
+        # Lectura anticipada aún en curso: mostrar aviso y volver a revisar sin bloquear
+        if self.prefetch and not self.prefetch.done:
+            self.show_loading_message()
+            self.root.after(PREFETCH_POLL_MS, self.auto_load_excel)
+            return
+        
+        default_file = default_inventory_path()
+        if default_file:
+            self.open_excel_session(default_file, repo=self.take_prefetched_repo(default_file))
             
-            # Detectar siguiente fila automáticamente
-            self.current_row = self.get_next_available_row("Equipos de Cómputo", check_column=1)
+            # Detectar siguiente fila automáticamente (primera lectura del libro)
+            self.current_row = self.get_next_available_row("Equipos de Cómputo")
             self.current_row = self.current_row-1
+            mark("Leer inventario")
             
             # Actualizar status
             self.status_label.configure(text=f"✅ {default_file} cargado")
@@ -1260,14 +1074,51 @@ class InventoryManagerApp:
             
             print(f"✅ Excel cargado automáticamente: {default_file}")
             print(f"✅ Siguiente fila disponible: {self.current_row}")
+            mark("Mostrar formulario")
         else:
             # No hay archivo, mostrar mensaje en contenedor
             self.show_no_file_message()
+            self.status_label.configure(text="")
+        
+        self.report_startup_timing()
+    
+    def take_prefetched_repo(self, path):
+        """Repositorio leído en segundo plano, si corresponde a path (si falló, None)."""
+        if not self.prefetch or self.prefetch.path != path:
+            self.discard_prefetch()
+            return None
+        prefetch, self.prefetch = self.prefetch, None
+        try:
+            repo = prefetch.take()
+        except Exception as e:
+            print(f"⚠️ Falló la lectura anticipada del Excel, se lee de nuevo: {e}")
+            return None
+        print(f"✅ Excel leído en segundo plano en {prefetch.elapsed * 1000:.0f} ms")
+        return repo
+    
+    def discard_prefetch(self):
+        """Cerrar la lectura anticipada que ya no se va a usar."""
+        prefetch, self.prefetch = self.prefetch, None
+        if prefetch:
+            prefetch.discard()
+    
+    def show_loading_message(self):
+        """Aviso en el contenedor mientras se lee el inventario (una sola vez)."""
+        if self.loading_frame:
+            return
+        self.loading_frame = ctk.CTkFrame(self.main_container, fg_color=COLOR_FONDO)
+        self.loading_frame.pack(fill="both", expand=True)
+        
+        ctk.CTkLabel(
+            self.loading_frame,
+            text="⏳ Cargando inventario...",
+            font=("Segoe UI", 20, "bold"),
+            text_color=COLOR_VERDE_HOSPITAL
+        ).place(relx=0.5, rely=0.5, anchor="center")
     
     def show_no_file_message(self):
         """Mostrar mensaje cuando no hay archivo cargado."""
-        for widget in self.main_container.winfo_children():
-            widget.destroy()
+        self.discard_forms()
         
         msg_frame = ctk.CTkFrame(self.main_container, fg_color=COLOR_FONDO)
         msg_frame.pack(fill="both", expand=True)
@@ -1313,47 +1164,22 @@ class InventoryManagerApp:
         btn_cargar.pack()
     
     def detect_next_code(self, sheet_name, prefix):
-        """Detectar siguiente código disponible basado en el último consecutivo en columna 1."""
+        """Detectar siguiente código disponible (asignador en memoria de la sesión)."""
         if not self.excel_path or not HAS_OPENPYXL:
-            return f"{prefix}-001"
+            return f"{prefix}-0001"
         
         try:
-            wb = load_workbook(self.excel_path, read_only=True)
-            
-            # Verificar que la hoja existe
-            if sheet_name not in wb.sheetnames:
-                wb.close()
-                print(f"⚠️ Advertencia: Hoja '{sheet_name}' no existe. Creándola...")
-                return f"{prefix}-001"
-            
-            ws = wb[sheet_name]
-            
-            # Buscar el ÚLTIMO consecutivo en columna 1 (no asumir que es next_row - 1)
-            last_consecutive = 0
-            for row in range(2, 500):
-                value = ws.cell(row=row, column=1).value
-                if value is not None:
-                    try:
-                        consecutivo = int(value)
-                        if consecutivo > last_consecutive:
-                            last_consecutive = consecutivo
-                    except:
-                        pass
-                else:
-                    break  # Primera fila vacía, detener
-            
-            wb.close()
-            
-            next_consecutive = last_consecutive + 1
+            if sheet_name not in self.session.sheetnames:
+                print(f"⚠️ Advertencia: Hoja '{sheet_name}' no existe.")
             
             # Todos los códigos son de 4 dígitos
-            return f"{prefix}-{next_consecutive:04d}"
+            return self.repo.next_code(sheet_name)
             
         except Exception as e:
             print(f"❌ Error detectando código: {e}")
             import traceback
             traceback.print_exc()
-            return f"{prefix}-001"
+            return f"{prefix}-0001"
         
     def get_next_codigo(self):
         """
@@ -1363,58 +1189,30 @@ class InventoryManagerApp:
         return self.detect_next_code("Equipos de Cómputo", "EQC")
     
     def get_next_consecutivo(self):
-        """
-        Obtener siguiente número consecutivo para equipos de cómputo.
-        Busca el último consecutivo en la columna 1 de "Equipos de Cómputo".
-        """
+        """Obtener siguiente número consecutivo para equipos de cómputo."""
         if not self.excel_path or not HAS_OPENPYXL:
             return 1
         
         try:
-            wb = load_workbook(self.excel_path, read_only=True)
-            
-            # Verificar que la hoja existe
-            if "Equipos de Cómputo" not in wb.sheetnames:
-                wb.close()
-                return 1
-            
-            ws = wb["Equipos de Cómputo"]
-            
-            # Buscar el ÚLTIMO consecutivo en columna 1
-            last_consecutive = 0
-            for row in range(2, 500):
-                value = ws.cell(row=row, column=1).value
-                if value is not None:
-                    try:
-                        consecutivo = int(value)
-                        if consecutivo > last_consecutive:
-                            last_consecutive = consecutivo
-                    except:
-                        pass
-                else:
-                    break  # Primera fila vacía, detener
-            
-            wb.close()
-            
-            # Siguiente consecutivo
-            return last_consecutive + 1
-            
+            return self.session.next_consecutive("Equipos de Cómputo")
         except Exception as e:
             print(f"❌ Error obteniendo consecutivo: {e}")
             return 1
     
     def detect_next_consecutive_mantenimiento(self):
         """Detectar siguiente consecutivo para mantenimientos."""
-        next_row = self.get_next_available_row("Mantenimientos", check_column=1)
-        return next_row - 1
+        if not self.excel_path or not HAS_OPENPYXL:
+            return 1
+        return self.repo.next_maintenance_number()
     
     def detect_next_baja(self):
         """Detectar siguiente número de baja."""
-        next_row = self.get_next_available_row("Equipos Dados de Baja", check_column=1, max_rows=200)
-        return next_row - 1
+        if not self.excel_path or not HAS_OPENPYXL:
+            return 1
+        return self.repo.next_decommission_number()
     
     def create_form_field_centered(self, parent, label_text, field_name, field_type, 
-                               options=None, tooltip_text=None):
+                               options=None, tooltip_text=None, widgets=None):
         """
         Crear campo centrado.
         
@@ -1425,6 +1223,8 @@ class InventoryManagerApp:
             field_type: "entry" o "combobox"
             options: Lista de opciones para combobox (opcional)
             tooltip_text: Texto del tooltip al pasar mouse (opcional)
+            widgets: Diccionario del formulario donde registrar el widget
+                     (por defecto self.manual_widgets)
         
         Returns:
             widget: El widget creado (Entry o ComboBox)
@@ -1489,10 +1289,10 @@ class InventoryManagerApp:
             widget.grid(row=0, column=1, sticky="e")  # Alineado a la derecha de su columna
         
         # Guardar widget
-        self.manual_widgets[field_name] = widget
+        (self.manual_widgets if widgets is None else widgets)[field_name] = widget
         return widget
     
-    def create_date_field_centered(self, parent, label_text, field_name, tooltip_text=None):
+    def create_date_field_centered(self, parent, label_text, field_name, tooltip_text=None, widgets=None):
         """
         Crear campo de FECHA con calendario (DateEntry).
         Similar a create_form_field_centered pero con calendario.
@@ -1524,7 +1324,8 @@ class InventoryManagerApp:
             ToolTip(label, tooltip_text)
         
         # ===== WIDGET FECHA (COLUMNA 1) =====
-        # Usar DateEntry (calendario visual)
+        # Usar DateEntry (calendario visual; tkcalendar se importa al primer formulario con fecha)
+        from tkcalendar import DateEntry
         widget = DateEntry(
             inner_frame,
             width=28,
@@ -1548,7 +1349,7 @@ class InventoryManagerApp:
         widget.grid(row=0, column=1, sticky="e")
         
         # Guardar widget
-        self.manual_widgets[field_name] = widget
+        (self.manual_widgets if widgets is None else widgets)[field_name] = widget
         return widget
     
     def get_date_value(self, widget):
@@ -1576,9 +1377,97 @@ class InventoryManagerApp:
             print(f"Error obteniendo fecha: {e}")
             return ''
     
-    def create_radio_field_centered(self, parent, label_text, field_name, tooltip_text=None):
+    def read_widgets(self, widgets):
+        """Valores actuales de los widgets de un formulario ({campo: valor})."""
+        data = {}
+        for field_name, widget in widgets.items():
+            try:
+                # StringVar NO tiene winfo_exists() - verificar PRIMERO
+                if isinstance(widget, tk.StringVar):
+                    data[field_name] = widget.get()
+                elif hasattr(widget, 'winfo_exists') and widget.winfo_exists():
+                    if hasattr(widget, 'get_date'):
+                        data[field_name] = self.get_date_value(widget)
+                    elif isinstance(widget, (ctk.CTkEntry, ctk.CTkComboBox)):
+                        data[field_name] = widget.get()
+                    else:
+                        data[field_name] = ''
+                else:
+                    data[field_name] = ''
+            except Exception as e:
+                print(f"Error al obtener valor de {field_name}: {e}")
+                data[field_name] = ''
+        return data
+    
+    def fill_widgets(self, widgets, data):
+        """Cargar {campo: valor} (ej: una fila leída con el esquema) en los widgets."""
+        for field_name, widget in widgets.items():
+            if field_name not in data:
+                continue
+            value = data[field_name]
+            value = '' if value is None else value
+            try:
+                if isinstance(widget, tk.StringVar):
+                    widget.set(value)
+                elif hasattr(widget, 'winfo_exists') and widget.winfo_exists():
+                    if isinstance(widget, ctk.CTkEntry):
+                        widget.delete(0, "end")
+                        widget.insert(0, value)
+                    elif isinstance(widget, ctk.CTkComboBox):
+                        widget.set(value)
+            except Exception:
+                pass  # Si falla, continuar con el siguiente
+    
+    def create_questionnaire_section(self, parent, title, color, prefix, labels, tooltips, pady=(15, 5)):
+        """
+        Bloque colapsable del cuestionario (confidencialidad, integridad o criticidad).
+        
+        Las variables Sí/No (prefix_1, prefix_2...) se registran en
+        self.manual_widgets desde ya, así que guardar, cargar un equipo y
+        limpiar el formulario funcionan aunque el bloque nunca se abra. Las
+        filas con radio botones y tooltips se construyen al expandirlo por
+        primera vez; después solo se muestran u ocultan.
+        """
+        variables = []
+        for i in range(1, len(labels) + 1):
+            var = tk.StringVar(value="")
+            self.manual_widgets[f"{prefix}_{i}"] = var
+            variables.append(var)
+        
+        body = ctk.CTkFrame(parent, fg_color="transparent")
+        state = {"built": False, "open": False}
+        
+        def toggle():
+            if not state["built"]:
+                for label_text, tooltip_text, var in zip(labels, tooltips, variables):
+                    self.create_radio_field_centered(body, label_text, None, tooltip_text, var=var)
+                state["built"] = True
+            
+            if state["open"]:
+                body.pack_forget()
+            else:
+                body.pack(fill="x", after=header)
+            state["open"] = not state["open"]
+            header.configure(text=f"{'▼' if state['open'] else '▶'}  {title} - {len(labels)} preguntas")
+        
+        header = ctk.CTkButton(
+            parent,
+            text=f"▶  {title} - {len(labels)} preguntas",
+            command=toggle,
+            font=("Segoe UI", 12, "bold"),
+            text_color=color,
+            fg_color="transparent",
+            hover_color="#E8E8E8",
+            anchor="w"
+        )
+        header.pack(anchor="w", padx=40, pady=pady)
+    
+    def create_radio_field_centered(self, parent, label_text, field_name, tooltip_text=None, var=None):
         """
         Crear campo con RadioButtons (para preguntas Sí/No).
+        
+        var: StringVar ya registrada (bloques del cuestionario); si no se
+             da, se crea una y se guarda en self.manual_widgets[field_name]
         """
         # Frame principal - CENTRADO
         field_frame = ctk.CTkFrame(parent, fg_color="white", corner_radius=8)
@@ -1612,7 +1501,9 @@ class InventoryManagerApp:
         radio_frame.grid_propagate(False)  # Mantener ancho fijo
         
         # Variable para almacenar selección
-        var = tk.StringVar(value="")
+        if var is None:
+            var = tk.StringVar(value="")
+            self.manual_widgets[field_name] = var
         
         # RadioButton SÍ
         radio_si = ctk.CTkRadioButton(
@@ -1644,9 +1535,6 @@ class InventoryManagerApp:
         )
         radio_no.pack(side="left")
         
-        # Guardar variable
-        self.manual_widgets[field_name] = var
-        
         return var
     
     def show_classification_guide(self):
@@ -1957,6 +1845,9 @@ class InventoryManagerApp:
             except:
                 pass  # Si falla, simplemente no guarda ese campo
         
+        # Leer la opción aquí: el hilo de recopilación no toca widgets ni variables de Tk
+        self.force_refresh = self.force_refresh_var.get()
+        
         # Mostrar ventana de progreso
         self.show_progress_window()
         
@@ -1979,12 +1870,12 @@ class InventoryManagerApp:
         y = (self.progress_window.winfo_screenheight() // 2) - 200
         self.progress_window.geometry(f"600x400+{x}+{y}")
         
-        label = ctk.CTkLabel(
+        self.progress_label = ctk.CTkLabel(
             self.progress_window,
             text="🔄 Recopilando Datos Automáticos...",
             font=("Arial", 16, "bold")
         )
-        label.pack(pady=20)
+        self.progress_label.pack(pady=20)
         
         self.progress_bar = ctk.CTkProgressBar(
             self.progress_window,
@@ -2001,191 +1892,107 @@ class InventoryManagerApp:
             font=("Consolas", 10)
         )
         self.log_text.pack(pady=10, padx=20)
+        
+        # El hilo de recopilación publica eventos; la ventana los muestra por lotes
+        self.probes_total = 0
+        self.probes_done = 0
+        self.progress = ProgressChannel(self.root, self.handle_progress_events)
+        self.progress.start()
     
     def log_progress(self, message):
-        """Agregar mensaje al log."""
-        if hasattr(self, 'log_text'):
-            self.log_text.insert("end", message + "\n")
-            self.log_text.see("end")
-            self.root.update()
+        """Agregar mensaje al log (seguro desde el hilo de recopilación)."""
+        self.progress.message(message)
+    
+    def handle_progress_events(self, events):
+        """Mostrar un lote de eventos de progreso (hilo de Tk, un solo insert en el log)."""
+        lines = []
+        done = None
+        for event in events:
+            if event.kind == EVENT_MESSAGE:
+                lines.append(event.data['text'])
+            elif event.kind == EVENT_PROBE_STARTED:
+                self.probes_total += 1
+            elif event.kind == EVENT_PROBE_FINISHED:
+                self.probes_done += 1
+                lines.extend(self.format_probe_result(event.data['result']))
+            elif event.kind == EVENT_DONE:
+                done = event.data
+        
+        window_open = self.progress_window.winfo_exists()
+        if window_open:
+            if lines:
+                self.log_text.insert("end", "\n".join(lines) + "\n")
+                self.log_text.see("end")
+            if self.probes_total:
+                self.progress_label.configure(
+                    text=f"🔄 Recopilando Datos Automáticos... ({self.probes_done}/{self.probes_total})")
+        
+        if done is not None:
+            # Cerrar ventana de progreso
+            if window_open:
+                self.progress_bar.stop()
+                self.root.after(1000, lambda: self.progress_window.destroy())
+            
+            # Mostrar validación de campos mixtos
+            self.root.after(1500, self.show_mixed_validation)
+    
+    def format_probe_result(self, result):
+        """Líneas del log para el resultado de una sonda."""
+        if result.ok:
+            strategy = f" vía {result.strategy}" if result.strategy else ""
+            timing = "caché" if result.status == STATUS_CACHED else f"{result.elapsed:.1f} s"
+            lines = [f"\n✓ {result.name} ({timing}{strategy})"]
+            lines.extend(f"   ✓ {field.replace('_', ' ').capitalize()}: {value}"
+                         for field, value in result.fields.items())
+            return lines
+        if result.status == STATUS_TIMEOUT:
+            return [f"\n⏱️ {result.name}: sin respuesta en {result.elapsed:.0f} s"]
+        if result.status == STATUS_SKIPPED:
+            return [f"\n⚠️ {result.name}: {result.error}"]
+        return [f"\n❌ {result.name}: {result.error}"]
     
     def collect_automatic_data(self):
-        """Recopilar datos automáticos."""
-        self.verde_data = {}
+        """
+        Recopilar datos automáticos (hilo de trabajo).
         
-        # 1. Nombre del equipo
-        self.log_progress("📋 Identificación del equipo...")
-        self.verde_data['nombre_equipo'] = socket.gethostname()
-        self.log_progress(f"   ✓ Nombre: {self.verde_data['nombre_equipo']}")
-        
-        # 2. Hardware con WMI
-        self.log_progress("\n💻 Detectando hardware con WMI...")
-        hw_info = detect_hardware_wmi()
-        
-        # Equipo
-        self.verde_data['marca'] = hw_info['marca']
-        self.verde_data['modelo'] = hw_info['modelo']
-        self.verde_data['serial'] = hw_info['serial']
-        
-        self.log_progress(f"   ✓ Marca: {self.verde_data['marca']}")
-        self.log_progress(f"   ✓ Modelo: {self.verde_data['modelo']}")
-        self.log_progress(f"   ✓ Serial: {self.verde_data['serial']}")
-        
-        # ===== DISCO 1 (PRIMARIO) =====
-        self.log_progress(f"\n💿 Disco 1 (Primario):")
-        self.verde_data['disco1_capacidad'] = hw_info['disco1_capacidad']
-        self.verde_data['disco1_tipo'] = hw_info['disco1_tipo']
-        self.verde_data['disco1_serial'] = hw_info['disco1_serial']
-        self.verde_data['disco1_marca'] = hw_info['disco1_marca']
-        self.verde_data['disco1_modelo'] = hw_info['disco1_modelo']
-        
-        self.log_progress(f"   ✓ Capacidad: {hw_info['disco1_capacidad']} GB")
-        self.log_progress(f"   ✓ Tipo: {hw_info['disco1_tipo']}")
-        self.log_progress(f"   ✓ Serial: {hw_info['disco1_serial']}")
-        self.log_progress(f"   ✓ Marca: {hw_info['disco1_marca']}")
-        self.log_progress(f"   ✓ Modelo: {hw_info['disco1_modelo']}")
-        
-        # ===== DISCO 2 (SECUNDARIO) =====
-        if hw_info['disco2_capacidad'] != 'No tiene':
-            self.log_progress(f"\n💿 Disco 2 (Secundario) Detectado:")
-            self.log_progress(f"   ✓ Capacidad: {hw_info['disco2_capacidad']} GB")
-            self.log_progress(f"   ✓ Tipo: {hw_info['disco2_tipo']}")
-            self.log_progress(f"   ✓ Serial: {hw_info['disco2_serial']}")
-            self.log_progress(f"   ✓ Marca: {hw_info['disco2_marca']}")
-            self.log_progress(f"   ✓ Modelo: {hw_info['disco2_modelo']}")
-        else:
-            self.log_progress(f"\n💿 Disco 2 (Secundario): No detectado")
-        
-        # 5-7. Sistema Operativo
-        self.log_progress("\n🪟 Sistema Operativo...")
-        self.verde_data['sistema_operativo'] = f"{platform.system()} {platform.release()}"
-        self.verde_data['arquitectura_so'] = "64 bits" if "64" in platform.machine() else "32 bits"
-        self.verde_data['procesador'] = platform.processor() or "No detectado"
-        
-        self.log_progress(f"   ✓ SO: {self.verde_data['sistema_operativo']}")
-        self.log_progress(f"   ✓ Arquitectura: {self.verde_data['arquitectura_so']}")
-        self.log_progress(f"   ✓ Procesador: {self.verde_data['procesador'][:50]}...")
-        
-        # 8-9. RAM y Almacenamiento
-        if HAS_PSUTIL:
-            # Obtener RAM utilizable
-            ram_bytes = psutil.virtual_memory().total
-            ram_gib_usable = ram_bytes / (1024**3)  # GiB utilizables
-            
-            # Tamaños comerciales estándar
-            common_sizes = [2, 4, 6, 8, 12, 16, 24, 32, 48, 64, 128]
-            
-            # Redondeo inteligente con margen del 15%
-            # Busca el tamaño comercial más probable
-            # considerando que puede haber RAM reservada
-            best_match = None
-            min_diff = float('inf')
-            
-            for size in common_sizes:
-                # Considerar margen de -20% (por GPU integrada, BIOS, etc)
-                expected_usable = size * 0.80  # 80% del tamaño comercial
-                diff = abs(ram_gib_usable - expected_usable)
-                
-                # También considerar coincidencia directa
-                direct_diff = abs(ram_gib_usable - size)
-                
-                # Usar la mejor coincidencia
-                actual_diff = min(diff, direct_diff)
-                
-                if actual_diff < min_diff:
-                    min_diff = actual_diff
-                    best_match = size
-            
-            ram_gb = best_match
-            
-            self.verde_data['ram_gb'] = str(ram_gb)
-            self.log_progress(f"   ✓ RAM: {ram_gb} GB (utilizable: {ram_gib_usable:.2f} GiB)")
-            
-            # Almacenamiento
-            try:
-                disk = psutil.disk_usage('C:\\\\')
-                storage_gb = round(disk.total / (1024**3))
-                self.verde_data['almacenamiento_gb'] = str(storage_gb)
-                self.log_progress(f"   ✓ Almacenamiento: {storage_gb} GB")
-            except:
-                self.verde_data['almacenamiento_gb'] = "No detectado"
-        else:
-            self.verde_data['ram_gb'] = "Requiere psutil"
-            self.verde_data['almacenamiento_gb'] = "Requiere psutil"
-        
-        # 10-15. Software Office
-        self.log_progress("\n📦 Detectando Office...")
-        office_version, office_licencia = detect_office_version()
-        self.verde_data['version_office'] = office_version
-        self.verde_data['licencia_office'] = office_licencia
-        self.verde_data['uso_navegador_web'] = "Sí"
-        
-        self.log_progress(f"   ✓ Versión Office: {office_version}")
-        self.log_progress(f"   ✓ Licencia Office: {office_licencia}")
-        
-        # Teams y Outlook
-        teams, outlook = detect_office_apps()
-        self.verde_data['uso_teams'] = teams
-        self.verde_data['uso_outlook'] = outlook
-        
-        self.log_progress(f"   ✓ Teams: {teams}")
-        self.log_progress(f"   ✓ Outlook: {outlook}")
-        
-        # 16-18. Licencia Windows
-        self.log_progress("\n🔑 Detectando licencia Windows...")
-        lic_info = detect_windows_license()
-        self.verde_data['licencia_windows'] = lic_info['tipo']
-        self.verde_data['key_windows'] = lic_info['key']
-        self.verde_data['estado_licencia_windows'] = lic_info['estado']
-        
-        self.log_progress(f"   ✓ Licencia: {lic_info['tipo']}")
-        self.log_progress(f"   ✓ Key (últimos 5): {lic_info['key']}")
-        self.log_progress(f"   ✓ Estado: {lic_info['estado']}")
-        
-        # 19-23. Red
-        self.log_progress("\\n🌐 Red...")
-
-        # IP Local
-        ip_local = detect_ip_local()
-        self.verde_data['direccion_ip'] = ip_local
-        self.log_progress(f"   ✓ IP Local: {ip_local}")
-
-        # MAC Address
-        mac_address = detect_mac_address()
-        self.verde_data['mac_address'] = mac_address
-        self.log_progress(f"   ✓ MAC Address: {mac_address}")
-
-        self.verde_data['tipo_conexion'] = "Ethernet"  # Default
-
-        # Navegador predeterminado
-        navegador = detect_default_browser()
-        self.verde_data['navegador_predeterminado'] = navegador
-        self.log_progress(f"   ✓ Navegador: {navegador}")
-
-        # Unidades de red mapeadas (nuevo)
-        unidades_red = detect_network_drives()
-        self.verde_data['unidades_red_mapeadas'] = unidades_red
-        self.log_progress(f"   ✓ Unidades de red: {unidades_red}")
+        Las sondas registradas (probe_registry) corren en paralelo, cada una
+        con su tiempo límite. Este hilo no toca widgets: publica inicio y
+        resultado de cada sonda en el canal de progreso, y la ventana los
+        muestra por lotes; al final, la tabla de tiempos por sonda.
+        """
+        # La detección (wmi, psutil, PowerShell) se importa aquí, no al arrancar
+        from detection import collect
+        if USE_CIM_PROBE:
+            importlib.import_module("cim_probe")  # Registra la sonda alternativa CIM
         
-        # 24-26. Seguridad
-        self.log_progress("\n🔒 Seguridad...")
-        self.verde_data['antivirus_instalado'] = "Windows Defender"
-        self.verde_data['windows_update_activo'] = "Sí"
+        self.log_progress("📋 Identificación del equipo...")
+        self.log_progress(f"   ✓ Nombre: {socket.gethostname()}")
+        probe_count = len(registered_probes(PROBE_ALTERNATIVES))
+        self.log_progress(f"\n🔎 Ejecutando {probe_count} detecciones en paralelo...")
         
-        last_update = detect_last_windows_update()
-        self.verde_data['ultima_act_windows'] = last_update
+        start = time.monotonic()
         
-        self.log_progress(f"   ✓ Antivirus: Windows Defender")
-        self.log_progress(f"   ✓ Última actualización: {last_update}")
+        self.verde_data, results = collect(
+            on_result=lambda result: self.progress.post(EVENT_PROBE_FINISHED, result=result),
+            on_start=lambda name: self.progress.post(EVENT_PROBE_STARTED, name=name),
+            alternatives=PROBE_ALTERNATIVES,
+            cache=ProbeCache.for_host(),
+            refresh=self.force_refresh
+        )
         
-        self.log_progress("\n✅ Recopilación automática completada")
+        self.log_progress(f"\n✅ Recopilación automática completada en {time.monotonic() - start:.1f} s")
+        self.log_progress("\n" + format_timing_table(results))
         
-        # Cerrar ventana de progreso
-        self.progress_bar.stop()
-        self.root.after(1000, lambda: self.progress_window.destroy())
+        # Tiempos por sonda acumulados de todos los equipos, junto al Excel
+        if self.excel_path:
+            try:
+                timing_path = os.path.join(os.path.dirname(os.path.abspath(self.excel_path)), PROBE_TIMINGS_FILE)
+                append_timing_log(timing_path, self.verde_data['nombre_equipo'], results)
+            except OSError as e:
+                print(f"⚠️ No se pudo registrar tiempos de sondas: {e}")
         
-        # Mostrar validación de campos mixtos
-        self.root.after(1500, self.show_mixed_validation)
+        # La ventana se cierra y sigue la validación al recibir este evento
+        self.progress.post(EVENT_DONE)
     
     def show_mixed_validation(self):
         """Mostrar ventana de validación de campos mixtos (AZULES)."""
@@ -2287,7 +2094,10 @@ class InventoryManagerApp:
     def detect_anydesk(self):
         """Detectar ID de AnyDesk si está instalado."""
         try:
-            # Ruta típica de AnyDesk
+            # Programas que ya leyó la recopilación (sin leer el registro en la interfaz)
+            if find_package(collected_snapshot(), r"^AnyDesk\b"):
+                return "Instalado - Verificar ID"
+            # Ruta típica de AnyDesk (instalación sin entrada en Uninstall)
             anydesk_path = r"C:\Program Files (x86)\AnyDesk\AnyDesk.exe"
             if os.path.exists(anydesk_path):
                 # Intentar obtener ID (simplificado)
@@ -2321,132 +2131,65 @@ class InventoryManagerApp:
             return
         
         try:
-            wb = load_workbook(self.excel_path)
-            ws = wb["Equipos de Cómputo"]
+            # ===== FILA COMPLETA (columnas según column_schema) =====
+            # Nombre (verde) + Naranjas (manuales) + Verdes (hardware/software) + Azules (mixtos)
+            data = {f: self.equipment_data.get(f, '') for f in EQUIPOS_NARANJA_FIELDS}
+            data.update({f: self.verde_data.get(f, '') for f in DETECTED_FIELDS})
+            data.update({f: self.azul_data.get(f, '') for f in EQUIPOS_AZUL_FIELDS})
             
             # Verificar modo
             if hasattr(self, 'equipo_update_row') and self.equipo_update_row:
-                # MODO ACTUALIZACIÓN
-                row = self.equipo_update_row
+                # MODO ACTUALIZACIÓN (consecutivo y código no cambian)
                 codigo = self.equipo_update_code
-                consecutive = int(codigo.split('-')[1])
+                self.repo.update("Equipos de Cómputo", codigo, data)
             else:
-                # MODO GUARDAR NUEVO
-                row = self.current_row
-                consecutive = row - 1
-                ws.cell(row=row, column=1, value=consecutive)
-                ws.cell(row=row, column=2, value=f"EQC-{consecutive:04d}")
-            
-            # ===== COLUMNA 3: Nombre Equipo (VERDE) =====
-            ws.cell(row=row, column=3, value=self.verde_data.get('nombre_equipo', ''))
-            
-            # ===== COLUMNAS 4-50: NARANJAS (DATOS MANUALES) =====
-            col = 4
-            
-            # Campos básicos (7)
-            basic_fields = [
-                'tipo_equipo', 'area_servicio', 'ubicacion_especifica', 'responsable_custodio',
-                'macroproceso', 'proceso', 'subproceso'
-            ]
-            
-            for field in basic_fields:
-                value = self.equipment_data.get(field, '')
-                ws.cell(row=row, column=col, value=value)
-                col += 1
-            
-            # Campos software (5)
-            software_fields = ['uso_sihos', 'uso_office_basico', 'software_especializado', 
-                            'descripcion_software', 'funcion_principal']
-            for field in software_fields:
-                value = self.equipment_data.get(field, '')
-                ws.cell(row=row, column=col, value=value)
-                col += 1
-            
-            # ===== CUESTIONARIO DE CLASIFICACIÓN (18 PREGUNTAS) =====
-            # 9 Confidencialidad
-            for i in range(1, 10):
-                value = self.equipment_data.get(f'conf_{i}', '')
-                ws.cell(row=row, column=col, value=value)
-                col += 1
-            
-            # 3 Integridad
-            for i in range(1, 4):
-                value = self.equipment_data.get(f'int_{i}', '')
-                ws.cell(row=row, column=col, value=value)
-                col += 1
-            
-            # 6 Criticidad
-            for i in range(1, 7):
-                value = self.equipment_data.get(f'crit_{i}', '')
-                ws.cell(row=row, column=col, value=value)
-                col += 1
-            
-            # Campos finales (4) - SIN FECHAS NI VALORES
-            final_fields = [
-                'horario_uso', 'estado_operativo', 'observaciones_tecnicas',
-                'periodicidad_mtto', 'responsable_mtto'
-            ]
-            for field in final_fields:
-                value = self.equipment_data.get(field, '')
-                ws.cell(row=row, column=col, value=value)
-                col += 1
-            
-            # TOTAL NARANJAS: 7 + 5 + 1 + 18 + 4 = 35 columnas
-            # Básicos (7) + Software (5) + Función (1) + Cuestionario (18) + Operativos (4)
-            
-            # ===== COLUMNAS VERDES (HARDWARE Y SOFTWARE) =====
-            verde_fields = [
-            'marca', 'modelo', 'serial', 'sistema_operativo', 'arquitectura_so',
-            'procesador', 'ram_gb',
-            # DISCO 1 (5 campos)
-            'disco1_capacidad', 'disco1_tipo', 'disco1_serial', 'disco1_marca', 'disco1_modelo',
-            # DISCO 2 (5 campos)
-            'disco2_capacidad', 'disco2_tipo', 'disco2_serial', 'disco2_marca', 'disco2_modelo',
-            # Resto
-            'uso_navegador_web', 'version_office', 'licencia_office',
-            'uso_teams', 'uso_outlook', 'licencia_windows', 'key_windows',
-            'estado_licencia_windows', 
-            'direccion_ip',           # IP local
-            'mac_address',           
-            'tipo_conexion',
-            'navegador_predeterminado',  
-            'unidades_red_mapeadas',     
-            'antivirus_instalado', 'ultima_act_windows', 'windows_update_activo'
-        ]
-            
-            for field in verde_fields:
-                value = self.verde_data.get(field, '')
-                ws.cell(row=row, column=col, value=value)
-                col += 1
-            
-            # ===== COLUMNAS AZULES (MIXTAS) =====
-            azul_fields = [
-                'switch_puerto', 'vlan_asignada', 'id_anydesk',
-                'otro_acceso_remoto', 'estado_antivirus',
-                'cifrado_disco', 'tipo_usuario_local'
-            ]
-            
-            for field in azul_fields:
-                value = self.azul_data.get(field, '')
-                ws.cell(row=row, column=col, value=value)
-                col += 1
-            
-            # Guardar
-            wb.save(self.excel_path)
-            wb.close()
+                # MODO GUARDAR NUEVO (siguiente consecutivo y primera fila vacía)
+                record = self.repo.add("Equipos de Cómputo", data)
+                codigo = record['codigo']
+                self.current_row = record['consecutivo']
+            
+            # Guardar; el software se guarda después, en el hilo escritor y con el código definitivo
+            session, store_path = self.session, store_path_for(self.excel_path)
+            self.save_in_background(
+                "Equipos de Cómputo",
+                after_save=lambda: self.save_software_snapshot(session, store_path, codigo)
+            )
             
             # Mensaje según modo
             if hasattr(self, 'equipo_update_row') and self.equipo_update_row:
                 messagebox.showinfo("Éxito", f"✅ Equipo {codigo} actualizado correctamente (datos completos)")
                 self.reset_after_update_equipos()
             else:
-                messagebox.showinfo("Éxito", f"✅ Equipo guardado: EQC-{consecutive:04d}")
+                messagebox.showinfo("Éxito", f"✅ Equipo guardado: {codigo}")
                 self.current_row += 1
                 self.root.after(100, self.show_manual_form_in_container)
                 
         except Exception as e:
+            self.session.discard()
             messagebox.showerror("Error", f"Error al guardar en Excel:\n{e}")
     
+    def save_software_snapshot(self, session, store_path, codigo):
+        """
+        Guardar los programas instalados del equipo junto al Excel (solo lo que cambió).
+        
+        Corre en el hilo escritor después de guardar el Excel: si otro técnico
+        ocupó el código, se usa el que quedó al reubicar la fila.
+        """
+        codigo = session.final_code(codigo)
+        if codigo is None:
+            return
+        packages = get_software_snapshot()
+        if not packages:
+            return
+        try:
+            with SoftwareStore(store_path) as store:
+                delta = store.save_snapshot(codigo, packages)
+            if not delta['sin_cambios']:
+                print(f"💾 Software de {codigo}: {len(delta['agregados'])} agregados, "
+                      f"{len(delta['eliminados'])} eliminados")
+        except sqlite3.Error as e:
+            print(f"⚠️ No se pudo guardar el inventario de software: {e}")
+    
     def save_equipo_manual_only(self):
         """Guardar solo datos manuales (sin recopilación automática)."""
         
@@ -2495,31 +2238,7 @@ class InventoryManagerApp:
             return
         
         # ===== RECOPILAR DATOS MANUALES =====
-        datos_guardados = {}
-        
-        for field_name, widget in self.manual_widgets.items():
-            try:
-                # ⚠️ CRÍTICO: StringVar NO tiene winfo_exists() - verificar PRIMERO
-                if isinstance(widget, tk.StringVar):
-                    datos_guardados[field_name] = widget.get()
-                
-                # Widgets de CTk - SÍ tienen winfo_exists()
-                elif hasattr(widget, 'winfo_exists') and widget.winfo_exists():
-                    # Entry (campos de texto)
-                    if isinstance(widget, ctk.CTkEntry):
-                        datos_guardados[field_name] = widget.get()
-                    
-                    # ComboBox (listas desplegables)
-                    elif isinstance(widget, ctk.CTkComboBox):
-                        datos_guardados[field_name] = widget.get()
-                    
-                    else:
-                        datos_guardados[field_name] = ''
-                else:
-                    datos_guardados[field_name] = ''
-            except Exception as e:
-                print(f"Error al obtener valor de {field_name}: {e}")
-                datos_guardados[field_name] = ''
+        datos_guardados = self.read_widgets(self.manual_widgets)
         
         # ===== GUARDAR EN EXCEL =====
         try:
@@ -2532,98 +2251,21 @@ class InventoryManagerApp:
                 messagebox.showerror("Error", f"No se encontró el archivo: {self.excel_path}")
                 return
             
-            wb = openpyxl.load_workbook(self.excel_path)
+            wb = self.session.workbook
             
             if "Equipos de Cómputo" not in wb.sheetnames:
                 messagebox.showerror("Error", "No se encontró la hoja: Equipos de Cómputo")
                 return
             
-            ws = wb["Equipos de Cómputo"]
-            
-            # ===== BUSCAR ÚLTIMO CONSECUTIVO Y PRIMERA FILA VACÍA =====
-            # Buscar ÚLTIMA fila con datos (para consecutivo correcto)
-            last_consecutive = 0
-            primera_fila_vacia = 2  # Por defecto
-
-            for row in range(2, 500):
-                value = ws.cell(row=row, column=1).value
-                
-                if value is not None:
-                    # Hay datos - actualizar consecutivo
-                    try:
-                        consecutivo = int(value)
-                        if consecutivo > last_consecutive:
-                            last_consecutive = consecutivo
-                    except:
-                        pass
-                else:
-                    # Primera fila vacía encontrada
-                    primera_fila_vacia = row
-                    break
-
-            # Siguiente consecutivo (si no hay datos, empieza en 1)
-            next_consecutivo = last_consecutive + 1
-            next_codigo = f"EQC-{next_consecutivo:04d}"
-            nueva_fila = primera_fila_vacia
-
-            print(f"DEBUG: last_consecutive={last_consecutive}, next_consecutivo={next_consecutivo}, nueva_fila={nueva_fila}")
-            
-            # ===== MAPEO A 80 COLUMNAS (VERSION ACTUAL) =====
-            
-            # Cols 1-2: Identificación
-            ws.cell(row=nueva_fila, column=1).value = next_consecutivo  # N° Consecutivo
-            ws.cell(row=nueva_fila, column=2).value = next_codigo       # Código
-            
-            # Col 3: Nombre Equipo (VERDE - se llenará después)
-            ws.cell(row=nueva_fila, column=3).value = ''  # Vacío por ahora
-            
-            # Cols 4-10: Básicos (NARANJA)
-            ws.cell(row=nueva_fila, column=4).value = datos_guardados.get('tipo_equipo', '')
-            ws.cell(row=nueva_fila, column=5).value = datos_guardados.get('area_servicio', '')
-            ws.cell(row=nueva_fila, column=6).value = datos_guardados.get('ubicacion_especifica', '')
-            ws.cell(row=nueva_fila, column=7).value = datos_guardados.get('responsable_custodio', '')
-            ws.cell(row=nueva_fila, column=8).value = datos_guardados.get('macroproceso', '')
-            ws.cell(row=nueva_fila, column=9).value = datos_guardados.get('proceso', '')
-            ws.cell(row=nueva_fila, column=10).value = datos_guardados.get('subproceso', '')
-            
-            # Cols 11-15: Software (NARANJA)
-            ws.cell(row=nueva_fila, column=11).value = datos_guardados.get('uso_sihos', '')
-            ws.cell(row=nueva_fila, column=12).value = datos_guardados.get('uso_office_basico', '')
-            ws.cell(row=nueva_fila, column=13).value = datos_guardados.get('software_especializado', '')
-            ws.cell(row=nueva_fila, column=14).value = datos_guardados.get('descripcion_software', '')
-            ws.cell(row=nueva_fila, column=15).value = datos_guardados.get('funcion_principal', '')
-            
-            # Cols 16-33: Cuestionario 18 preguntas (NARANJA)
-            # CONFIDENCIALIDAD (9)
-            for i in range(1, 10):
-                ws.cell(row=nueva_fila, column=15 + i).value = datos_guardados.get(f'conf_{i}', '')
-
-            # INTEGRIDAD (3)
-            for i in range(1, 4):
-                ws.cell(row=nueva_fila, column=24 + i).value = datos_guardados.get(f'int_{i}', '')
-
-            # CRITICIDAD (6)
-            for i in range(1, 7):
-                ws.cell(row=nueva_fila, column=27 + i).value = datos_guardados.get(f'crit_{i}', '')
-            
-            # Cols 34-38: Operativos (NARANJA) - Solo 5 campos
-            ws.cell(row=nueva_fila, column=34).value = datos_guardados.get('horario_uso', '')
-            ws.cell(row=nueva_fila, column=35).value = datos_guardados.get('estado_operativo', '')
-            ws.cell(row=nueva_fila, column=36).value = datos_guardados.get('observaciones_tecnicas', '')
-            ws.cell(row=nueva_fila, column=37).value = datos_guardados.get('periodicidad_mtto', '')
-            ws.cell(row=nueva_fila, column=38).value = datos_guardados.get('responsable_mtto', '')
-            
-            # Cols 39-71: Hardware/Software (VERDE) - Vacíos por ahora
-            for col in range(39, 72):
-                ws.cell(row=nueva_fila, column=col).value = ''
-
-            # Cols 72-78: Mixtos (AZUL) - Vacíos por ahora
-            for col in range(72, 79):
-                ws.cell(row=nueva_fila, column=col).value = ''
+            # ===== FILA COMPLETA (78 columnas según column_schema) =====
+            # Cols 1-2: Identificación (siguiente consecutivo) | Cols 4-38: Naranjas (manuales)
+            # Col 3 (nombre) + Verdes + Azules quedan vacías: se llenan con 'Recopilación Automática'
+            data = dict.fromkeys(SCHEMAS["Equipos de Cómputo"].columns, '')
+            data.update({f: datos_guardados.get(f, '') for f in EQUIPOS_NARANJA_FIELDS})
+            next_codigo = self.repo.add("Equipos de Cómputo", data)['codigo']
             
             # Guardar
-            wb.save(self.excel_path)
-            wb.close()
+            self.save_in_background("Equipos de Cómputo")
             
             messagebox.showinfo(
                 "Éxito",
@@ -2634,34 +2276,11 @@ class InventoryManagerApp:
                 f"Los datos de hardware se pueden agregar después con 'Recopilación Automática'."
             )
             
-            # Limpiar formulario
-            for widget in self.manual_widgets.values():
-                try:
-                    if hasattr(widget, 'winfo_exists') and widget.winfo_exists():
-                        if isinstance(widget, ctk.CTkEntry):
-                            widget.delete(0, 'end')
-                        elif isinstance(widget, ctk.CTkComboBox):
-                            widget.set('')
-                        elif isinstance(widget, tk.StringVar):
-                            widget.set('')
-                except:
-                    pass
-            
-            # Actualizar título del formulario con siguiente código
-            next_consecutive_display = next_consecutivo + 1
-            next_code_display = f"EQC-{next_consecutive_display:04d}"
-
-            # Actualizar título en el frame del formulario
-            if hasattr(self, 'form_title_label'):
-                try:
-                    if hasattr(self.form_title_label, 'winfo_exists') and self.form_title_label.winfo_exists():
-                        self.form_title_label.configure(
-                            text=f"Equipo: {next_code_display}"
-                        )
-                except Exception as e:
-                    print(f"Error actualizando título: {e}")
+            # Limpiar formulario y mostrar el siguiente código
+            self.reset_equipos_form()
             
         except Exception as e:
+            self.session.discard()
             messagebox.showerror(
                 "Error al Guardar",
                 f"Ocurrió un error al guardar los datos:\n\n{str(e)}"
@@ -2709,55 +2328,18 @@ class InventoryManagerApp:
                 return
             
             try:
-                wb = load_workbook(self.excel_path)
-                ws = wb["Equipos de Cómputo"]
-                
-                found = False
-                target_row = None
-                
-                for row in range(2, 500):
-                    cell_value = ws.cell(row=row, column=2).value
-                    if cell_value and cell_value.upper() == codigo:
-                        found = True
-                        target_row = row
-                        break
+                target_row = self.repo.find_row("Equipos de Cómputo", codigo)
                 
-                if not found:
-                    wb.close()
+                if target_row is None:
                     messagebox.showerror("Error", f"No se encontró el código {codigo}")
                     return
                 
-                # Cargar datos NARANJAS (columnas 4-27)
-                naranja_fields = [
-                    'tipo_equipo', 'area_servicio', 'ubicacion_especifica',
-                    'responsable_custodio', 'proceso', 'uso_sihos',
-                    'uso_office_basico', 'software_especializado', 'descripcion_software',
-                    'funcion_principal', 'criticidad', 'confidencialidad',
-                    'horario_uso', 'estado_operativo', 'observaciones_tecnicas', 
-                    'periodicidad_mtto', 'responsable_mtto'
-                ]
+                # Cargar datos NARANJAS (columnas 4-38) en una sola lectura de la fila
+                data = self.repo.get(codigo, "Equipos de Cómputo")
+                naranja = {f: data.get(f) or '' for f in EQUIPOS_NARANJA_FIELDS}
                 
-                col = 4
-                for field in naranja_fields:
-                    value = ws.cell(row=target_row, column=col).value or ''
-                    self.equipment_data[field] = value
-                    
-                    # Cargar en widgets con verificación
-                    if field in self.manual_widgets:
-                        try:
-                            widget = self.manual_widgets[field]
-                            if hasattr(widget, 'winfo_exists') and widget.winfo_exists():
-                                if isinstance(widget, ctk.CTkEntry):
-                                    widget.delete(0, "end")
-                                    widget.insert(0, value)
-                                elif isinstance(widget, ctk.CTkComboBox):
-                                    widget.set(value)
-                        except:
-                            pass  # Si falla, continuar con el siguiente
-                    
-                    col += 1
-                
-                wb.close()
+                self.equipment_data.update(naranja)
+                self.fill_widgets(self.manual_widgets, naranja)
                 
                 self.equipo_update_code = codigo
                 self.equipo_update_row = target_row
@@ -2848,40 +2430,13 @@ class InventoryManagerApp:
     def save_equipo_update(self):
         """Guardar actualización de equipo de cómputo (solo datos manuales)."""
         try:
-            wb = load_workbook(self.excel_path)
-            ws = wb["Equipos de Cómputo"]
-            
-            row = self.equipo_update_row
             codigo = self.equipo_update_code
             
-            # Actualizar NARANJAS (columnas 4-27)
-            col = 4
-            naranja_fields = [
-                'tipo_equipo', 'area_servicio', 'ubicacion_especifica',
-                'responsable_custodio', 'proceso', 'uso_sihos',
-                'uso_office_basico', 'software_especializado', 'descripcion_software',
-                'funcion_principal','horario_uso', 'estado_operativo', 'observaciones_tecnicas',
-                'periodicidad_mtto', 'responsable_mtto'
-            ]
-            
-            # Leer de widgets directamente con verificación (igual que save_equipo_manual_only)
-            for field in naranja_fields:
-                value = ''
-                if field in self.manual_widgets:
-                    try:
-                        widget = self.manual_widgets[field]
-                        if hasattr(widget, 'winfo_exists') and widget.winfo_exists():
-                            if isinstance(widget, ctk.CTkEntry):
-                                value = widget.get()
-                            elif isinstance(widget, ctk.CTkComboBox):
-                                value = widget.get()
-                    except:
-                        pass
-                ws.cell(row=row, column=col, value=value)
-                col += 1
+            # Actualizar NARANJAS (columnas 4-38), leyendo de los widgets con verificación
+            datos = self.read_widgets(self.manual_widgets)
+            self.repo.update("Equipos de Cómputo", codigo, {f: datos.get(f, '') for f in EQUIPOS_NARANJA_FIELDS})
             
-            wb.save(self.excel_path)
-            wb.close()
+            self.save_in_background("Equipos de Cómputo")
             
             messagebox.showinfo("Éxito", f"✅ Equipo {codigo} actualizado correctamente")
             
@@ -2889,6 +2444,7 @@ class InventoryManagerApp:
             self.reset_after_update_equipos()
             
         except Exception as e:
+            self.session.discard()
             messagebox.showerror("Error", f"Error al actualizar:\n{e}")
     
     def show_completion_message(self):
@@ -3041,11 +2597,10 @@ Total: 56 columnas completas
         for field_data in fields:
             if len(field_data) == 4:
                 label, key, field_type, options = field_data
-                widget = self.create_form_field_centered(scroll, label, key, field_type, options)
+                self.create_form_field_centered(scroll, label, key, field_type, options, widgets=self.imp_widgets)
             else:
                 label, key, field_type = field_data
-                widget = self.create_form_field_centered(scroll, label, key, field_type, None)
-            self.imp_widgets[key] = widget
+                self.create_form_field_centered(scroll, label, key, field_type, None, widgets=self.imp_widgets)
         
         # Frame para botones
         btn_frame = ctk.CTkFrame(scroll, fg_color="transparent")
@@ -3084,37 +2639,22 @@ Total: 56 columnas completas
             return
         
         try:
-            wb = load_workbook(self.excel_path)
+            wb = self.session.workbook
             
             # Verificar que la hoja existe
             if "Impresoras y Escáneres" not in wb.sheetnames:
-                wb.close()
                 messagebox.showerror("Error", "La hoja 'Impresoras y Escáneres' no existe en el Excel.\n\nCrea esta hoja primero.")
                 return
             
-            ws = wb["Impresoras y Escáneres"]
-            
             # Verificar si es actualización o nuevo registro
             if hasattr(self, 'imp_update_row') and self.imp_update_row:
                 # MODO ACTUALIZACIÓN
-                row = self.imp_update_row
                 codigo = self.imp_update_code
                 
-                # Actualizar datos en la fila existente (NO modificar columnas 1 y 2)
-                ws.cell(row=row, column=3, value=self.imp_widgets["codigo_asignado"].get())
-                ws.cell(row=row, column=4, value=self.imp_widgets["tipo"].get())
-                ws.cell(row=row, column=5, value=self.imp_widgets["marca"].get())
-                ws.cell(row=row, column=6, value=self.imp_widgets["modelo"].get())
-                ws.cell(row=row, column=7, value=self.imp_widgets["serial"].get())
-                ws.cell(row=row, column=8, value=self.imp_widgets["area"].get())
-                ws.cell(row=row, column=9, value=self.imp_widgets["ubicacion"].get())
-                ws.cell(row=row, column=10, value=self.imp_widgets["funcion"].get())
-                ws.cell(row=row, column=11, value=self.imp_widgets["ip"].get())
-                ws.cell(row=row, column=12, value=self.imp_widgets["estado"].get())
-                ws.cell(row=row, column=15, value=self.imp_widgets["observaciones"].get())
+                # Actualizar datos en la fila existente (NO modificar consecutivo ni código)
+                self.repo.update("Impresoras y Escáneres", codigo, self.read_widgets(self.imp_widgets))
                 
-                wb.save(self.excel_path)
-                wb.close()
+                self.save_in_background("Impresoras y Escáneres")
                 
                 messagebox.showinfo("Éxito", f"✅ Impresora {codigo} actualizada correctamente")
                 
@@ -3140,47 +2680,12 @@ Total: 56 columnas completas
                 
             else:
                 # MODO GUARDAR NUEVO
-                # Buscar el último consecutivo real
-                last_consecutive = 0
-                for row in range(2, 200):
-                    value = ws.cell(row=row, column=1).value
-                    if value is not None:
-                        try:
-                            consecutivo = int(value)
-                            if consecutivo > last_consecutive:
-                                last_consecutive = consecutivo
-                        except:
-                            pass
-                
-                # Siguiente consecutivo
-                next_consecutive = last_consecutive + 1
-                
-                # Buscar primera fila vacía
-                next_row = 2
-                for row in range(2, 200):
-                    if ws.cell(row=row, column=2).value is None:
-                        next_row = row
-                        break
-                
-                # Guardar datos
-                ws.cell(row=next_row, column=1, value=next_consecutive)
-                ws.cell(row=next_row, column=2, value=f"IMP-{next_consecutive:04d}")
-                ws.cell(row=next_row, column=3, value=self.imp_widgets["codigo_asignado"].get())
-                ws.cell(row=next_row, column=4, value=self.imp_widgets["tipo"].get())
-                ws.cell(row=next_row, column=5, value=self.imp_widgets["marca"].get())
-                ws.cell(row=next_row, column=6, value=self.imp_widgets["modelo"].get())
-                ws.cell(row=next_row, column=7, value=self.imp_widgets["serial"].get())
-                ws.cell(row=next_row, column=8, value=self.imp_widgets["area"].get())
-                ws.cell(row=next_row, column=9, value=self.imp_widgets["ubicacion"].get())
-                ws.cell(row=next_row, column=10, value=self.imp_widgets["funcion"].get())
-                ws.cell(row=next_row, column=11, value=self.imp_widgets["ip"].get())
-                ws.cell(row=next_row, column=12, value=self.imp_widgets["estado"].get())
-                ws.cell(row=next_row, column=15, value=self.imp_widgets["observaciones"].get())
+                # Siguiente consecutivo y primera fila vacía; fila completa según column_schema
+                record = self.repo.add("Impresoras y Escáneres", self.read_widgets(self.imp_widgets))
                 
-                wb.save(self.excel_path)
-                wb.close()
+                self.save_in_background("Impresoras y Escáneres")
                 
-                messagebox.showinfo("Éxito", f"✅ Impresora guardada: IMP-{next_consecutive:04d}")
+                messagebox.showinfo("Éxito", f"✅ Impresora guardada: {record['codigo']}")
                 
                 # Detectar siguiente código y actualizar título
                 next_code = self.detect_next_code("Impresoras y Escáneres", "IMP")
@@ -3198,6 +2703,7 @@ Total: 56 columnas completas
                             widget.set("")
                     
         except Exception as e:
+            self.session.discard()
             messagebox.showerror("Error", f"❌ Error al guardar impresora:\n\n{str(e)}\n\nVerifica que la hoja 'Impresoras y Escáneres' existe.")
             import traceback
             traceback.print_exc()
@@ -3244,56 +2750,17 @@ Total: 56 columnas completas
                 return
             
             try:
-                wb = load_workbook(self.excel_path)
-                ws = wb["Impresoras y Escáneres"]
+                # Buscar el código en el índice código → fila
+                target_row = self.repo.find_row("Impresoras y Escáneres", codigo)
                 
-                # Buscar el código en la columna 2
-                found = False
-                target_row = None
-                
-                for row in range(2, 200):
-                    cell_value = ws.cell(row=row, column=2).value
-                    if cell_value and cell_value.upper() == codigo:
-                        found = True
-                        target_row = row
-                        break
-                
-                if not found:
-                    wb.close()
+                if target_row is None:
                     messagebox.showerror("Error", f"No se encontró el código {codigo}")
                     return
                 
-                # Cargar datos en los widgets
-                self.imp_widgets["codigo_asignado"].delete(0, "end")
-                self.imp_widgets["codigo_asignado"].insert(0, ws.cell(row=target_row, column=3).value or "")
-                
-                self.imp_widgets["tipo"].set(ws.cell(row=target_row, column=4).value or "")
-                self.imp_widgets["marca"].set(ws.cell(row=target_row, column=5).value or "")
-                
-                self.imp_widgets["modelo"].delete(0, "end")
-                self.imp_widgets["modelo"].insert(0, ws.cell(row=target_row, column=6).value or "")
-                
-                self.imp_widgets["serial"].delete(0, "end")
-                self.imp_widgets["serial"].insert(0, ws.cell(row=target_row, column=7).value or "")
-                
-                self.imp_widgets["area"].set(ws.cell(row=target_row, column=8).value or "")
-                
-                self.imp_widgets["ubicacion"].delete(0, "end")
-                self.imp_widgets["ubicacion"].insert(0, ws.cell(row=target_row, column=9).value or "")
-                
-                self.imp_widgets["funcion"].set(ws.cell(row=target_row, column=10).value or "")
-                
-                self.imp_widgets["ip"].delete(0, "end")
-                self.imp_widgets["ip"].insert(0, ws.cell(row=target_row, column=11).value or "")
-                
-                self.imp_widgets["estado"].set(ws.cell(row=target_row, column=12).value or "")
-                
-                self.imp_widgets["observaciones"].delete(0, "end")
-                self.imp_widgets["observaciones"].insert(0, ws.cell(row=target_row, column=15).value or "")
-                
-                wb.close()
+                # Cargar datos (una sola lectura de la fila completa)
+                data = self.repo.get(codigo, "Impresoras y Escáneres")
+                self.fill_widgets(self.imp_widgets, data)
                 
-                # Guardar código y fila para actualizar
                 self.imp_update_code = codigo
                 self.imp_update_row = target_row
                 
@@ -3364,11 +2831,10 @@ Total: 56 columnas completas
         for field_data in fields:
             if len(field_data) == 4:
                 label, key, field_type, options = field_data
-                widget = self.create_form_field_centered(scroll, label, key, field_type, options)
+                self.create_form_field_centered(scroll, label, key, field_type, options, widgets=self.per_widgets)
             else:
                 label, key, field_type = field_data
-                widget = self.create_form_field_centered(scroll, label, key, field_type, None)
-            self.per_widgets[key] = widget
+                self.create_form_field_centered(scroll, label, key, field_type, None, widgets=self.per_widgets)
         
         # Frame para botones
         btn_frame = ctk.CTkFrame(scroll, fg_color="transparent")
@@ -3407,34 +2873,22 @@ Total: 56 columnas completas
             return
         
         try:
-            wb = load_workbook(self.excel_path)
+            wb = self.session.workbook
             
             # Verificar que la hoja existe
             if "Periféricos" not in wb.sheetnames:
-                wb.close()
                 messagebox.showerror("Error", "La hoja 'Periféricos' no existe en el Excel. Crea esta hoja primero.")
                 return
             
-            ws = wb["Periféricos"]
-            
             # Verificar si es actualización o nuevo registro
             if hasattr(self, 'per_update_row') and self.per_update_row:
                 # MODO ACTUALIZACIÓN
-                row = self.per_update_row
                 codigo = self.per_update_code
                 
-                # Actualizar datos en la fila existente
-                ws.cell(row=row, column=3, value=self.per_widgets["codigo_asignado"].get())
-                ws.cell(row=row, column=4, value=self.per_widgets["tipo"].get())
-                ws.cell(row=row, column=5, value=self.per_widgets["marca"].get())
-                ws.cell(row=row, column=6, value=self.per_widgets["modelo"].get())
-                ws.cell(row=row, column=7, value=self.per_widgets["serial"].get())
-                ws.cell(row=row, column=8, value=self.per_widgets["area"].get())
-                ws.cell(row=row, column=9, value=self.per_widgets["estado"].get())
-                ws.cell(row=row, column=11, value=self.per_widgets["observaciones"].get())
+                # Actualizar datos en la fila existente (NO modificar consecutivo ni código)
+                self.repo.update("Periféricos", codigo, self.read_widgets(self.per_widgets))
                 
-                wb.save(self.excel_path)
-                wb.close()
+                self.save_in_background("Periféricos")
                 
                 messagebox.showinfo("Éxito", f"✅ Periférico {codigo} actualizado correctamente")
                 
@@ -3460,43 +2914,12 @@ Total: 56 columnas completas
                 
             else:
                 # MODO GUARDAR NUEVO
-                # Buscar el último consecutivo real
-                last_consecutive = 0
-                for row in range(2, 200):
-                    value = ws.cell(row=row, column=1).value
-                    if value is not None:
-                        try:
-                            consecutivo = int(value)
-                            if consecutivo > last_consecutive:
-                                last_consecutive = consecutivo
-                        except:
-                            pass
-                
-                # Siguiente consecutivo
-                next_consecutive = last_consecutive + 1
-                
-                # Buscar primera fila vacía
-                next_row = 2
-                for row in range(2, 200):
-                    if ws.cell(row=row, column=2).value is None:
-                        next_row = row
-                        break
-                
-                ws.cell(row=next_row, column=1, value=next_consecutive)
-                ws.cell(row=next_row, column=2, value=f"PER-{next_consecutive:04d}")
-                ws.cell(row=next_row, column=3, value=self.per_widgets["codigo_asignado"].get())
-                ws.cell(row=next_row, column=4, value=self.per_widgets["tipo"].get())
-                ws.cell(row=next_row, column=5, value=self.per_widgets["marca"].get())
-                ws.cell(row=next_row, column=6, value=self.per_widgets["modelo"].get())
-                ws.cell(row=next_row, column=7, value=self.per_widgets["serial"].get())
-                ws.cell(row=next_row, column=8, value=self.per_widgets["area"].get())
-                ws.cell(row=next_row, column=9, value=self.per_widgets["estado"].get())
-                ws.cell(row=next_row, column=11, value=self.per_widgets["observaciones"].get())
+                # Siguiente consecutivo y primera fila vacía; fila completa según column_schema
+                record = self.repo.add("Periféricos", self.read_widgets(self.per_widgets))
                 
-                wb.save(self.excel_path)
-                wb.close()
+                self.save_in_background("Periféricos")
                 
-                messagebox.showinfo("Éxito", f"✅ Periférico guardado: PER-{next_consecutive:04d}")
+                messagebox.showinfo("Éxito", f"✅ Periférico guardado: {record['codigo']}")
                 
                 # Detectar siguiente código y actualizar título
                 next_code = self.detect_next_code("Periféricos", "PER")
@@ -3514,6 +2937,7 @@ Total: 56 columnas completas
                             widget.set("")
                     
         except Exception as e:
+            self.session.discard()
             messagebox.showerror("Error", f"❌ Error al guardar periférico:\n\n{str(e)}\n\nVerifica que la hoja 'Periféricos' existe.")
             import traceback
             traceback.print_exc()
@@ -3559,44 +2983,15 @@ Total: 56 columnas completas
                 return
             
             try:
-                wb = load_workbook(self.excel_path)
-                ws = wb["Periféricos"]
+                target_row = self.repo.find_row("Periféricos", codigo)
                 
-                found = False
-                target_row = None
-                
-                for row in range(2, 200):
-                    cell_value = ws.cell(row=row, column=2).value
-                    if cell_value and cell_value.upper() == codigo:
-                        found = True
-                        target_row = row
-                        break
-                
-                if not found:
-                    wb.close()
+                if target_row is None:
                     messagebox.showerror("Error", f"No se encontró el código {codigo}")
                     return
                 
-                # Cargar datos
-                self.per_widgets["codigo_asignado"].delete(0, "end")
-                self.per_widgets["codigo_asignado"].insert(0, ws.cell(row=target_row, column=3).value or "")
-                
-                self.per_widgets["tipo"].set(ws.cell(row=target_row, column=4).value or "")
-                self.per_widgets["marca"].set(ws.cell(row=target_row, column=5).value or "")
-                
-                self.per_widgets["modelo"].delete(0, "end")
-                self.per_widgets["modelo"].insert(0, ws.cell(row=target_row, column=6).value or "")
-                
-                self.per_widgets["serial"].delete(0, "end")
-                self.per_widgets["serial"].insert(0, ws.cell(row=target_row, column=7).value or "")
-                
-                self.per_widgets["area"].set(ws.cell(row=target_row, column=8).value or "")
-                self.per_widgets["estado"].set(ws.cell(row=target_row, column=9).value or "")
-                
-                self.per_widgets["observaciones"].delete(0, "end")
-                self.per_widgets["observaciones"].insert(0, ws.cell(row=target_row, column=11).value or "")
-                
-                wb.close()
+                # Cargar datos (una sola lectura de la fila completa)
+                data = self.repo.get(codigo, "Periféricos")
+                self.fill_widgets(self.per_widgets, data)
                 
                 self.per_update_code = codigo
                 self.per_update_row = target_row
@@ -3667,11 +3062,10 @@ Total: 56 columnas completas
         for field_data in fields:
             if len(field_data) == 4:
                 label, key, field_type, options = field_data
-                widget = self.create_form_field_centered(scroll, label, key, field_type, options)
+                self.create_form_field_centered(scroll, label, key, field_type, options, widgets=self.red_widgets)
             else:
                 label, key, field_type = field_data
-                widget = self.create_form_field_centered(scroll, label, key, field_type, None)
-            self.red_widgets[key] = widget
+                self.create_form_field_centered(scroll, label, key, field_type, None, widgets=self.red_widgets)
         
         # Frame para botones
         btn_frame = ctk.CTkFrame(scroll, fg_color="transparent")
@@ -3710,36 +3104,22 @@ Total: 56 columnas completas
             return
         
         try:
-            wb = load_workbook(self.excel_path)
+            wb = self.session.workbook
             
             # Verificar que la hoja existe
             if "Equipos de Red" not in wb.sheetnames:
-                wb.close()
                 messagebox.showerror("Error", "La hoja 'Equipos de Red' no existe en el Excel.\n\nCrea esta hoja primero.")
                 return
             
-            ws = wb["Equipos de Red"]
-            
             # Verificar si es actualización o nuevo registro
             if hasattr(self, 'red_update_row') and self.red_update_row:
                 # MODO ACTUALIZACIÓN
-                row = self.red_update_row
                 codigo = self.red_update_code
                 
-                # Actualizar datos en la fila existente (NO modificar columnas 1 y 2)
-                ws.cell(row=row, column=3, value=self.red_widgets["tipo"].get())
-                ws.cell(row=row, column=4, value=self.red_widgets["marca"].get())
-                ws.cell(row=row, column=5, value=self.red_widgets["modelo"].get())
-                ws.cell(row=row, column=6, value=self.red_widgets["serial"].get())
-                ws.cell(row=row, column=7, value=self.red_widgets["ip"].get())
-                ws.cell(row=row, column=8, value=self.red_widgets["puertos"].get())
-                ws.cell(row=row, column=9, value=self.red_widgets["ubicacion"].get())
-                ws.cell(row=row, column=10, value=self.red_widgets["area"].get())
-                ws.cell(row=row, column=11, value=self.red_widgets["estado"].get())
-                ws.cell(row=row, column=14, value=self.red_widgets["observaciones"].get())
+                # Actualizar datos en la fila existente (NO modificar consecutivo ni código)
+                self.repo.update("Equipos de Red", codigo, self.read_widgets(self.red_widgets))
                 
-                wb.save(self.excel_path)
-                wb.close()
+                self.save_in_background("Equipos de Red")
                 
                 messagebox.showinfo("Éxito", f"✅ Equipo de red {codigo} actualizado correctamente")
                 
@@ -3765,45 +3145,12 @@ Total: 56 columnas completas
                 
             else:
                 # MODO GUARDAR NUEVO
-                # Buscar el último consecutivo real
-                last_consecutive = 0
-                for row in range(2, 100):
-                    value = ws.cell(row=row, column=1).value
-                    if value is not None:
-                        try:
-                            consecutivo = int(value)
-                            if consecutivo > last_consecutive:
-                                last_consecutive = consecutivo
-                        except:
-                            pass
-                
-                # Siguiente consecutivo
-                next_consecutive = last_consecutive + 1
-                
-                # Buscar primera fila vacía
-                next_row = 2
-                for row in range(2, 100):
-                    if ws.cell(row=row, column=2).value is None:
-                        next_row = row
-                        break
-                
-                ws.cell(row=next_row, column=1, value=next_consecutive)
-                ws.cell(row=next_row, column=2, value=f"RED-{next_consecutive:04d}")
-                ws.cell(row=next_row, column=3, value=self.red_widgets["tipo"].get())
-                ws.cell(row=next_row, column=4, value=self.red_widgets["marca"].get())
-                ws.cell(row=next_row, column=5, value=self.red_widgets["modelo"].get())
-                ws.cell(row=next_row, column=6, value=self.red_widgets["serial"].get())
-                ws.cell(row=next_row, column=7, value=self.red_widgets["ip"].get())
-                ws.cell(row=next_row, column=8, value=self.red_widgets["puertos"].get())
-                ws.cell(row=next_row, column=9, value=self.red_widgets["ubicacion"].get())
-                ws.cell(row=next_row, column=10, value=self.red_widgets["area"].get())
-                ws.cell(row=next_row, column=11, value=self.red_widgets["estado"].get())
-                ws.cell(row=next_row, column=14, value=self.red_widgets["observaciones"].get())
+                # Siguiente consecutivo y primera fila vacía; fila completa según column_schema
+                record = self.repo.add("Equipos de Red", self.read_widgets(self.red_widgets))
                 
-                wb.save(self.excel_path)
-                wb.close()
+                self.save_in_background("Equipos de Red")
                 
-                messagebox.showinfo("Éxito", f"✅ Equipo de red guardado: RED-{next_consecutive:04d}")
+                messagebox.showinfo("Éxito", f"✅ Equipo de red guardado: {record['codigo']}")
                 
                 # Detectar siguiente código y actualizar título
                 next_code = self.detect_next_code("Equipos de Red", "RED")
@@ -3821,6 +3168,7 @@ Total: 56 columnas completas
                             widget.set("")
                     
         except Exception as e:
+            self.session.discard()
             messagebox.showerror("Error", f"❌ Error al guardar equipo de red:\n\n{str(e)}\n\nVerifica que la hoja 'Equipos de Red' existe.")
             import traceback
             traceback.print_exc()
@@ -3865,48 +3213,15 @@ Total: 56 columnas completas
                 return
             
             try:
-                wb = load_workbook(self.excel_path)
-                ws = wb["Equipos de Red"]
+                target_row = self.repo.find_row("Equipos de Red", codigo)
                 
-                found = False
-                target_row = None
-                
-                for row in range(2, 100):
-                    cell_value = ws.cell(row=row, column=2).value
-                    if cell_value and cell_value.upper() == codigo:
-                        found = True
-                        target_row = row
-                        break
-                
-                if not found:
-                    wb.close()
+                if target_row is None:
                     messagebox.showerror("Error", f"No se encontró el código {codigo}")
                     return
                 
-                # Cargar datos
-                self.red_widgets["tipo"].set(ws.cell(row=target_row, column=3).value or "")
-                self.red_widgets["marca"].set(ws.cell(row=target_row, column=4).value or "")
-                
-                self.red_widgets["modelo"].delete(0, "end")
-                self.red_widgets["modelo"].insert(0, ws.cell(row=target_row, column=5).value or "")
-                
-                self.red_widgets["serial"].delete(0, "end")
-                self.red_widgets["serial"].insert(0, ws.cell(row=target_row, column=6).value or "")
-                
-                self.red_widgets["ip"].delete(0, "end")
-                self.red_widgets["ip"].insert(0, ws.cell(row=target_row, column=7).value or "")
-                
-                self.red_widgets["puertos"].delete(0, "end")
-                self.red_widgets["puertos"].insert(0, ws.cell(row=target_row, column=8).value or "")
-                
-                self.red_widgets["ubicacion"].set(ws.cell(row=target_row, column=9).value or "")
-                self.red_widgets["area"].set(ws.cell(row=target_row, column=10).value or "")
-                self.red_widgets["estado"].set(ws.cell(row=target_row, column=11).value or "")
-                
-                self.red_widgets["observaciones"].delete(0, "end")
-                self.red_widgets["observaciones"].insert(0, ws.cell(row=target_row, column=14).value or "")
-                
-                wb.close()
+                # Cargar datos (una sola lectura de la fila completa)
+                data = self.repo.get(codigo, "Equipos de Red")
+                self.fill_widgets(self.red_widgets, data)
                 
                 self.red_update_code = codigo
                 self.red_update_row = target_row
@@ -3971,17 +3286,16 @@ Total: 56 columnas completas
             ("Observaciones", "observaciones", "entry"),
         ]
 
-        self.create_date_field_centered(scroll, "Fecha Mantenimiento *", "fecha_mtto")
-        self.create_date_field_centered(scroll, "Próximo Mantenimiento", "proximo")
+        self.create_date_field_centered(scroll, "Fecha Mantenimiento *", "fecha_mtto", widgets=self.mtt_widgets)
+        self.create_date_field_centered(scroll, "Próximo Mantenimiento", "proximo", widgets=self.mtt_widgets)
 
         for field_data in fields:
             if len(field_data) == 4:
                 label, key, field_type, options = field_data
-                widget = self.create_form_field_centered(scroll, label, key, field_type, options)
+                self.create_form_field_centered(scroll, label, key, field_type, options, widgets=self.mtt_widgets)
             else:
                 label, key, field_type = field_data
-                widget = self.create_form_field_centered(scroll, label, key, field_type, None)
-            self.mtt_widgets[key] = widget
+                self.create_form_field_centered(scroll, label, key, field_type, None, widgets=self.mtt_widgets)
         
         btn_save = ctk.CTkButton(
             scroll,
@@ -4001,30 +3315,10 @@ Total: 56 columnas completas
             return
         
         try:
-            wb = load_workbook(self.excel_path)
-            ws = wb["Mantenimientos"]
-            
-            next_row = 2
-            for row in range(2, 500):
-                if ws.cell(row=row, column=1).value is None:
-                    next_row = row
-                    break
-            
-            consecutive = next_row - 1
-            
-            ws.cell(row=next_row, column=1, value=consecutive)
-            ws.cell(row=next_row, column=2, value=self.mtt_widgets["codigo_equipo"].get())
-            ws.cell(row=next_row, column=3, value=self.get_date_value(self.mtt_widgets["fecha_mtto"]))
-            ws.cell(row=next_row, column=4, value=self.mtt_widgets["tipo"].get())
-            ws.cell(row=next_row, column=5, value=self.mtt_widgets["tecnico"].get())
-            ws.cell(row=next_row, column=6, value=self.mtt_widgets["descripcion"].get())
-            ws.cell(row=next_row, column=7, value=self.mtt_widgets["repuestos"].get())
-            ws.cell(row=next_row, column=8, value=self.mtt_widgets["estado_post"].get())
-            ws.cell(row=next_row, column=9, value=self.mtt_widgets["proximo"].get())
-            ws.cell(row=next_row, column=10, value=self.mtt_widgets["observaciones"].get())
+            # Fila completa según column_schema (las fechas salen de los DateEntry)
+            consecutive = self.repo.add_maintenance(self.read_widgets(self.mtt_widgets))
             
-            wb.save(self.excel_path)
-            wb.close()
+            self.save_in_background("Mantenimientos")
             
             messagebox.showinfo("Éxito", f"✅ Mantenimiento registrado #{consecutive}")
             
@@ -4044,6 +3338,7 @@ Total: 56 columnas completas
                         widget.set("")
                     
         except Exception as e:
+            self.session.discard()
             messagebox.showerror("Error", f"Error al guardar:\n{e}")
     
     def create_baja_form(self, parent_tab):
@@ -4077,16 +3372,15 @@ Total: 56 columnas completas
             ("Observaciones", "observaciones", "entry"),
         ]
 
-        self.create_date_field_centered(scroll, "Fecha de Baja *", "fecha_baja")
+        self.create_date_field_centered(scroll, "Fecha de Baja *", "fecha_baja", widgets=self.baja_widgets)
         
         for field_data in fields:
             if len(field_data) == 4:
                 label, key, field_type, options = field_data
-                widget = self.create_form_field_centered(scroll, label, key, field_type, options)
+                self.create_form_field_centered(scroll, label, key, field_type, options, widgets=self.baja_widgets)
             else:
                 label, key, field_type = field_data
-                widget = self.create_form_field_centered(scroll, label, key, field_type, None)
-            self.baja_widgets[key] = widget
+                self.create_form_field_centered(scroll, label, key, field_type, None, widgets=self.baja_widgets)
         
         # Botón para buscar y autocompletar
         btn_search = ctk.CTkButton(
@@ -4124,90 +3418,30 @@ Total: 56 columnas completas
             return
         
         try:
-            wb = load_workbook(self.excel_path)
-            
             # Determinar en qué hoja buscar según el prefijo
-            if codigo.startswith("EQC-"):
-                ws_name = "Equipos de Cómputo"
-                col_codigo = 2
-            elif codigo.startswith("IMP-"):
-                ws_name = "Impresoras y Escáneres"
-                col_codigo = 2
-            elif codigo.startswith("PER-"):
-                ws_name = "Periféricos"
-                col_codigo = 2
-            elif codigo.startswith("RED-"):
-                ws_name = "Equipos de Red"
-                col_codigo = 2
-            else:
-                wb.close()
+            ws_name = sheet_for_code(codigo)
+            if ws_name is None:
                 messagebox.showerror("Error", "Código no válido. Usa: EQC-XXXX, IMP-XXX, PER-XXX, RED-XXX")
                 return
             
-            ws = wb[ws_name]
-            found = False
-            target_row = None
+            # Buscar código en el índice
+            data = self.repo.get(codigo, ws_name)
             
-            # Buscar código
-            for row in range(2, 500):
-                cell_value = ws.cell(row=row, column=col_codigo).value
-                if cell_value and cell_value.upper() == codigo:
-                    found = True
-                    target_row = row
-                    break
-            
-            if not found:
-                wb.close()
+            if data is None:
                 messagebox.showerror("Error", f"No se encontró el código {codigo} en {ws_name}")
                 return
             
-            # Autocompletar según el tipo
-            if codigo.startswith("EQC-"):
-                # Equipos de Cómputo
-                tipo = ws.cell(row=target_row, column=4).value or "Computador"  # Tipo equipo
-                marca = ws.cell(row=target_row, column=28).value or ""  # Marca (verde)
-                modelo = ws.cell(row=target_row, column=29).value or ""  # Modelo (verde)
-                serial = ws.cell(row=target_row, column=30).value or ""  # Serial (verde)
-                
-            elif codigo.startswith("IMP-"):
-                # Impresoras
-                tipo = ws.cell(row=target_row, column=4).value or "Impresora"
-                marca = ws.cell(row=target_row, column=5).value or ""
-                modelo = ws.cell(row=target_row, column=6).value or ""
-                serial = ws.cell(row=target_row, column=7).value or ""
-                
-            elif codigo.startswith("PER-"):
-                # Periféricos
-                tipo = ws.cell(row=target_row, column=4).value or "Periférico"
-                marca = ws.cell(row=target_row, column=5).value or ""
-                modelo = ws.cell(row=target_row, column=6).value or ""
-                serial = ws.cell(row=target_row, column=7).value or ""
-                
-            elif codigo.startswith("RED-"):
-                # Equipos de Red
-                tipo = ws.cell(row=target_row, column=3).value or "Equipo de Red"
-                marca = ws.cell(row=target_row, column=4).value or ""
-                modelo = ws.cell(row=target_row, column=5).value or ""
-                serial = ws.cell(row=target_row, column=6).value or ""
-            
-            wb.close()
+            # Autocompletar según el esquema de la hoja de origen
+            # (en Equipos de Cómputo marca/modelo/serial son columnas verdes 39-41)
+            schema = SCHEMAS[ws_name]
             
             # Cargar datos en los widgets
-            self.baja_widgets["tipo"].delete(0, "end")
-            self.baja_widgets["tipo"].insert(0, tipo)
-            
-            self.baja_widgets["marca"].delete(0, "end")
-            self.baja_widgets["marca"].insert(0, marca)
-            
-            self.baja_widgets["modelo"].delete(0, "end")
-            self.baja_widgets["modelo"].insert(0, modelo)
-            
-            self.baja_widgets["serial"].delete(0, "end")
-            self.baja_widgets["serial"].insert(0, serial)
-            
-            # Guardar información para actualizar después
-            self.baja_origen_sheet = ws_name
-            self.baja_origen_row = target_row
+            self.fill_widgets(self.baja_widgets, {
+                'tipo': data.get(schema.tipo_field) or schema.default_tipo,
+                'marca': data.get('marca') or "",
+                'modelo': data.get('modelo') or "",
+                'serial': data.get('serial') or "",
+            })
             
             messagebox.showinfo("Éxito", f"✅ Datos cargados de {codigo}\n\nCompleta los campos de baja y guarda.")
             
@@ -4221,58 +3455,20 @@ Total: 56 columnas completas
             return
         
         try:
-            wb = load_workbook(self.excel_path)
-            ws_baja = wb["Equipos Dados de Baja"]
-            
-            next_row = 2
-            for row in range(2, 200):
-                if ws_baja.cell(row=row, column=1).value is None:
-                    next_row = row
-                    break
+            codigo = self.baja_widgets["codigo_original"].get().strip().upper()
             
-            codigo = self.baja_widgets["codigo_original"].get()
+            # Fila en 'Equipos Dados de Baja' + estado DADO DE BAJA en la hoja de origen
+            # (Estado Operativo en Equipos de Cómputo; Estado en las demás hojas)
+            _, origen = self.repo.decommission(codigo, self.read_widgets(self.baja_widgets))
             
-            # Guardar en hoja de Dados de Baja
-            ws_baja.cell(row=next_row, column=1, value=codigo)
-            ws_baja.cell(row=next_row, column=2, value=self.baja_widgets["tipo"].get())
-            ws_baja.cell(row=next_row, column=3, value=self.baja_widgets["marca"].get())
-            ws_baja.cell(row=next_row, column=4, value=self.baja_widgets["modelo"].get())
-            ws_baja.cell(row=next_row, column=5, value=self.baja_widgets["serial"].get())
-            ws_baja.cell(row=next_row, column=6, value=self.get_date_value(self.baja_widgets["fecha_baja"]))
-            ws_baja.cell(row=next_row, column=7, value=self.baja_widgets["motivo"].get())
-            ws_baja.cell(row=next_row, column=8, value=self.baja_widgets["destino"].get())
-            ws_baja.cell(row=next_row, column=9, value=self.baja_widgets["responsable"].get())
-            ws_baja.cell(row=next_row, column=10, value=self.baja_widgets["observaciones"].get())
-            
-            # Actualizar estado en inventario original (si fue autocompletado)
-            if hasattr(self, 'baja_origen_sheet') and hasattr(self, 'baja_origen_row'):
-                ws_origen = wb[self.baja_origen_sheet]
-                
-                # Actualizar estado operativo según el tipo
-                if self.baja_origen_sheet == "Equipos de Cómputo":
-                    # Columna 15 = Estado Operativo
-                    ws_origen.cell(row=self.baja_origen_row, column=15, value="DADO DE BAJA")
-                elif self.baja_origen_sheet == "Impresoras y Escáneres":
-                    # Columna 12 = Estado
-                    ws_origen.cell(row=self.baja_origen_row, column=12, value="DADO DE BAJA")
-                elif self.baja_origen_sheet == "Periféricos":
-                    # Columna 9 = Estado
-                    ws_origen.cell(row=self.baja_origen_row, column=9, value="DADO DE BAJA")
-                elif self.baja_origen_sheet == "Equipos de Red":
-                    # Columna 11 = Estado
-                    ws_origen.cell(row=self.baja_origen_row, column=11, value="DADO DE BAJA")
-                
-                # Limpiar referencias
-                delattr(self, 'baja_origen_sheet')
-                delattr(self, 'baja_origen_row')
-            
-            wb.save(self.excel_path)
-            wb.close()
+            self.save_in_background("Equipos Dados de Baja")
             
+            detalle = (f"• Estado actualizado a 'DADO DE BAJA' en {origen}" if origen
+                       else "• El código no está en el inventario: solo se registró la baja")
             messagebox.showinfo("Éxito", 
                 f"✅ Baja registrada: {codigo}\n\n"
                 f"• Agregado a 'Equipos Dados de Baja'\n"
-                f"• Estado actualizado a 'DADO DE BAJA' en inventario original")
+                f"{detalle}")
             
             # Actualizar título para siguiente registro
             next_baja = self.detect_next_baja()
@@ -4290,6 +3486,7 @@ Total: 56 columnas completas
                         widget.set("")
                     
         except Exception as e:
+            self.session.discard()
             messagebox.showerror("Error", f"Error al guardar:\n{e}")
 
 
@@ -4297,10 +3494,25 @@ Total: 56 columnas completas
 # MAIN
 # ============================================================================
 
+def default_inventory_path():
+    """Inventario del directorio actual (.db si ya se migró, si no .xlsx) o None."""
+    for path in (DEFAULT_SQLITE_FILE, DEFAULT_EXCEL_FILE):
+        if os.path.exists(path):
+            return path
+    return None
+
+
 def main():
     """Función principal."""
+    # Leer el Excel mientras se construye la ventana (la base SQLite abre al instante
+    # y su conexión no puede pasar de un hilo a otro)
+    default_file = default_inventory_path()
+    prefetch = None
+    if default_file and not is_sqlite_path(default_file):
+        prefetch = WorkbookPrefetch(default_file, journal=USE_CHANGE_JOURNAL)
+    
     root = ctk.CTk()
-    app = InventoryManagerApp(root)
+    app = InventoryManagerApp(root, prefetch=prefetch)
     root.mainloop()
 
 
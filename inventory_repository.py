@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+REPOSITORIO DE INVENTARIO - Sistema de Inventario Tecnológico
+==============================================================
+Operaciones de datos del inventario sin interfaz gráfica.
+
+No importa tkinter ni customtkinter: sirve para la aplicación, para
+cargas masivas, scripts y benchmarks en un equipo sin pantalla. Los
+registros se manejan como {campo: valor} con los nombres de
+column_schema.
+
+Los métodos solo modifican la sesión en memoria; save() (o el hilo
+escritor de la aplicación con session.prepare_save()) los persiste.
+"""
+
+from column_schema import SCHEMAS
+from sqlite_backend import SQLiteSession, is_sqlite_path
+from workbook_session import CODE_SHEETS, WorkbookSession, sheet_for_code
+
+
+MANTENIMIENTOS_SHEET = "Mantenimientos"
+BAJAS_SHEET = "Equipos Dados de Baja"
+ESTADO_BAJA = "DADO DE BAJA"
+
+# Hoja → prefijo de código (inverso de CODE_SHEETS)
+SHEET_PREFIXES = {sheet_name: prefix for prefix, sheet_name in CODE_SHEETS.items()}
+
+
+class RecordNotFound(KeyError):
+    """El código no existe en la hoja indicada."""
+
+
+class InventoryRepository:
+    """
+    API de datos para las seis hojas del inventario.
+
+    Uso:
+        repo = InventoryRepository.open("inventario_hospital_v1.xlsx")
+        codigo = repo.next_code("Periféricos")              # 'PER-0016'
+        record = repo.add("Periféricos", {'tipo': 'Mouse', 'area': 'Urgencias'})
+        repo.update("Periféricos", record['codigo'], {'estado': 'Bueno'})
+        repo.save()
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    @classmethod
+    def open(cls, path, journal=False):
+        """Abrir el inventario desde un Excel (.xlsx) o una base SQLite (.db)."""
+        if is_sqlite_path(path):
+            return cls(SQLiteSession(path))
+        return cls(WorkbookSession(path, journal=journal))
+
+    def save(self):
+        """Persistir los cambios pendientes en el hilo actual."""
+        self.session.save()
+
+    def close(self):
+        self.session.close()
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def _schema(self, sheet_name):
+        schema = SCHEMAS.get(sheet_name)
+        if schema is None:
+            raise ValueError(f"Hoja desconocida: {sheet_name}")
+        return schema
+
+    def _read(self, sheet_name, row):
+        schema = self._schema(sheet_name)
+        return schema.record(self.session.read_row(sheet_name, row, schema.width))
+
+    def find_row(self, sheet_name, codigo):
+        """Fila del código en la hoja, o None."""
+        return self.session.find_code_row(sheet_name, codigo)
+
+    def get(self, codigo, sheet_name=None):
+        """
+        Registro de un equipo por código.
+
+        Args:
+            codigo: ej. 'EQC-0142' (la hoja se deduce del prefijo)
+            sheet_name: hoja explícita (opcional)
+
+        Returns:
+            dict: {campo: valor} o None si no existe
+        """
+        sheet_name = sheet_name or sheet_for_code(codigo)
+        if sheet_name is None:
+            raise ValueError(f"Código no válido: {codigo}. Usa: EQC-XXXX, IMP-XXXX, PER-XXXX, RED-XXXX")
+        row = self.find_row(sheet_name, codigo)
+        if row is None:
+            return None
+        return self._read(sheet_name, row)
+
+    def rows(self, sheet_name):
+        """Recorrer (fila, registro) de todas las filas con datos de la hoja."""
+        schema = self._schema(sheet_name)
+        ws = self.session.sheet(sheet_name)
+        if ws is None:
+            return
+        for row in range(2, ws.max_row + 1):
+            values = self.session.read_row(sheet_name, row, schema.width)
+            if any(v is not None and v != '' for v in values):
+                yield row, schema.record(values)
+
+    def search(self, sheet_name, text=None, **filters):
+        """
+        Buscar registros de una hoja.
+
+        Args:
+            text: texto a buscar en cualquier campo (sin distinguir mayúsculas)
+            **filters: campo=valor exacto (sin distinguir mayúsculas), ej. area='Urgencias'
+
+        Returns:
+            list: registros {campo: valor} en orden de fila
+        """
+        self._schema(sheet_name)
+        needle = str(text).strip().upper() if text else None
+        wanted = {field: str(value).strip().upper() for field, value in filters.items()}
+
+        results = []
+        for _, record in self.rows(sheet_name):
+            if any(str(record.get(field) or '').strip().upper() != value
+                   for field, value in wanted.items()):
+                continue
+            if needle and not any(needle in str(value).upper()
+                                  for value in record.values() if value is not None):
+                continue
+            results.append(record)
+        return results
+
+    def next_code(self, sheet_name):
+        """Siguiente código libre de la hoja (ej. 'IMP-0027'), sin reservarlo."""
+        prefix = SHEET_PREFIXES.get(sheet_name)
+        if prefix is None:
+            raise ValueError(f"La hoja {sheet_name} no usa códigos")
+        if sheet_name not in self.session.sheetnames:
+            return f"{prefix}-0001"
+        return f"{prefix}-{self.session.next_consecutive(sheet_name):04d}"
+
+    def next_maintenance_number(self):
+        """Número del siguiente registro de mantenimiento."""
+        return self.session.next_free_row(MANTENIMIENTOS_SHEET) - 1
+
+    def next_decommission_number(self):
+        """Número de la siguiente baja."""
+        return self.session.next_free_row(BAJAS_SHEET) - 1
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def add(self, sheet_name, data):
+        """
+        Agregar un equipo con el siguiente consecutivo y código de la hoja.
+
+        Returns:
+            dict: {'consecutivo', 'codigo', 'fila'}
+        """
+        prefix = SHEET_PREFIXES.get(sheet_name)
+        if prefix is None:
+            raise ValueError(f"Use add_maintenance/decommission para la hoja {sheet_name}")
+
+        consecutive, row = self.session.allocate(sheet_name)
+        codigo = f"{prefix}-{consecutive:04d}"
+        record = dict(data, consecutivo=consecutive, codigo=codigo)
+        self.session.write_row(sheet_name, row, self._schema(sheet_name).cells(record))
+        self.session.set_code_row(sheet_name, codigo, row)
+        return {'consecutivo': consecutive, 'codigo': codigo, 'fila': row}
+
+    def update(self, sheet_name, codigo, data):
+        """
+        Actualizar campos de un equipo existente (consecutivo y código no cambian).
+
+        Returns:
+            int: fila actualizada
+        """
+        row = self.find_row(sheet_name, codigo)
+        if row is None:
+            raise RecordNotFound(f"No se encontró el código {codigo} en {sheet_name}")
+        data = {k: v for k, v in data.items() if k not in ('consecutivo', 'codigo')}
+        self.session.write_row(sheet_name, row, self._schema(sheet_name).cells(data))
+        return row
+
+    def add_maintenance(self, data):
+        """
+        Registrar un mantenimiento (codigo_equipo, fecha_mtto, tipo, tecnico, ...).
+
+        Returns:
+            int: número de registro del mantenimiento
+        """
+        _, row = self.session.allocate(MANTENIMIENTOS_SHEET)
+        consecutive = row - 1
+        record = dict(data, consecutivo=consecutive)
+        self.session.write_row(MANTENIMIENTOS_SHEET, row, self._schema(MANTENIMIENTOS_SHEET).cells(record))
+        return consecutive
+
+    def decommission(self, codigo, data):
+        """
+        Dar de baja un equipo: agrega la fila en 'Equipos Dados de Baja' y,
+        si el código existe en su hoja, marca su estado como DADO DE BAJA.
+
+        Returns:
+            tuple: (fila en bajas, hoja de origen o None)
+        """
+        _, row = self.session.allocate(BAJAS_SHEET)
+        record = dict(data, codigo_original=codigo)
+        self.session.write_row(BAJAS_SHEET, row, self._schema(BAJAS_SHEET).cells(record))
+
+        origin_sheet = sheet_for_code(codigo)
+        origin_row = self.find_row(origin_sheet, codigo) if origin_sheet else None
+        if origin_row is None:
+            return row, None
+
+        origin = self._schema(origin_sheet)
+        self.session.write_row(origin_sheet, origin_row, origin.cells({origin.estado_field: ESTADO_BAJA}))
+        return row, origin_sheet
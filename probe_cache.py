@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+CACHÉ DE SONDAS - Sistema de Inventario Tecnológico
+====================================================
+Resultados de sondas guardados en el propio equipo, cada uno con su
+vigencia (ttl de @register_probe): el serial y los discos duran meses,
+la licencia días y la IP minutos. Al repetir la recopilación en un PC ya
+inventariado, las sondas vigentes no se ejecutan.
+
+El archivo es local y por equipo:
+    %LOCALAPPDATA%\\InventarioTecnologico\\cache_sondas_<equipo>.json
+
+Uso:
+    cache = ProbeCache.for_host()
+    verde_data, results = collect(cache=cache)                # usa lo vigente
+    verde_data, results = collect(cache=cache, refresh=True)  # ignora la caché
+"""
+
+import json
+import os
+import re
+import socket
+import time
+
+from file_lock import atomic_replace
+from probe_executor import STATUS_CACHED, ProbeResult
+
+
+CACHE_DIR_NAME = "InventarioTecnologico"
+CACHE_FORMAT_VERSION = 1
+
+
+def local_data_dir():
+    """Carpeta de datos locales de la aplicación (%LOCALAPPDATA%\\InventarioTecnologico)."""
+    base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, CACHE_DIR_NAME)
+
+
+def default_cache_path(hostname=None):
+    """Ruta del archivo de caché de este equipo (perfil local del usuario)."""
+    hostname = hostname or socket.gethostname()
+    safe_host = re.sub(r'[^A-Za-z0-9._-]+', '-', hostname)
+    return os.path.join(local_data_dir(), f"cache_sondas_{safe_host}.json")
+
+
+class ProbeCache:
+    """Resultados vigentes por sonda: {nombre: {guardado, campos, estrategia}}."""
+
+    def __init__(self, path, hostname=None):
+        self.path = path
+        self.hostname = hostname or socket.gethostname()
+        self.entries = {}
+        self._dirty = False
+        self.load()
+
+    @classmethod
+    def for_host(cls, hostname=None):
+        return cls(default_cache_path(hostname), hostname)
+
+    def load(self):
+        """Leer el archivo; si falta, está dañado o es de otro equipo, empezar vacía."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("format_version") == CACHE_FORMAT_VERSION and data.get("hostname") == self.hostname:
+            self.entries = data.get("probes", {})
+
+    def get(self, probe, now=None):
+        """
+        ProbeResult con estado "cached" si la sonda tiene un resultado vigente.
+
+        No sirve un resultado vencido, ni uno guardado con otros campos (la
+        sonda cambió desde entonces).
+        """
+        entry = self.entries.get(probe.name)
+        if not probe.ttl or not entry:
+            return None
+        age = (now or time.time()) - entry.get("saved_at", 0)
+        if not 0 <= age < probe.ttl or sorted(entry.get("fields", {})) != sorted(probe.fields):
+            return None
+        return ProbeResult(probe.name, STATUS_CACHED, dict(entry["fields"]), strategy=entry.get("strategy"))
+
+    def put(self, probe, result, now=None):
+        """Guardar el resultado de la sonda (solo si tiene ttl)."""
+        if not probe.ttl:
+            return
+        self.entries[probe.name] = {
+            "saved_at": now or time.time(),
+            "fields": result.fields,
+            "strategy": result.strategy,
+        }
+        self._dirty = True
+
+    def clear(self):
+        self.entries = {}
+        self._dirty = True
+
+    def save(self):
+        """Escribir el archivo si hubo cambios (de forma atómica)."""
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        text = json.dumps({"format_version": CACHE_FORMAT_VERSION, "hostname": self.hostname,
+                           "probes": self.entries}, ensure_ascii=False, indent=1, default=str)
+
+        def write(temp_path):
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+
+        atomic_replace(self.path, write)
+        self._dirty = False
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+EJECUTOR DE SONDAS - Sistema de Inventario Tecnológico
+=======================================================
+Ejecuta las sondas de detección en paralelo, cada una con su propio
+tiempo límite.
+
+Cada sonda corre en un hilo daemon; los resultados se entregan en el
+hilo que llamó a run_probes() a medida que terminan. Una sonda que no
+responde a tiempo se marca como agotada y no bloquea al resto (su hilo
+sigue en segundo plano y se descarta). Así la recopilación tarda lo que
+la sonda más lenta, no la suma de todas.
+
+Cada resultado registra duración, estado y estrategia de respaldo usada;
+format_timing_table() y append_timing_log() los muestran y acumulan por
+equipo para ver qué sondas retrasan el inventario.
+"""
+
+import csv
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from probe_registry import registered_probes, take_strategy
+
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"
+STATUS_SKIPPED = "skipped"  # Falta un requisito (wmi, winreg, psutil, windows)
+STATUS_CACHED = "cached"    # Resultado vigente de probe_cache (no se ejecutó)
+
+TIMING_LOG_FIELDS = ['fecha', 'equipo', 'sonda', 'estado', 'estrategia', 'segundos']
+
+
+class ProbeResult:
+    """Resultado de una sonda: estado, campos detectados, duración y estrategia."""
+
+    def __init__(self, name, status, fields=None, error=None, elapsed=0.0, strategy=None):
+        self.name = name
+        self.status = status
+        self.fields = fields or {}
+        self.error = error
+        self.elapsed = elapsed    # Segundos
+        self.strategy = strategy  # Estrategia de respaldo que dio el resultado (note_strategy)
+
+    @property
+    def ok(self):
+        return self.status in (STATUS_OK, STATUS_CACHED)
+
+
+def _run_probe(probe, results):
+    start = time.monotonic()
+    take_strategy()
+    try:
+        fields = probe.func()
+        results.put(ProbeResult(probe.name, STATUS_OK, fields, elapsed=time.monotonic() - start,
+                                strategy=take_strategy()))
+    except Exception as e:
+        results.put(ProbeResult(probe.name, STATUS_ERROR, error=e, elapsed=time.monotonic() - start,
+                                strategy=take_strategy()))
+
+
+def run_probes(probes=None, on_result=None, on_start=None):
+    """
+    Ejecutar sondas en paralelo.
+
+    Args:
+        probes: lista de probe_registry.Probe (por defecto, todas las registradas)
+        on_start: on_start(nombre) al lanzar cada sonda (se llama en este hilo)
+        on_result: on_result(ProbeResult) por cada sonda, en orden de llegada
+                   (se llama en este hilo)
+
+    Returns:
+        dict: {nombre: ProbeResult}
+    """
+    if probes is None:
+        probes = registered_probes()
+
+    results = queue.Queue()
+    start = time.monotonic()
+    deadlines = {}
+    finished = {}
+
+    for probe in probes:
+        missing = probe.missing_requirements()
+        if missing:
+            result = ProbeResult(probe.name, STATUS_SKIPPED, error=f"Requiere {', '.join(missing)}")
+            finished[probe.name] = result
+            if on_result:
+                on_result(result)
+            continue
+
+        deadlines[probe.name] = start + probe.timeout
+        if on_start:
+            on_start(probe.name)
+        thread = threading.Thread(target=_run_probe, args=(probe, results),
+                                  name=f"probe-{probe.name}", daemon=True)
+        thread.start()
+
+    while any(name not in finished for name in deadlines):
+        pending = [d for n, d in deadlines.items() if n not in finished]
+        wait = max(0.0, min(pending) - time.monotonic())
+        try:
+            result = results.get(timeout=wait)
+        except queue.Empty:
+            result = None
+
+        if result is not None:
+            if result.name in finished:
+                continue  # Llegó después de marcarse como agotada
+            finished[result.name] = result
+            if on_result:
+                on_result(result)
+            continue
+
+        # Marcar las sondas vencidas
+        now = time.monotonic()
+        for name, deadline in deadlines.items():
+            if name not in finished and deadline <= now:
+                result = ProbeResult(name, STATUS_TIMEOUT, elapsed=now - start)
+                finished[name] = result
+                if on_result:
+                    on_result(result)
+
+    return finished
+
+
+# ============================================================================
+# TIEMPOS POR SONDA
+# ============================================================================
+
+def format_timing_table(results):
+    """Tabla de texto: sonda, estado, estrategia y segundos (más lenta primero)."""
+    rows = sorted(results.values(), key=lambda r: r.elapsed, reverse=True)
+    lines = [f"{'Sonda':<20} {'Estado':<8} {'Estrategia':<22} {'Segundos':>8}"]
+    for r in rows:
+        lines.append(f"{r.name:<20} {r.status:<8} {(r.strategy or '-'):<22} {r.elapsed:>8.2f}")
+    return "\n".join(lines)
+
+
+def append_timing_log(csv_path, hostname, results):
+    """
+    Agregar los tiempos de esta recopilación a un CSV compartido
+    (una fila por sonda), para comparar sondas entre todos los equipos.
+    """
+    new_file = not os.path.exists(csv_path)
+    fecha = datetime.now().isoformat(timespec="seconds")
+    with open(csv_path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=TIMING_LOG_FIELDS)
+        if new_file:
+            writer.writeheader()
+        for r in results.values():
+            writer.writerow({
+                'fecha': fecha,
+                'equipo': hostname,
+                'sonda': r.name,
+                'estado': r.status,
+                'estrategia': r.strategy or '',
+                'segundos': round(r.elapsed, 3),
+            })
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+REGISTRO DE SONDAS - Sistema de Inventario Tecnológico
+=======================================================
+Cada sonda de detección se declara con @register_probe: qué campos
+llena, qué necesita (wmi, winreg, psutil, windows) y su tiempo límite.
+La recopilación ejecuta lo registrado, sin lista fija en la interfaz.
+
+Dentro de una sonda, note_strategy("BIOS") deja constancia de qué
+estrategia de respaldo dio el resultado; el ejecutor la guarda junto
+con el tiempo y el estado de la sonda.
+
+Una sonda alternativa declara replaces=[...]: solo se ejecuta si se pide
+en registered_probes(alternatives=...), y entonces ocupa el lugar de las
+sondas que reemplaza (ej. una sola llamada a PowerShell/CIM en vez de
+varias sondas de WMI, registro y slmgr).
+
+Uso:
+    @register_probe("Navegador", fields=['navegador_predeterminado'],
+                    requires=('winreg',), timeout=10, ttl=TTL_DIAS)
+    def probe_browser():
+        return {'navegador_predeterminado': detect_default_browser()}
+"""
+
+import importlib.util
+import sys
+import threading
+from collections import OrderedDict
+
+
+DEFAULT_TIMEOUT = 10  # Segundos
+
+# Vigencia en caché (probe_cache), en segundos; 0 = no se guarda
+TTL_MINUTOS = 60
+TTL_HORAS = 60 * 60
+TTL_DIAS = 24 * TTL_HORAS
+
+# Requisitos que no son módulos importables
+_REQUIREMENT_CHECKS = {
+    'windows': lambda: sys.platform == 'win32',
+}
+
+_requirement_cache = {}
+_local = threading.local()
+
+
+def register_requirement(requirement, check):
+    """Definir cómo se verifica un requisito (ej. 'wmi' real o proveedor falso)."""
+    _REQUIREMENT_CHECKS[requirement] = check
+
+
+def has_requirement(requirement):
+    """True si el requisito (módulo o 'windows') está disponible en este equipo."""
+    check = _REQUIREMENT_CHECKS.get(requirement)
+    if check is not None:
+        return check()
+    if requirement not in _requirement_cache:
+        _requirement_cache[requirement] = importlib.util.find_spec(requirement) is not None
+    return _requirement_cache[requirement]
+
+
+class Probe:
+    """Sonda registrada: función sin argumentos que devuelve {campo: valor}."""
+
+    def __init__(self, name, func, fields, requires=(), timeout=DEFAULT_TIMEOUT, replaces=(), ttl=0):
+        self.name = name
+        self.func = func
+        self.fields = list(fields)
+        self.requires = tuple(requires)
+        self.timeout = timeout
+        self.replaces = tuple(replaces)  # No vacío: sonda alternativa
+        self.ttl = ttl                   # Segundos de vigencia en caché (0 = sin caché)
+
+    def missing_requirements(self):
+        return [r for r in self.requires if not has_requirement(r)]
+
+    @property
+    def available(self):
+        return not self.missing_requirements()
+
+
+# Nombre → Probe, en orden de registro
+PROBES = OrderedDict()
+
+
+def register_probe(name, fields, requires=(), timeout=DEFAULT_TIMEOUT, replaces=(), ttl=0):
+    """Decorador: registrar la función como sonda (la función no cambia)."""
+    def decorator(func):
+        PROBES[name] = Probe(name, func, fields, requires, timeout, replaces, ttl)
+        return func
+    return decorator
+
+
+def registered_probes(alternatives=()):
+    """
+    Sondas a ejecutar: las normales más las alternativas pedidas, sin las
+    que estas reemplazan.
+
+    Args:
+        alternatives: nombres de sondas alternativas a usar (ej. ("CIM (PowerShell)",))
+    """
+    unknown = [name for name in alternatives if name not in PROBES]
+    if unknown:
+        raise KeyError(f"Sonda alternativa no registrada: {', '.join(unknown)}")
+    replaced = {r for name in alternatives for r in PROBES[name].replaces}
+    return [p for p in PROBES.values()
+            if (not p.replaces or p.name in alternatives) and p.name not in replaced]
+
+
+# ============================================================================
+# ESTRATEGIA DE RESPALDO
+# ============================================================================
+
+def note_strategy(strategy):
+    """Registrar la estrategia que dio el resultado en la sonda en curso (por hilo)."""
+    _local.strategy = strategy
+
+
+def take_strategy():
+    """Estrategia anotada en este hilo (y limpiarla)."""
+    strategy = getattr(_local, 'strategy', None)
+    _local.strategy = None
+    return strategy
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+CANAL DE PROGRESO - Sistema de Inventario Tecnológico
+======================================================
+Eventos de avance de un hilo de trabajo hacia la ventana de Tk.
+
+El hilo de trabajo solo publica eventos en una cola (post); nunca toca
+widgets. En el hilo de Tk, un temporizador root.after vacía la cola cada
+PUMP_INTERVAL_MS y entrega los eventos acumulados en un solo llamado al
+manejador, que actualiza el log de una vez (sin root.update por línea).
+
+Uso:
+    channel = ProgressChannel(root, handle_events)
+    channel.start()                                   # hilo de Tk
+    channel.post(EVENT_PROBE_STARTED, name="Office")  # cualquier hilo
+    channel.post(EVENT_DONE)                          # el temporizador se detiene al entregarlo
+"""
+
+import queue
+from collections import namedtuple
+
+
+PUMP_INTERVAL_MS = 100
+PUMP_MAX_EVENTS = 200  # Por pasada, para no bloquear la ventana con ráfagas grandes
+
+# Tipos de evento
+EVENT_MESSAGE = "mensaje"          # text
+EVENT_PROBE_STARTED = "inicio"     # name
+EVENT_PROBE_FINISHED = "resultado"  # result (ProbeResult)
+EVENT_DONE = "fin"                 # datos libres del trabajo terminado
+
+ProgressEvent = namedtuple("ProgressEvent", ["kind", "data"])
+
+
+class ProgressChannel:
+    """Cola de eventos de progreso vaciada por lotes en el hilo de Tk."""
+
+    def __init__(self, root, handler, interval_ms=PUMP_INTERVAL_MS):
+        self.root = root
+        self.handler = handler  # handler(lista de ProgressEvent), en el hilo de Tk
+        self.interval_ms = interval_ms
+        self._queue = queue.Queue()
+        self._running = False
+
+    def post(self, kind, **data):
+        """Publicar un evento (seguro desde cualquier hilo)."""
+        self._queue.put(ProgressEvent(kind, data))
+
+    def message(self, text):
+        self.post(EVENT_MESSAGE, text=text)
+
+    def drain(self, limit=PUMP_MAX_EVENTS):
+        """Eventos pendientes (hasta limit), sin esperar."""
+        events = []
+        while len(events) < limit:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def start(self):
+        """Iniciar el temporizador (llamar desde el hilo de Tk)."""
+        self._running = True
+        self.root.after(self.interval_ms, self._pump)
+
+    def stop(self):
+        self._running = False
+
+    def _pump(self):
+        if not self._running:
+            return
+        events = self.drain()
+        if events:
+            if any(event.kind == EVENT_DONE for event in events):
+                self._running = False
+            try:
+                self.handler(events)
+            except Exception as e:
+                print(f"❌ Error mostrando progreso: {e}")
+        if self._running:
+            self.root.after(self.interval_ms, self._pump)
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+INVENTARIO DE SOFTWARE - Sistema de Inventario Tecnológico
+===========================================================
+Lee una sola vez las claves Uninstall del registro (HKLM 64/32 bits y
+HKCU) y guarda la lista completa de programas instalados por equipo.
+
+- get_software_snapshot(): lista de programas de este equipo, leída una
+  vez por recopilación y compartida entre sondas (Office, Teams,
+  Outlook y AnyDesk la consultan con find_package en lugar de recorrer
+  el registro cada una).
+- SoftwareStore: base SQLite junto al inventario (software_inventario.db).
+  Guarda el hash de la última instantánea de cada equipo: si no cambió,
+  no escribe nada; si cambió, solo inserta/borra los programas agregados
+  o eliminados y deja constancia en software_cambios.
+
+Uso:
+    packages = get_software_snapshot()
+    office = find_package(packages, r"^Microsoft (Office|365)")
+    with SoftwareStore(store_path_for("inventario_hospital_v1.xlsx")) as store:
+        store.save_snapshot("EQC-0001", packages)
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+try:
+    import winreg
+    HAS_WINREG = True
+except ImportError:
+    HAS_WINREG = False
+
+
+SOFTWARE_DB_FILE = "software_inventario.db"
+UNINSTALL_KEY = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall"
+
+# Campos de cada programa (mismo orden en la tabla software)
+PACKAGE_FIELDS = ('nombre', 'version', 'editor', 'fecha_instalacion')
+
+# Actualizaciones y parches no son programas
+_SKIP_RELEASE_TYPES = ('update', 'hotfix', 'security update', 'service pack')
+
+
+# ============================================================================
+# LECTURA DEL REGISTRO
+# ============================================================================
+
+def _query(key, name):
+    try:
+        return winreg.QueryValueEx(key, name)[0]
+    except OSError:
+        return None
+
+
+def _install_date(value):
+    """"20240115" → "2024-01-15" (otros formatos se dejan igual)."""
+    value = str(value or '').strip()
+    if re.fullmatch(r"\d{8}", value):
+        return f"{value[:4]}-{value[4:6]}-{value[6:]}"
+    return value
+
+
+def _registry_views():
+    """(hive, acceso) de cada vista del registro con programas instalados."""
+    return [(winreg.HKEY_LOCAL_MACHINE, winreg.KEY_READ | winreg.KEY_WOW64_64KEY),
+            (winreg.HKEY_LOCAL_MACHINE, winreg.KEY_READ | winreg.KEY_WOW64_32KEY),
+            (winreg.HKEY_CURRENT_USER, winreg.KEY_READ)]
+
+
+def read_installed_software():
+    """
+    Recorrer las claves Uninstall una vez.
+
+    Returns:
+        list: dicts {nombre, version, editor, fecha_instalacion}, sin
+              duplicados (mismo nombre y versión) y ordenados por nombre
+    """
+    if not HAS_WINREG:
+        return []
+
+    packages = {}
+    for hive, access in _registry_views():
+        try:
+            root = winreg.OpenKey(hive, UNINSTALL_KEY, 0, access)
+        except OSError:
+            continue
+        try:
+            for i in range(winreg.QueryInfoKey(root)[0]):
+                try:
+                    with winreg.OpenKey(root, winreg.EnumKey(root, i)) as subkey:
+                        name = str(_query(subkey, "DisplayName") or '').strip()
+                        if (not name or _query(subkey, "SystemComponent") == 1
+                                or _query(subkey, "ParentKeyName")
+                                or str(_query(subkey, "ReleaseType") or '').lower() in _SKIP_RELEASE_TYPES):
+                            continue
+                        package = {
+                            'nombre': name,
+                            'version': str(_query(subkey, "DisplayVersion") or '').strip(),
+                            'editor': str(_query(subkey, "Publisher") or '').strip(),
+                            'fecha_instalacion': _install_date(_query(subkey, "InstallDate")),
+                        }
+                        packages.setdefault((package['nombre'], package['version']), package)
+                except OSError:
+                    continue
+        finally:
+            winreg.CloseKey(root)
+
+    return sorted(packages.values(), key=lambda p: (p['nombre'].lower(), p['version']))
+
+
+# ============================================================================
+# INSTANTÁNEA COMPARTIDA ENTRE SONDAS
+# ============================================================================
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_software_snapshot(refresh=False):
+    """Programas instalados (se leen del registro una vez; las sondas paralelas esperan esa lectura)."""
+    global _snapshot
+    with _snapshot_lock:
+        if _snapshot is None or refresh:
+            _snapshot = read_installed_software()
+        return _snapshot
+
+
+def collected_snapshot():
+    """Instantánea ya leída por la recopilación, o [] (nunca lee el registro)."""
+    with _snapshot_lock:
+        return _snapshot or []
+
+
+def clear_snapshot():
+    """Olvidar la instantánea (la próxima recopilación vuelve a leer el registro)."""
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
+
+
+def find_package(packages, pattern, exclude=None):
+    """
+    Primer programa cuyo nombre coincide con la expresión (sin distinguir mayúsculas).
+
+    Args:
+        pattern: expresión regular sobre el nombre
+        exclude: expresión regular de nombres a descartar (ej. componentes)
+    """
+    for package in packages:
+        name = package['nombre']
+        if re.search(pattern, name, re.IGNORECASE) and not (exclude and re.search(exclude, name, re.IGNORECASE)):
+            return package
+    return None
+
+
+def snapshot_hash(packages):
+    """Hash de la lista de programas (independiente del orden)."""
+    lines = sorted("\t".join(p.get(f, '') or '' for f in PACKAGE_FIELDS) for p in packages)
+    return hashlib.sha1("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+# ============================================================================
+# ALMACÉN POR EQUIPO (SQLITE)
+# ============================================================================
+
+def store_path_for(inventory_path):
+    """software_inventario.db en la carpeta del inventario (.xlsx o .db)."""
+    return os.path.join(os.path.dirname(os.path.abspath(inventory_path)), SOFTWARE_DB_FILE)
+
+
+def _package_key(package):
+    return (package['nombre'], package.get('version') or '')
+
+
+class SoftwareStore:
+    """
+    Programas instalados por equipo (código EQC), con historial de cambios.
+
+    Tablas:
+        software            equipo, nombre, version, editor, fecha_instalacion, detectado
+        software_snapshots  equipo, hash, total, fecha (última instantánea)
+        software_cambios    equipo, fecha, accion ('agregado'/'eliminado'), nombre, version, editor
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.create_schema()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def create_schema(self):
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS software (equipo TEXT, nombre TEXT, version TEXT, "
+                "editor TEXT, fecha_instalacion TEXT, detectado TEXT, PRIMARY KEY (equipo, nombre, version))"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS software_snapshots (equipo TEXT PRIMARY KEY, hash TEXT, "
+                "total INTEGER, fecha TEXT)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS software_cambios (equipo TEXT, fecha TEXT, accion TEXT, "
+                "nombre TEXT, version TEXT, editor TEXT)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_software_cambios_equipo ON software_cambios (equipo)")
+
+    def last_hash(self, equipo):
+        row = self.conn.execute("SELECT hash FROM software_snapshots WHERE equipo = ?", (equipo,)).fetchone()
+        return row[0] if row else None
+
+    def packages(self, equipo):
+        """Programas guardados del equipo, como dicts."""
+        rows = self.conn.execute(
+            "SELECT nombre, version, editor, fecha_instalacion FROM software WHERE equipo = ? "
+            "ORDER BY nombre COLLATE NOCASE, version", (equipo,)
+        ).fetchall()
+        return [dict(zip(PACKAGE_FIELDS, row)) for row in rows]
+
+    def changes(self, equipo):
+        """Historial de programas agregados/eliminados del equipo (más reciente primero)."""
+        rows = self.conn.execute(
+            "SELECT fecha, accion, nombre, version, editor FROM software_cambios WHERE equipo = ? "
+            "ORDER BY fecha DESC, rowid DESC", (equipo,)
+        ).fetchall()
+        return [dict(zip(('fecha', 'accion', 'nombre', 'version', 'editor'), row)) for row in rows]
+
+    def save_snapshot(self, equipo, packages, when=None):
+        """
+        Guardar la instantánea del equipo escribiendo solo las diferencias.
+
+        Returns:
+            dict: {'hash', 'agregados': [...], 'eliminados': [...], 'sin_cambios': bool}
+        """
+        digest = snapshot_hash(packages)
+        if digest == self.last_hash(equipo):
+            return {'hash': digest, 'agregados': [], 'eliminados': [], 'sin_cambios': True}
+
+        when = (when or datetime.now()).isoformat(timespec="seconds")
+        current = {_package_key(p): p for p in packages}
+        stored = {_package_key(p): p for p in self.packages(equipo)}
+        added = [current[k] for k in current.keys() - stored.keys()]
+        removed = [stored[k] for k in stored.keys() - current.keys()]
+        # Misma clave pero otro editor/fecha: se reescribe sin registrarlo como cambio
+        modified = [current[k] for k in current.keys() & stored.keys() if current[k] != stored[k]]
+
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM software WHERE equipo = ? AND nombre = ? AND version = ?",
+                [(equipo,) + _package_key(p) for p in removed]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO software VALUES (?, ?, ?, ?, ?, ?)",
+                [(equipo, p['nombre'], p.get('version') or '', p.get('editor') or '',
+                  p.get('fecha_instalacion') or '', when) for p in added + modified]
+            )
+            # La primera instantánea del equipo no es un "cambio"
+            if stored:
+                self.conn.executemany(
+                    "INSERT INTO software_cambios VALUES (?, ?, ?, ?, ?, ?)",
+                    [(equipo, when, accion, p['nombre'], p.get('version') or '', p.get('editor') or '')
+                     for accion, group in (('agregado', added), ('eliminado', removed)) for p in group]
+                )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO software_snapshots VALUES (?, ?, ?, ?)",
+                (equipo, digest, len(packages), when)
+            )
+        return {'hash': digest, 'agregados': added, 'eliminados': removed, 'sin_cambios': False}
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,473 @@
+# -*- coding: utf-8 -*-
+"""
+BACKEND SQLITE - Sistema de Inventario Tecnológico
+===================================================
+Almacenamiento opcional del inventario en SQLite, con el Excel como
+formato de exportación.
+
+Cada hoja del Excel es una tabla (una fila de la tabla = una fila de la
+hoja, columnas c1..cN) con índices sobre código, serial y área. Guardar un
+registro es una transacción de una sola fila en lugar de reescribir todo
+el .xlsx; el Excel se regenera cuando se pide.
+
+SQLiteSession expone la misma interfaz que WorkbookSession (sheet,
+workbook[...], ws.cell(...), find_code_row, allocate, save, discard), de
+modo que la aplicación funciona igual con cualquiera de los dos.
+"""
+
+import importlib.util
+import os
+import sqlite3
+from datetime import date, datetime
+
+from column_schema import SCHEMAS
+from file_lock import FileLock, atomic_replace
+
+# openpyxl solo se importa al importar/exportar Excel
+HAS_OPENPYXL = importlib.util.find_spec("openpyxl") is not None
+
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+# Hoja → tabla
+TABLE_NAMES = {
+    "Equipos de Cómputo":     "equipos_computo",
+    "Impresoras y Escáneres": "impresoras",
+    "Periféricos":            "perifericos",
+    "Equipos de Red":         "equipos_red",
+    "Mantenimientos":         "mantenimientos",
+    "Equipos Dados de Baja":  "bajas",
+}
+
+# Campo que identifica el equipo en cada hoja (para el índice de código)
+_CODE_FIELDS = ('codigo', 'codigo_equipo', 'codigo_original')
+
+
+def _table_meta(sheet_name):
+    """Tabla, ancho y columnas indexadas de la hoja, según column_schema."""
+    schema = SCHEMAS[sheet_name]
+    codigo = next(schema.column(f) for f in _CODE_FIELDS if schema.column(f))
+    serial = schema.column('serial')
+    area = schema.column('area') or schema.column('area_servicio')
+    return {"table": TABLE_NAMES[sheet_name], "columns": schema.width,
+            "codigo": codigo, "serial": serial, "area": area}
+
+
+# Hoja → tabla y columnas indexadas (None = la hoja no tiene ese dato)
+SHEET_TABLES = {sheet_name: _table_meta(sheet_name) for sheet_name in TABLE_NAMES}
+
+
+def is_sqlite_path(path):
+    """True si la ruta corresponde a una base de datos SQLite."""
+    return str(path).lower().endswith(SQLITE_EXTENSIONS)
+
+
+def _to_sql_value(value):
+    """Convertir valores de celda a tipos nativos de SQLite."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class _SQLiteCell:
+    """Celda con la interfaz mínima de openpyxl (.value lectura/escritura)."""
+
+    def __init__(self, sheet, row, column):
+        self._sheet = sheet
+        self.row = row
+        self.column = column
+
+    @property
+    def value(self):
+        return self._sheet._get_value(self.row, self.column)
+
+    @value.setter
+    def value(self, value):
+        self._sheet._set_value(self.row, self.column, value)
+
+
+class SQLiteSheet:
+    """Hoja respaldada por una tabla; los cambios se acumulan hasta save()."""
+
+    def __init__(self, session, sheet_name):
+        self._session = session
+        self.title = sheet_name
+        self.meta = SHEET_TABLES[sheet_name]
+        self.table = self.meta["table"]
+        self._row_cache = {}  # {fila: {columna: valor}}
+        self._dirty = {}      # {fila: {columna: valor}}
+
+    def _load_row(self, row):
+        if row not in self._row_cache:
+            cursor = self._session.conn.execute(
+                f"SELECT * FROM {self.table} WHERE fila = ?", (row,)
+            )
+            record = cursor.fetchone()
+            values = {}
+            if record is not None:
+                for index, value in enumerate(record[1:], start=1):
+                    if value is not None:
+                        values[index] = value
+            self._row_cache[row] = values
+        return self._row_cache[row]
+
+    def _get_value(self, row, column):
+        dirty = self._dirty.get(row, {})
+        if column in dirty:
+            return dirty[column]
+        return self._load_row(row).get(column)
+
+    def _set_value(self, row, column, value):
+        self._dirty.setdefault(row, {})[column] = _to_sql_value(value)
+
+    def cell(self, row, column, value=None):
+        """Misma semántica que openpyxl: value=None no modifica la celda."""
+        cell = _SQLiteCell(self, row, column)
+        if value is not None:
+            cell.value = value
+        return cell
+
+    @property
+    def max_row(self):
+        cursor = self._session.conn.execute(f"SELECT MAX(fila) FROM {self.table}")
+        stored = cursor.fetchone()[0] or 1
+        return max([stored] + list(self._dirty.keys()) + list(self._row_cache.keys()))
+
+    def _take_dirty(self):
+        """
+        Tomar las filas modificadas para escribirlas.
+
+        Los valores pasan a la caché de filas, así las lecturas siguientes
+        los ven aunque la escritura aún no haya terminado.
+        """
+        batch = []
+        for row, changes in self._dirty.items():
+            self._load_row(row).update(changes)
+            batch.append((self.table, row, changes))
+        self._dirty = {}
+        return batch
+
+    @staticmethod
+    def _upsert(conn, table, row, changes):
+        """Escribir una fila modificada (una sentencia UPSERT)."""
+        columns = sorted(changes)
+        names = ", ".join(f"c{c}" for c in columns)
+        placeholders = ", ".join("?" for _ in columns)
+        updates = ", ".join(f"c{c} = excluded.c{c}" for c in columns)
+        conn.execute(
+            f"INSERT INTO {table} (fila, {names}) VALUES (?, {placeholders}) "
+            f"ON CONFLICT(fila) DO UPDATE SET {updates}",
+            [row] + [changes[c] for c in columns]
+        )
+
+    def _discard(self):
+        self._dirty = {}
+        self._row_cache = {}
+
+
+class SQLiteSession:
+    """
+    Sesión de inventario sobre SQLite con la interfaz de WorkbookSession.
+
+    Uso:
+        session = SQLiteSession("inventario_hospital_v1.db")
+        ws = session.sheet("Periféricos")
+        consecutivo, fila = session.allocate("Periféricos")
+        ws.cell(row=fila, column=1, value=consecutivo)
+        session.save()
+    """
+
+    def __init__(self, db_path):
+        self.excel_path = db_path  # Ruta activa (nombre compartido con WorkbookSession)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self._sheets = {}
+        self._allocators = {}
+        self.create_schema()
+
+    # ------------------------------------------------------------------
+    # Esquema
+    # ------------------------------------------------------------------
+
+    def create_schema(self):
+        """Crear tablas e índices (código, serial, área) si no existen."""
+        with self.conn:
+            for sheet_name, meta in SHEET_TABLES.items():
+                table = meta["table"]
+                columns = ", ".join(f"c{i}" for i in range(1, meta["columns"] + 1))
+                self.conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} (fila INTEGER PRIMARY KEY, {columns})"
+                )
+                for field in ("codigo", "serial", "area"):
+                    column = meta[field]
+                    if column:
+                        self.conn.execute(
+                            f"CREATE INDEX IF NOT EXISTS idx_{table}_{field} "
+                            f"ON {table} (c{column} COLLATE NOCASE)"
+                        )
+
+    def _ensure_columns(self, sheet_name, width):
+        """Ampliar la tabla si la hoja importada tiene más columnas que el esquema."""
+        table = SHEET_TABLES[sheet_name]["table"]
+        existing = len(self.conn.execute(f"PRAGMA table_info({table})").fetchall()) - 1
+        for i in range(existing + 1, width + 1):
+            self.conn.execute(f"ALTER TABLE {table} ADD COLUMN c{i}")
+
+    # ------------------------------------------------------------------
+    # Interfaz compatible con WorkbookSession
+    # ------------------------------------------------------------------
+
+    def is_stale(self):
+        return False
+
+    @property
+    def workbook(self):
+        return self
+
+    @property
+    def sheetnames(self):
+        return list(SHEET_TABLES.keys())
+
+    def __getitem__(self, sheet_name):
+        sheet = self.sheet(sheet_name)
+        if sheet is None:
+            raise KeyError(sheet_name)
+        return sheet
+
+    def sheet(self, sheet_name):
+        if sheet_name not in SHEET_TABLES:
+            return None
+        if sheet_name not in self._sheets:
+            self._sheets[sheet_name] = SQLiteSheet(self, sheet_name)
+        return self._sheets[sheet_name]
+
+    def read_row(self, sheet_name, row, width):
+        """Valores de las columnas 1..width de la fila, como tupla."""
+        sheet = self[sheet_name]
+        values = dict(sheet._load_row(row))
+        values.update(sheet._dirty.get(row, {}))
+        return tuple(values.get(column) for column in range(1, width + 1))
+
+    def write_row(self, sheet_name, row, cells):
+        """Escribir varias celdas de una fila en una llamada ({columna: valor})."""
+        dirty = self[sheet_name]._dirty.setdefault(row, {})
+        for column, value in cells.items():
+            dirty[column] = _to_sql_value(value)
+
+    def find_code_row(self, sheet_name, codigo):
+        """Búsqueda indexada del código en la tabla de la hoja."""
+        meta = SHEET_TABLES.get(sheet_name)
+        if meta is None:
+            return None
+        codigo = str(codigo).strip()
+        sheet = self.sheet(sheet_name)
+        for row, changes in sheet._dirty.items():
+            value = changes.get(meta["codigo"])
+            if value and str(value).strip().upper() == codigo.upper():
+                return row
+        cursor = self.conn.execute(
+            f"SELECT fila FROM {meta['table']} WHERE c{meta['codigo']} = ? COLLATE NOCASE "
+            f"AND fila > 1 ORDER BY fila LIMIT 1",
+            (codigo,)
+        )
+        record = cursor.fetchone()
+        return record[0] if record else None
+
+    def set_code_row(self, sheet_name, codigo, row):
+        """El índice de SQLite se mantiene solo; no hay nada que registrar."""
+
+    @property
+    def has_pending_changes(self):
+        """Cada save() ya es una transacción: nunca hay diario pendiente."""
+        return False
+
+    def compact(self):
+        """Sin diario que compactar (compatibilidad con WorkbookSession)."""
+        return False
+
+    def _allocator(self, sheet_name):
+        if sheet_name not in self._allocators:
+            meta = SHEET_TABLES[sheet_name]
+            cursor = self.conn.execute(
+                f"SELECT MAX(CAST(c1 AS INTEGER)), MAX(fila) FROM {meta['table']} "
+                f"WHERE fila > 1 AND c1 IS NOT NULL"
+            )
+            last_consecutive, last_row = cursor.fetchone()
+            self._allocators[sheet_name] = [last_consecutive or 0, (last_row or 1) + 1]
+        return self._allocators[sheet_name]
+
+    def next_consecutive(self, sheet_name):
+        return self._allocator(sheet_name)[0] + 1
+
+    def next_free_row(self, sheet_name):
+        return self._allocator(sheet_name)[1]
+
+    def allocate(self, sheet_name):
+        state = self._allocator(sheet_name)
+        consecutive, row = state[0] + 1, state[1]
+        state[0], state[1] = consecutive, row + 1
+        return consecutive, row
+
+    def prepare_save(self):
+        """
+        Tomar las filas modificadas y devolver la función que las confirma.
+
+        La función abre su propia conexión, de modo que puede ejecutarse en
+        el hilo escritor mientras la interfaz sigue leyendo con self.conn.
+        """
+        batch = []
+        for sheet in self._sheets.values():
+            batch.extend(sheet._take_dirty())
+
+        def write():
+            if not batch:
+                return
+            conn = sqlite3.connect(self.db_path, timeout=15)
+            try:
+                with conn:
+                    # Bloqueo de escritura desde el inicio: la revalidación y
+                    # el UPSERT no pueden intercalarse con otro técnico
+                    conn.execute("BEGIN IMMEDIATE")
+                    for table, row, changes in batch:
+                        if 1 in changes:
+                            self._check_row_free(conn, table, row, changes)
+                        SQLiteSheet._upsert(conn, table, row, changes)
+            finally:
+                conn.close()
+
+        return write
+
+    @staticmethod
+    def _check_row_free(conn, table, row, changes):
+        """Una fila nueva no puede pisar la que otro técnico guardó primero."""
+        record = conn.execute(f"SELECT c1, c2 FROM {table} WHERE fila = ?", (row,)).fetchone()
+        if record is None or record[0] is None:
+            return
+        if record[0] == changes.get(1) and record[1] == changes.get(2, record[1]):
+            return  # Es este mismo registro (reintento)
+        raise RuntimeError(
+            f"La fila {row} ya fue ocupada por otro técnico ({record[1]}). "
+            f"Se recargará el inventario; ingrese el registro de nuevo."
+        )
+
+    def take_conflicts(self):
+        """Las filas en conflicto se reportan como error al guardar."""
+        return []
+
+    def final_code(self, codigo):
+        """Los códigos no se reasignan al guardar (ver take_conflicts)."""
+        return codigo
+
+    def save(self):
+        """Confirmar las filas modificadas en una sola transacción."""
+        try:
+            self.prepare_save()()
+        except Exception:
+            self.discard()
+            raise
+
+    def discard(self):
+        for sheet in self._sheets.values():
+            sheet._discard()
+        self._allocators = {}
+
+    def close(self):
+        self.discard()
+        self.conn.close()
+
+    # ------------------------------------------------------------------
+    # Importación / exportación Excel
+    # ------------------------------------------------------------------
+
+    def import_from_excel(self, excel_path):
+        """Cargar todas las hojas conocidas de un Excel (reemplaza el contenido)."""
+        if not HAS_OPENPYXL:
+            raise RuntimeError("openpyxl no instalado")
+        from openpyxl import load_workbook
+
+        wb = load_workbook(excel_path, read_only=True)
+        try:
+            with self.conn:
+                for sheet_name, meta in SHEET_TABLES.items():
+                    if sheet_name not in wb.sheetnames:
+                        continue
+                    ws = wb[sheet_name]
+                    table = meta["table"]
+                    self.conn.execute(f"DELETE FROM {table}")
+                    width = meta["columns"]
+                    for row, values in enumerate(ws.iter_rows(values_only=True), start=1):
+                        if not any(v is not None for v in values):
+                            continue
+                        if len(values) > width:
+                            width = len(values)
+                            self._ensure_columns(sheet_name, width)
+                        names = ", ".join(f"c{i}" for i in range(1, len(values) + 1))
+                        placeholders = ", ".join("?" for _ in values)
+                        self.conn.execute(
+                            f"INSERT INTO {table} (fila, {names}) VALUES (?, {placeholders})",
+                            [row] + [_to_sql_value(v) for v in values]
+                        )
+        finally:
+            wb.close()
+        self._sheets = {}
+        self._allocators = {}
+
+    def export_to_excel(self, excel_path, template_path=None):
+        """
+        Regenerar el Excel desde la base de datos.
+
+        Si se indica una plantilla (el .xlsx original), se conservan sus
+        estilos y encabezados y solo se reemplazan las filas de datos.
+
+        Como los demás guardados del Excel compartido, escribe bajo su
+        bloqueo y reemplaza el archivo de forma atómica: una exportación
+        interrumpida no deja un inventario corrupto.
+        """
+        if not HAS_OPENPYXL:
+            raise RuntimeError("openpyxl no instalado")
+
+        # La plantilla suele ser el mismo Excel: leerla también bajo el bloqueo
+        with FileLock(excel_path):
+            self._export_locked(excel_path, template_path)
+
+    def _export_locked(self, excel_path, template_path):
+        import openpyxl
+
+        if template_path and os.path.exists(template_path):
+            wb = openpyxl.load_workbook(template_path)
+        else:
+            wb = openpyxl.Workbook()
+            wb.remove(wb.active)
+
+        for sheet_name, meta in SHEET_TABLES.items():
+            from_template = sheet_name in wb.sheetnames
+            if from_template:
+                ws = wb[sheet_name]
+                if ws.max_row > 1:
+                    ws.delete_rows(2, ws.max_row - 1)
+            else:
+                ws = wb.create_sheet(sheet_name)
+
+            cursor = self.conn.execute(f"SELECT * FROM {meta['table']} ORDER BY fila")
+            for record in cursor:
+                row = record[0]
+                if row == 1 and from_template:
+                    continue  # Encabezado de la plantilla
+                for column, value in enumerate(record[1:], start=1):
+                    if value is not None:
+                        ws.cell(row=row, column=column, value=value)
+
+        try:
+            atomic_replace(excel_path, wb.save)
+        finally:
+            wb.close()
+
+
+def migrate_excel_to_sqlite(excel_path, db_path):
+    """Crear (o reemplazar) la base SQLite a partir del Excel actual."""
+    session = SQLiteSession(db_path)
+    try:
+        session.import_from_excel(excel_path)
+    finally:
+        session.close()
+    return db_path
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+TIEMPOS DE ARRANQUE - Sistema de Inventario Tecnológico
+========================================================
+Marcas de tiempo desde que se importa este módulo (primera línea de
+inventory_manager.py) hasta que el inventario queda cargado, para ver
+en qué se va el arranque: importaciones, ventana, logo, lectura del Excel.
+
+Uso:
+    mark("Importaciones tkinter/customtkinter")
+    ...
+    print(format_startup_report())
+
+    python inventory_manager.py --tiempos   # Tabla completa en la consola
+"""
+
+import os
+import sys
+import time
+
+
+_START = time.perf_counter()
+_marks = []
+
+
+def mark(label):
+    """Registrar que la etapa terminó ahora."""
+    _marks.append((label, time.perf_counter()))
+
+
+def elapsed_ms():
+    """Milisegundos desde el inicio del arranque."""
+    return (time.perf_counter() - _START) * 1000
+
+
+def detailed_report_requested():
+    """--tiempos en la línea de comandos o INVENTARIO_TIEMPOS=1."""
+    return "--tiempos" in sys.argv or os.environ.get("INVENTARIO_TIEMPOS") == "1"
+
+
+def format_startup_report():
+    """Tabla: etapa, milisegundos de la etapa y acumulado."""
+    lines = [f"{'Etapa de arranque':<36} {'ms':>8} {'Acumulado':>10}"]
+    previous = _START
+    for label, moment in _marks:
+        lines.append(f"{label:<36} {(moment - previous) * 1000:>8.0f} {(moment - _START) * 1000:>10.0f}")
+        previous = moment
+    return "\n".join(lines)
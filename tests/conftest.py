@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""Las pruebas importan los módulos de la raíz del repositorio (sin instalar paquete)."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de agent_ingest cuando otro técnico guarda el Excel durante la carga.
+
+El equipo nuevo de un reporte se reubica al guardar; el software debe
+quedar bajo el código definitivo y no bajo el que tenía antes de guardar.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import agent_ingest
+from benchmark_inventory import build_workbook
+from inventory_repository import InventoryRepository
+from software_inventory import SoftwareStore, store_path_for
+
+
+SOFTWARE = [{"nombre": "Google Chrome", "version": "120.0", "editor": "Google LLC",
+             "fecha_instalacion": "2024-12-01"}]
+
+
+class IngestConflictTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.excel = os.path.join(self.folder, "inventario.xlsx")
+        build_workbook(self.excel, 3)  # EQC-0001 .. EQC-0003
+        self.agents = os.path.join(self.folder, "agentes")
+        os.makedirs(self.agents)
+        report = {
+            "hostname": "PC-NUEVO-01",
+            "collected_at": "2025-01-15T08:00:00",
+            "fields": {"nombre_equipo": "PC-NUEVO-01", "serial": "SER-NUEVO-01", "marca": "Lenovo"},
+            "software": SOFTWARE,
+        }
+        with open(os.path.join(self.agents, "PC-NUEVO-01.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def other_technician_adds(self):
+        repo = InventoryRepository.open(self.excel)
+        try:
+            repo.add(agent_ingest.EQUIPOS_SHEET, {'nombre_equipo': "PC-OTRO-01", 'serial': "SER-OTRO-01"})
+            repo.save()
+        finally:
+            repo.close()
+
+    def test_software_is_stored_under_the_saved_code(self):
+        real_ingest = agent_ingest.ingest_reports
+
+        def ingest_then_other_saves(repo, reports):
+            applied = real_ingest(repo, reports)
+            self.assertEqual(applied[0][2], "EQC-0004")
+            self.other_technician_adds()  # Toma EQC-0004 antes de nuestro guardado
+            return applied
+
+        with mock.patch.object(agent_ingest, "ingest_reports", ingest_then_other_saves), \
+                mock.patch("builtins.print"):
+            self.assertEqual(agent_ingest.main([self.agents, "--excel", self.excel]), 0)
+
+        repo = InventoryRepository.open(self.excel)
+        try:
+            self.assertEqual(repo.get("EQC-0004")['serial'], "SER-OTRO-01")
+            self.assertEqual(repo.get("EQC-0005")['serial'], "SER-NUEVO-01")
+        finally:
+            repo.close()
+
+        with SoftwareStore(store_path_for(self.excel)) as store:
+            self.assertEqual(store.packages("EQC-0004"), [])
+            self.assertEqual([p['nombre'] for p in store.packages("EQC-0005")], ["Google Chrome"])
+
+        self.assertTrue(os.path.exists(os.path.join(self.agents, "procesados", "PC-NUEVO-01.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
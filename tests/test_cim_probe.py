@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la sonda CIM con salidas grabadas (tests/fixtures/cim_*.json).
+
+Corren en cualquier equipo: solo se interpreta el JSON, no se ejecuta PowerShell.
+"""
+
+import json
+import os
+import unittest
+
+from cim_probe import CIM_PROBE, CIM_REPLACES, parse_cim_output
+from detection import SIN_SERIAL
+from probe_registry import registered_probes, take_strategy
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+class ParseCimOutputTest(unittest.TestCase):
+
+    def setUp(self):
+        take_strategy()  # Empezar sin estrategia anotada en este hilo
+
+    def test_normal_output(self):
+        fields = parse_cim_output(read_fixture("cim_normal.json"))
+
+        self.assertEqual(fields['marca'], "HP")
+        self.assertEqual(fields['modelo'], "HP ProDesk 400 G6 SFF")
+        self.assertEqual(fields['sistema_operativo'], "Windows 10 Pro")
+        self.assertEqual(fields['arquitectura_so'], "64 bits")
+        self.assertEqual(fields['procesador'], "Intel(R) Core(TM) i3-9100 CPU @ 3.60GHz")
+        self.assertEqual(fields['serial'], "MXL1234ABC")
+        self.assertEqual(take_strategy(), "CIM/BIOS")
+
+        self.assertEqual(fields['disco1_capacidad'], "238")
+        self.assertEqual(fields['disco1_serial'], "S4EWNX0N123456")
+        self.assertEqual(fields['disco1_modelo'], "Samsung SSD 860 EVO 250GB")
+        self.assertEqual(fields['disco2_capacidad'], "932")
+        self.assertEqual(fields['disco2_modelo'], "WDC WD10EZEX-08WN4A0")
+
+        self.assertEqual(fields['licencia_windows'], "OEM")
+        self.assertEqual(fields['key_windows'], "3V66T")
+        self.assertEqual(fields['estado_licencia_windows'], "Activado")
+        self.assertEqual(fields['unidades_red_mapeadas'], "H:, Z:")
+        self.assertEqual(fields['ultima_act_windows'], "2025-01-14")
+
+    def test_single_objects_and_missing_classes(self):
+        # ConvertTo-Json deja objetos sueltos; Product nulo, License y Drives vacíos
+        fields = parse_cim_output(read_fixture("cim_clases_faltantes.json"))
+
+        self.assertEqual(fields['serial'], "MB-M80-C6012345678")  # BIOS genérica → placa base
+        self.assertEqual(take_strategy(), "CIM/BaseBoard")
+        self.assertEqual(fields['disco1_capacidad'], "466")
+        self.assertEqual(fields['disco1_serial'], "No detectado")
+        self.assertEqual(fields['disco2_modelo'], "No tiene")
+        self.assertEqual(fields['licencia_windows'], "No detectado")
+        self.assertEqual(fields['key_windows'], "No detectado")
+        self.assertEqual(fields['unidades_red_mapeadas'], "Ninguna")
+        self.assertEqual(fields['ultima_act_windows'], "2024-11-20")  # Sin registro: último parche
+
+    def test_empty_output_object(self):
+        fields = parse_cim_output("\ufeff{}")  # Con BOM, como lo escribe PowerShell
+
+        self.assertEqual(fields['marca'], "No detectado")
+        self.assertEqual(fields['sistema_operativo'], "No detectado")
+        self.assertEqual(fields['serial'], SIN_SERIAL)
+        self.assertEqual(take_strategy(), "CIM/Sin serial")
+        self.assertEqual(fields['disco1_capacidad'], "No detectado")
+        self.assertEqual(fields['ultima_act_windows'], "No detectado")
+
+    def test_malformed_output_raises(self):
+        # El ejecutor de sondas convierte la excepción en estado "error"
+        with self.assertRaises(json.JSONDecodeError):
+            parse_cim_output(read_fixture("cim_malformado.json"))
+
+    def test_selected_as_alternative_replaces_probes(self):
+        default_names = {probe.name for probe in registered_probes()}
+        cim_names = {probe.name for probe in registered_probes((CIM_PROBE,))}
+
+        self.assertNotIn(CIM_PROBE, default_names)
+        self.assertIn(CIM_PROBE, cim_names)
+        for replaced in CIM_REPLACES:
+            self.assertNotIn(replaced, cim_names)
+
+
+if __name__ == "__main__":
+    unittest.main()
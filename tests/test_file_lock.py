@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas del bloqueo del Excel compartido (file_lock.py).
+
+Usan tiempos cortos (stale_after/refresh_every) para no esperar minutos.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from file_lock import FileLock, FileLockTimeout
+
+
+class FileLockTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.target = os.path.join(self.folder, "inventario.xlsx")
+        self.lock_path = self.target + ".lock"
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def write_lock(self, **holder):
+        info = {"host": "OTRO-EQUIPO", "user": "tecnico", "pid": 4242, "token": "ajeno"}
+        info.update(holder)
+        with open(self.lock_path, "w", encoding="utf-8") as f:
+            json.dump(info, f)
+        return info
+
+    def read_lock(self):
+        with open(self.lock_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_refreshes_while_held_and_removes_own_lock(self):
+        lock = FileLock(self.target, refresh_every=0.1)
+        with lock:
+            first = self.read_lock()["refreshed"]
+            time.sleep(0.35)
+            self.assertGreater(self.read_lock()["refreshed"], first)
+        self.assertFalse(os.path.exists(self.lock_path))
+
+    def test_fresh_lock_times_out(self):
+        self.write_lock(since=time.time(), refreshed=time.time())
+        with self.assertRaises(FileLockTimeout):
+            FileLock(self.target, timeout=0.3, refresh_every=0.1).acquire()
+        self.assertEqual(self.read_lock()["token"], "ajeno")
+
+    def test_old_lock_is_taken_after_confirming_it_does_not_change(self):
+        old = time.time() - 3600
+        self.write_lock(since=old, refreshed=old)
+        lock = FileLock(self.target, timeout=0.2, stale_after=60, refresh_every=0.1)
+        lock.acquire()
+        try:
+            self.assertEqual(self.read_lock()["token"], lock._info["token"])
+        finally:
+            lock.release()
+
+    def test_old_timestamp_that_keeps_refreshing_is_not_stale(self):
+        # Reloj del otro equipo atrasado: la hora escrita parece vieja pero sigue cambiando
+        lock = FileLock(self.target, stale_after=60, refresh_every=0.1)
+        for i in range(5):
+            holder = self.write_lock(since=1000.0, refreshed=1000.0 + i)
+            self.assertFalse(lock._is_stale(holder))
+            time.sleep(0.06)
+
+    def test_take_over_restores_a_lock_that_changed_holder(self):
+        stale = {"token": "abandonado", "refreshed": 1000.0}
+        self.write_lock(token="nuevo", refreshed=time.time())
+
+        self.assertFalse(FileLock(self.target)._take_over(stale))
+        self.assertEqual(self.read_lock()["token"], "nuevo")
+        self.assertEqual(os.listdir(self.folder), ["inventario.xlsx.lock"])
+
+    def test_release_keeps_lock_created_by_someone_else(self):
+        lock = FileLock(self.target, refresh_every=0.1)
+        lock.acquire()
+        os.remove(self.lock_path)
+        self.write_lock(since=time.time(), refreshed=time.time())
+
+        lock.release()
+        self.assertEqual(self.read_lock()["token"], "ajeno")
+
+
+if __name__ == "__main__":
+    unittest.main()
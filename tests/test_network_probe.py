@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la sonda de red (probe_network) sin tocar la red real.
+
+La IP sale de los adaptadores que ya leyó psutil (el físico activo
+primero) y solo sin adaptadores de socket.getaddrinfo(gethostname());
+nunca se abre un socket hacia afuera.
+"""
+
+import socket
+import unittest
+from unittest import mock
+
+import detection
+from probe_registry import take_strategy
+
+
+def adapter(nombre, ip, activo=True, virtual=False, tipo="Cableado", velocidad=1000):
+    return {'nombre': nombre, 'ip': ip, 'mac': "AA:BB:CC:DD:EE:01", 'velocidad_mbps': velocidad,
+            'tipo': tipo, 'activo': activo, 'virtual': virtual}
+
+
+def addrinfo(*ips):
+    return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (ip, 0)) for ip in ips]
+
+
+class ProbeNetworkTest(unittest.TestCase):
+
+    def setUp(self):
+        take_strategy()
+        # Cualquier socket abierto o resolución de nombre durante la prueba es un error
+        for target in ("socket.socket", "socket.getaddrinfo"):
+            patcher = mock.patch(target, side_effect=AssertionError(f"{target} no esperado"))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def probe(self, adapters):
+        with mock.patch.object(detection, "read_adapters", return_value=adapters), \
+                mock.patch.object(detection, "detect_mac_address", return_value="No detectado"):
+            return detection.probe_network()
+
+    def test_prefers_active_physical_wired_adapter(self):
+        fields = self.probe([
+            adapter("Wi-Fi", "10.1.9.40", tipo="WiFi", velocidad=300),
+            adapter("vEthernet (WSL)", "172.20.0.1", virtual=True),
+            adapter("Ethernet", "10.1.2.30"),
+        ])
+
+        self.assertEqual(fields['direccion_ip'], "10.1.2.30")
+        self.assertEqual(fields['tipo_conexion'], "Ambos")
+        self.assertNotIn("vEthernet", fields['interfaces_red'])
+        self.assertEqual(take_strategy(), "Interfaces (psutil)")
+
+    def test_without_physical_adapter_uses_collected_adapters(self):
+        fields = self.probe([
+            adapter("Ethernet", "10.1.2.30", activo=False),
+            adapter("tun0", "10.8.0.6", virtual=True),
+        ])
+
+        self.assertEqual(fields['direccion_ip'], "10.8.0.6")  # Activo antes que desconectado
+        self.assertEqual(fields['tipo_conexion'], "No detectado")
+        self.assertEqual(take_strategy(), "Adaptadores (psutil)")
+
+    def test_hostname_lookup_only_without_adapters(self):
+        with mock.patch("socket.gethostname", return_value="PC-URG-01"), \
+                mock.patch("socket.getaddrinfo",
+                           return_value=addrinfo("127.0.1.1", "169.254.3.4", "10.1.2.30")) as getaddrinfo:
+            fields = self.probe([])
+
+        getaddrinfo.assert_called_once_with("PC-URG-01", None, socket.AF_INET)
+        self.assertEqual(fields['direccion_ip'], "10.1.2.30")  # Sin loopback ni APIPA
+        self.assertEqual(take_strategy(), "Hostname")
+
+    def test_hostname_lookup_failure(self):
+        with mock.patch("socket.getaddrinfo", side_effect=socket.gaierror("sin DNS")):
+            self.assertEqual(detection.detect_ip_local([]), "No detectado")
+
+    def test_only_loopback_is_returned_as_last_resort(self):
+        with mock.patch("socket.getaddrinfo", return_value=addrinfo("127.0.1.1")):
+            self.assertEqual(detection.detect_ip_local([]), "127.0.1.1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de SQLiteSession.export_to_excel: escritura atómica bajo el bloqueo del Excel.
+"""
+
+import functools
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmark_inventory import build_workbook
+from file_lock import FileLock, FileLockTimeout
+from inventory_repository import InventoryRepository
+from sqlite_backend import SQLiteSession, migrate_excel_to_sqlite
+
+
+class ExportToExcelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.excel = os.path.join(self.folder, "inventario.xlsx")
+        build_workbook(self.excel, 5)
+        self.db = migrate_excel_to_sqlite(self.excel, os.path.join(self.folder, "inventario.db"))
+        self.session = SQLiteSession(self.db)
+
+    def tearDown(self):
+        self.session.close()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_export_round_trip_leaves_no_lock_or_temp(self):
+        self.session.export_to_excel(self.excel, template_path=self.excel)
+
+        self.assertEqual(sorted(os.listdir(self.folder)), ["inventario.db", "inventario.xlsx"])
+        repo = InventoryRepository.open(self.excel)
+        try:
+            self.assertIsNotNone(repo.get("EQC-0005"))
+        finally:
+            repo.close()
+
+    def test_interrupted_export_keeps_previous_excel(self):
+        with open(self.excel, "rb") as f:
+            before = f.read()
+
+        with mock.patch("openpyxl.Workbook.save", side_effect=OSError("red caída")):
+            with self.assertRaises(OSError):
+                self.session.export_to_excel(self.excel, template_path=self.excel)
+
+        with open(self.excel, "rb") as f:
+            self.assertEqual(f.read(), before)
+        self.assertEqual(sorted(os.listdir(self.folder)), ["inventario.db", "inventario.xlsx"])
+
+    def test_waits_for_the_excel_lock(self):
+        # Otro técnico guardando: la exportación espera el bloqueo (aquí, poco tiempo)
+        with FileLock(self.excel), \
+                mock.patch("sqlite_backend.FileLock", functools.partial(FileLock, timeout=0.3)):
+            with self.assertRaises(FileLockTimeout):
+                self.session.export_to_excel(self.excel, template_path=self.excel)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de detect_hardware_wmi con el proveedor WMI falso (sin Windows).
+
+Verifican las consultas proyectadas (SELECT solo con las propiedades
+necesarias) y el orden de respaldo del serial (BIOS → placa base →
+ComputerSystemProduct) anotado con note_strategy.
+"""
+
+import unittest
+
+from detection import DISK_PROPERTIES, SIN_SERIAL, detect_hardware_wmi
+from probe_registry import take_strategy
+from wmi_session import reset_wmi_session, use_fake_wmi
+
+
+SYSTEM = [{"Manufacturer": "Dell Inc.", "Model": "OptiPlex 3070", "Name": "PC-URG-01"}]
+DISKS = [
+    {"Size": "256052966400", "MediaType": "Fixed hard disk media", "SerialNumber": " S4EWNX0N123456 ",
+     "Manufacturer": "(Standard disk drives)", "Model": "Samsung SSD 860 EVO 250GB", "Index": 0},
+    {"Size": "1000202273280", "MediaType": "Fixed hard disk media", "SerialNumber": "WD-WCC6Y0ABCDEF",
+     "Manufacturer": "(Standard disk drives)", "Model": "WDC WD10EZEX-08WN4A0", "Index": 1},
+]
+
+EXPECTED_QUERIES = [
+    "SELECT Manufacturer, Model FROM Win32_ComputerSystem",
+    "SELECT SerialNumber FROM Win32_BIOS",
+    "SELECT SerialNumber FROM Win32_BaseBoard",
+    "SELECT IdentifyingNumber FROM Win32_ComputerSystemProduct",
+    f"SELECT {', '.join(DISK_PROPERTIES)} FROM Win32_DiskDrive",
+]
+
+
+class DetectHardwareWmiTest(unittest.TestCase):
+
+    def setUp(self):
+        take_strategy()
+
+    def tearDown(self):
+        reset_wmi_session()
+
+    def detect(self, bios, board, product):
+        connection = use_fake_wmi({
+            "Win32_ComputerSystem": SYSTEM,
+            "Win32_BIOS": [{"SerialNumber": bios, "Version": "1.2.0"}],
+            "Win32_BaseBoard": [{"SerialNumber": board, "Product": "0KP0FT"}],
+            "Win32_ComputerSystemProduct": [{"IdentifyingNumber": product, "UUID": "4C4C4544-0000"}],
+            "Win32_DiskDrive": DISKS,
+        })
+        return detect_hardware_wmi(), connection.queries, take_strategy()
+
+    def test_bios_serial_and_projected_queries(self):
+        info, queries, strategy = self.detect("7XK2Q33", "/7XK2Q33/CNWS2000A1/", "7XK2Q33")
+
+        self.assertEqual(info['marca'], "Dell Inc.")
+        self.assertEqual(info['modelo'], "OptiPlex 3070")
+        self.assertEqual(info['serial'], "7XK2Q33")
+        self.assertEqual(strategy, "BIOS")
+        # Con serial en la BIOS no se consultan las clases de respaldo
+        self.assertEqual(queries, [EXPECTED_QUERIES[0], EXPECTED_QUERIES[1], EXPECTED_QUERIES[4]])
+
+        self.assertEqual(info['disco1_capacidad'], "238")
+        self.assertEqual(info['disco1_serial'], "S4EWNX0N123456")
+        self.assertEqual(info['disco2_modelo'], "WDC WD10EZEX-08WN4A0")
+
+    def test_generic_bios_falls_back_to_baseboard(self):
+        info, queries, strategy = self.detect("Default string", "M80-C6012345678", "")
+
+        self.assertEqual(info['serial'], "MB-M80-C6012345678")
+        self.assertEqual(strategy, "BaseBoard")
+        self.assertEqual(queries, [EXPECTED_QUERIES[0], EXPECTED_QUERIES[1],
+                                   EXPECTED_QUERIES[2], EXPECTED_QUERIES[4]])
+
+    def test_falls_back_to_computer_system_product(self):
+        info, queries, strategy = self.detect("To Be Filled By O.E.M.", "Base Board Serial Number", "CZC9876XYZ")
+
+        self.assertEqual(info['serial'], "CZC9876XYZ")
+        self.assertEqual(strategy, "ComputerSystemProduct")
+        self.assertEqual(queries, EXPECTED_QUERIES)
+
+    def test_no_valid_serial(self):
+        info, queries, strategy = self.detect("System Serial Number", "", None)
+
+        self.assertEqual(info['serial'], SIN_SERIAL)
+        self.assertEqual(strategy, "Sin serial")
+        self.assertEqual(queries, EXPECTED_QUERIES)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la lectura anticipada del inventario (workbook_prefetch.py).
+
+Usan un libro temporal generado por benchmark_inventory; no abren ventanas.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmark_inventory import build_workbook
+from workbook_prefetch import WorkbookPrefetch
+
+
+class WorkbookPrefetchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "inventario.xlsx")
+        build_workbook(self.path, 50)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_take_returns_repository_once(self):
+        prefetch = WorkbookPrefetch(self.path)
+        repo = prefetch.take()
+        try:
+            self.assertIsNotNone(repo)
+            self.assertTrue(prefetch.done)
+            self.assertIsNone(prefetch.take())
+        finally:
+            repo.close()
+
+    def test_discard_after_done_closes_repository(self):
+        prefetch = WorkbookPrefetch(self.path)
+        prefetch.wait()
+        repo = prefetch._repo
+
+        prefetch.discard()
+
+        self.assertIsNone(prefetch._repo)
+        self.assertIsNone(repo.session._wb)
+
+    def test_discard_while_reading_closes_when_done(self):
+        prefetch = WorkbookPrefetch(self.path)
+        prefetch.discard()
+        prefetch._thread.join(10)
+
+        self.assertTrue(prefetch.done)
+        self.assertIsNone(prefetch._repo)
+
+
+if __name__ == "__main__":
+    unittest.main()
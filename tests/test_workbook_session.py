@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas del guardado de WorkbookSession.
+
+- Mientras el libro se serializa (se intercepta la escritura de filas de
+  openpyxl), la interfaz puede leer y editar sin alterar lo que se escribe.
+- Si otro técnico guardó antes, final_code() da el código con el que quedó
+  cada registro propio.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.worksheet._writer import WorksheetWriter
+
+from workbook_session import WorkbookSession
+
+
+SHEET = "Equipos de Cómputo"
+
+
+class WriteWorkbookTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "inventario.xlsx")
+        wb = Workbook()
+        ws = wb.active
+        ws.title = SHEET
+        ws.append(["N°", "Código", "Nombre"])
+        ws.append([1, "EQC-0001", "PC-URG-01"])
+        wb.save(self.path)
+        self.session = WorkbookSession(self.path)
+        self.session.sheetnames  # Libro cargado, como en la aplicación
+
+    def tearDown(self):
+        self.session.close()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def disk_value(self, row, column):
+        wb = load_workbook(self.path)
+        try:
+            return wb[SHEET].cell(row=row, column=column).value
+        finally:
+            wb.close()
+
+    def save_while(self, during_save):
+        real_write_rows = WorksheetWriter.write_rows
+
+        def write_rows(writer):
+            during_save()
+            return real_write_rows(writer)
+
+        with mock.patch.object(WorksheetWriter, "write_rows", write_rows):
+            self.session.save()
+
+    def test_edits_during_save_do_not_reach_the_snapshot(self):
+        ws = self.session.sheet(SHEET)
+        ws.cell(row=2, column=3, value="PC-URG-02")
+
+        def during_save():
+            # Otro hilo (la interfaz) no debe esperar al guardado para leer o editar
+            def ui():
+                ws.cell(row=2, column=3, value="PC-URG-03")
+                ws.cell(row=3, column=2, value="EQC-0002")
+                self.session.read_row(SHEET, 40, 3)  # Crea celdas nuevas en la hoja viva
+            thread = threading.Thread(target=ui)
+            thread.start()
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+
+        self.save_while(during_save)
+
+        self.assertEqual(self.disk_value(2, 3), "PC-URG-02")
+        self.assertIsNone(self.disk_value(3, 2))
+        self.assertEqual(ws.cell(row=2, column=3).value, "PC-URG-03")
+
+        # Las ediciones hechas durante el guardado quedan pendientes y salen en el siguiente
+        self.session.save()
+        self.assertEqual(self.disk_value(2, 3), "PC-URG-03")
+        self.assertEqual(self.disk_value(3, 2), "EQC-0002")
+
+    def test_write_row_during_save_keeps_row_whole(self):
+        def during_save():
+            # Sin instantánea, la fila saldría a medio actualizar en el archivo
+            self.session.write_row(SHEET, 2, {2: "EQC-0009", 3: "PC-LAB-09"})
+
+        self.save_while(during_save)
+
+        self.assertEqual(self.disk_value(2, 2), "EQC-0001")
+        self.assertEqual(self.disk_value(2, 3), "PC-URG-01")
+        self.assertEqual(self.session.read_row(SHEET, 2, 3), (1, "EQC-0009", "PC-LAB-09"))
+
+
+class FinalCodeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "inventario.xlsx")
+        wb = Workbook()
+        ws = wb.active
+        ws.title = SHEET
+        ws.append(["N°", "Código", "Nombre"])
+        ws.append([1, "EQC-0001", "PC-URG-01"])
+        wb.save(self.path)
+        self.mine = WorkbookSession(self.path)
+        self.other = WorkbookSession(self.path)
+        self.mine.sheetnames
+        self.other.sheetnames
+
+    def tearDown(self):
+        self.mine.close()
+        self.other.close()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def add(self, session, name):
+        consecutive, row = session.allocate(SHEET)
+        codigo = f"EQC-{consecutive:04d}"
+        session.write_row(SHEET, row, {1: consecutive, 2: codigo, 3: name})
+        return codigo
+
+    def test_new_row_taken_by_other_technician_gets_next_code(self):
+        codigo = self.add(self.mine, "PC-MIO")
+        self.add(self.other, "PC-OTRO")
+        self.other.save()
+
+        self.mine.save()
+
+        self.assertEqual(codigo, "EQC-0002")
+        self.assertEqual(self.mine.final_code(codigo), "EQC-0003")
+        self.assertEqual(self.mine.final_code("EQC-0001"), "EQC-0001")
+        self.assertEqual(len(self.mine.take_conflicts()), 1)
+
+    def test_edit_of_removed_code_is_dropped(self):
+        self.mine.write_row(SHEET, 2, {3: "PC-URG-01B"})
+        self.other.write_row(SHEET, 2, {2: "EQC-0099"})
+        self.other.save()
+
+        self.mine.save()
+
+        self.assertIsNone(self.mine.final_code("EQC-0001"))
+
+
+if __name__ == "__main__":
+    unittest.main()
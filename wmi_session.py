@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+SESIÓN WMI - Sistema de Inventario Tecnológico
+===============================================
+Una sola conexión WMI reutilizada por todas las sondas, con consultas
+WQL que piden solo las propiedades necesarias.
+
+Los objetos COM no pueden usarse desde otro hilo que el que los creó,
+así que la conexión vive en un hilo propio (CoInitialize y wmi.WMI() una
+sola vez) y las sondas, que corren en hilos distintos, le envían sus
+consultas. Los resultados vuelven como diccionarios simples.
+
+Para probar en Linux, use_fake_wmi() reemplaza la conexión por
+FakeWMIConnection con datos grabados:
+
+    use_fake_wmi({"Win32_BIOS": [{"SerialNumber": "5CG1234"}]})
+    get_wmi_session().select("Win32_BIOS", ["SerialNumber"])
+    # [{'SerialNumber': '5CG1234'}]
+"""
+
+import queue
+import re
+import threading
+from types import SimpleNamespace
+
+from probe_registry import register_requirement
+
+try:
+    import wmi
+    HAS_WMI = True
+except ImportError:
+    HAS_WMI = False
+
+
+WMI_QUERY_TIMEOUT = 30  # Segundos esperando una consulta
+
+
+def _default_connect():
+    """Inicializar COM en el hilo de la sesión y abrir la conexión."""
+    try:
+        import pythoncom
+        pythoncom.CoInitialize()
+    except ImportError:
+        pass
+    return wmi.WMI()
+
+
+class WMISession:
+    """
+    Conexión WMI compartida, atendida por un hilo dedicado.
+
+    Uso:
+        session = get_wmi_session()
+        for disk in session.select("Win32_DiskDrive", ["Model", "Size"]):
+            print(disk["Model"], disk["Size"])
+    """
+
+    def __init__(self, connect=None):
+        self._connect = connect or _default_connect
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def _ensure_thread(self):
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="wmi-session", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        connection = None
+        while True:
+            func, done, holder = self._queue.get()
+            try:
+                if connection is None:
+                    connection = self._connect()
+                holder['result'] = func(connection)
+            except Exception as e:
+                holder['error'] = e
+            done.set()
+
+    def call(self, func, timeout=WMI_QUERY_TIMEOUT):
+        """Ejecutar func(conexión) en el hilo de la sesión y devolver su resultado."""
+        self._ensure_thread()
+        done = threading.Event()
+        holder = {}
+        self._queue.put((func, done, holder))
+        if not done.wait(timeout):
+            raise TimeoutError(f"WMI no respondió en {timeout} s")
+        if 'error' in holder:
+            raise holder['error']
+        return holder['result']
+
+    def select(self, wmi_class, properties):
+        """
+        SELECT <properties> FROM <wmi_class>.
+
+        Returns:
+            list: un dict {propiedad: valor} por instancia
+        """
+        wql = f"SELECT {', '.join(properties)} FROM {wmi_class}"
+
+        def run(connection):
+            # Leer las propiedades aquí: los objetos COM no salen de este hilo
+            return [{p: getattr(obj, p, None) for p in properties} for obj in connection.query(wql)]
+
+        return self.call(run)
+
+
+# ============================================================================
+# PROVEEDOR FALSO (PRUEBAS SIN WINDOWS)
+# ============================================================================
+
+_SELECT_RE = re.compile(r"^\s*SELECT\s+(.+?)\s+FROM\s+(\w+)\s*$", re.IGNORECASE)
+
+
+class FakeWMIConnection:
+    """Conexión con datos grabados: {clase: [ {propiedad: valor}, ... ]}."""
+
+    def __init__(self, data):
+        self.data = data
+        self.queries = []  # WQL recibidas, para verificar la proyección
+
+    def query(self, wql):
+        self.queries.append(wql)
+        match = _SELECT_RE.match(wql)
+        if not match:
+            raise ValueError(f"WQL no soportada por FakeWMIConnection: {wql}")
+        properties = [p.strip() for p in match.group(1).split(",")]
+        rows = self.data.get(match.group(2), [])
+        if properties == ["*"]:
+            return [SimpleNamespace(**row) for row in rows]
+        return [SimpleNamespace(**{p: row.get(p) for p in properties}) for row in rows]
+
+
+# ============================================================================
+# SESIÓN COMPARTIDA
+# ============================================================================
+
+_session = None
+_fake = False
+_session_lock = threading.Lock()
+
+
+def wmi_available():
+    """True si hay WMI real o un proveedor falso configurado."""
+    return HAS_WMI or _fake
+
+
+register_requirement('wmi', wmi_available)
+
+
+def get_wmi_session():
+    """Sesión WMI del proceso (se crea al primer uso)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = WMISession()
+        return _session
+
+
+def use_fake_wmi(data):
+    """Reemplazar la sesión por una con FakeWMIConnection; devuelve la conexión falsa."""
+    global _session, _fake
+    connection = FakeWMIConnection(data)
+    with _session_lock:
+        _session = WMISession(connect=lambda: connection)
+        _fake = True
+    return connection
+
+
+def reset_wmi_session():
+    """Volver a la conexión real (la próxima sesión se crea al primer uso)."""
+    global _session, _fake
+    with _session_lock:
+        _session = None
+        _fake = False
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+LECTURA ANTICIPADA DEL INVENTARIO - Sistema de Inventario Tecnológico
+======================================================================
+Abre y lee el Excel en un hilo propio mientras se construye la ventana,
+de modo que el arranque tarda lo que la más lenta de las dos tareas y no
+su suma.
+
+El hilo lee el libro y prepara el asignador de las hojas indicadas (el
+siguiente consecutivo/código que muestra el formulario). La ventana no
+espera: consulta done en un temporizador root.after y, al terminar, toma
+el repositorio con take(). No toca widgets. Si al final no se usa (el
+usuario abrió otro archivo), discard() cierra el repositorio.
+
+Uso:
+    prefetch = WorkbookPrefetch("inventario_hospital_v1.xlsx")  # antes de crear la ventana
+    ...
+    if prefetch.done:
+        repo = prefetch.take()
+"""
+
+import threading
+import time
+
+from inventory_repository import InventoryRepository
+
+
+class WorkbookPrefetch:
+    """Repositorio del inventario abierto y leído en segundo plano."""
+
+    def __init__(self, path, sheet_names=("Equipos de Cómputo",), journal=False):
+        self.path = path
+        self.sheet_names = tuple(sheet_names)
+        self.journal = journal
+        self.elapsed = None  # Segundos que tomó la lectura
+        self._repo = None
+        self._error = None
+        self._discarded = False
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="workbook-prefetch", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        start = time.monotonic()
+        try:
+            repo = InventoryRepository.open(self.path, journal=self.journal)
+            sheetnames = repo.session.sheetnames  # Lectura completa del libro
+            for sheet_name in self.sheet_names:
+                if sheet_name in sheetnames:
+                    repo.session.next_free_row(sheet_name)  # Asignador (consecutivo y fila libre)
+            self._repo = repo
+        except Exception as e:
+            self._error = e
+        self.elapsed = time.monotonic() - start
+        with self._lock:
+            self._done.set()
+            discarded = self._discarded
+        if discarded:
+            self._close_repo()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def take(self):
+        """
+        Repositorio ya leído (una sola vez; después devuelve None).
+
+        Raises:
+            La excepción del hilo si la lectura falló
+        """
+        self._done.wait()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        repo, self._repo = self._repo, None
+        return repo
+
+    def discard(self):
+        """No usar la lectura: cerrar el repositorio ahora o, si sigue leyendo, al terminar."""
+        with self._lock:
+            self._discarded = True
+            done = self._done.is_set()
+        if done:
+            self._close_repo()
+
+    def _close_repo(self):
+        repo, self._repo = self._repo, None
+        if repo is not None:
+            try:
+                repo.close()
+            except Exception as e:
+                print(f"⚠️ No se pudo cerrar el inventario leído en segundo plano: {e}")
@@ -0,0 +1,623 @@
+# -*- coding: utf-8 -*-
+"""
+SESIÓN DE WORKBOOK - Sistema de Inventario Tecnológico
+=======================================================
+Mantiene el Excel de inventario cargado en memoria durante toda la sesión.
+
+El archivo se parsea una sola vez; todas las lecturas se sirven desde
+memoria y solo se vuelve a cargar cuando el archivo cambia en disco
+(mtime o tamaño distintos), por ejemplo si otro técnico lo guardó.
+
+Con journal=True los guardados no reescriben el .xlsx: las celdas
+modificadas se anexan al diario (change_journal) y compact() las vuelca
+al Excel en un solo guardado.
+
+prepare_save() separa el guardado en dos partes: tomar los cambios (hilo
+de la interfaz) y escribirlos (hilo escritor, ver background_writer).
+
+Varios técnicos pueden compartir el mismo Excel: cada escritura toma el
+bloqueo del archivo (file_lock), escribe en un temporal que reemplaza al
+original con os.replace y, si otro técnico guardó desde la última lectura,
+recarga el archivo y revalida las filas propias antes de escribir (una
+fila nueva que otro ya ocupó se mueve a la siguiente libre con un nuevo
+consecutivo). Los cambios de código quedan en conflicts para avisar.
+
+El guardado serializa una instantánea del libro (copia superficial de las
+hojas y de su diccionario de celdas) fuera de self.lock. Mientras dura,
+toda celda que la sesión modifica se reemplaza antes por una copia, así la
+interfaz sigue leyendo y editando sin tocar lo que se está escribiendo.
+"""
+
+import copy
+import importlib.util
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from change_journal import ChangeJournal, journal_path_for
+from file_lock import FileLock, atomic_replace
+
+# openpyxl se importa al leer el primer libro (arranque rápido de la aplicación)
+HAS_OPENPYXL = importlib.util.find_spec("openpyxl") is not None
+
+
+# Hojas con código único en columna 2 (prefijo → hoja)
+CODE_SHEETS = {
+    "EQC": "Equipos de Cómputo",
+    "IMP": "Impresoras y Escáneres",
+    "PER": "Periféricos",
+    "RED": "Equipos de Red",
+}
+CODE_COLUMN = 2
+CONSECUTIVE_COLUMN = 1
+
+
+def sheet_for_code(codigo):
+    """Hoja que corresponde al prefijo de un código (ej: 'IMP-0026'), o None."""
+    prefix = str(codigo).strip().upper().split('-')[0]
+    return CODE_SHEETS.get(prefix)
+
+
+def _prefix_for_sheet(sheet_name):
+    for prefix, name in CODE_SHEETS.items():
+        if name == sheet_name:
+            return prefix
+    return None
+
+
+def _scan_allocator(ws):
+    """[último consecutivo, primera fila con consecutivo vacío] de una hoja."""
+    last_consecutive = 0
+    first_free_row = None
+    for row, (value,) in enumerate(
+        ws.iter_rows(min_row=2, min_col=CONSECUTIVE_COLUMN, max_col=CONSECUTIVE_COLUMN, values_only=True),
+        start=2
+    ):
+        if value is None:
+            if first_free_row is None:
+                first_free_row = row
+            continue
+        try:
+            last_consecutive = max(last_consecutive, int(value))
+        except (TypeError, ValueError):
+            pass
+    if first_free_row is None:
+        first_free_row = max(ws.max_row + 1, 2)
+    return [last_consecutive, first_free_row]
+
+
+def _snapshot_workbook(wb):
+    """
+    Copia superficial del libro para guardarlo en otro hilo.
+
+    Cada hoja tiene su propio diccionario de celdas (las celdas nuevas de la
+    interfaz no lo alteran); los objetos celda son compartidos, por eso la
+    sesión los copia antes de modificarlos mientras hay un guardado en curso.
+    """
+    snapshot = copy.copy(wb)
+    sheets = []
+    for ws in wb._sheets:
+        ws_copy = copy.copy(ws)
+        if hasattr(ws, "_cells"):
+            ws_copy._cells = dict(ws._cells)
+            ws_copy.row_dimensions = copy.copy(ws.row_dimensions)
+        sheets.append(ws_copy)
+    snapshot._sheets = sheets
+    snapshot._pivots = list(wb._pivots)  # openpyxl los acumula al guardar
+    return snapshot
+
+
+def _same_value(a, b):
+    """Comparar valores de celda tratando '' y None como iguales."""
+    return (a if a != '' else None) == (b if b != '' else None)
+
+
+class _TrackedCell:
+    """
+    Celda de openpyxl que registra cada asignación de .value en la sesión.
+
+    Busca la celda en la hoja en cada acceso: durante un guardado la sesión
+    la reemplaza por una copia antes de modificarla.
+    """
+
+    def __init__(self, session, ws, row, column):
+        self._session = session
+        self._ws = ws
+        self._row = row
+        self._column = column
+
+    def _cell(self):
+        with self._session.lock:
+            return self._ws.cell(row=self._row, column=self._column)
+
+    @property
+    def value(self):
+        return self._cell().value
+
+    @value.setter
+    def value(self, value):
+        with self._session.lock:
+            cell = self._session._writable_cell(self._ws, self._row, self._column)
+            cell.value = value
+            self._session._record(self._ws.title, self._row, self._column, value)
+
+    def __getattr__(self, name):
+        return getattr(self._cell(), name)
+
+
+class _TrackedSheet:
+    """Hoja de openpyxl cuyas escrituras vía cell() quedan registradas."""
+
+    def __init__(self, session, ws):
+        self._session = session
+        self._ws = ws
+
+    def cell(self, row, column, value=None):
+        """Misma semántica que openpyxl: value=None no modifica la celda."""
+        cell = _TrackedCell(self._session, self._ws, row, column)
+        cell._cell()  # openpyxl crea la celda al pedirla
+        if value is not None:
+            cell.value = value
+        return cell
+
+    def __getattr__(self, name):
+        return getattr(self._ws, name)
+
+
+class _TrackedWorkbook:
+    """Vista del workbook que entrega hojas con registro de cambios."""
+
+    def __init__(self, session, wb):
+        self._session = session
+        self._wb = wb
+
+    def __getitem__(self, sheet_name):
+        return _TrackedSheet(self._session, self._wb[sheet_name])
+
+    def __getattr__(self, name):
+        return getattr(self._wb, name)
+
+
+def recover_journal(excel_path):
+    """
+    Aplicar al Excel el diario pendiente de este equipo y vaciarlo.
+
+    Para abrir sin diario un Excel que quedó con cambios anotados (cierre
+    inesperado en modo diario). Devuelve las celdas aplicadas (0 si no había).
+    """
+    if not os.path.exists(journal_path_for(excel_path)):
+        return 0
+    session = WorkbookSession(excel_path, journal=True)
+    try:
+        session.workbook  # Lee el Excel y reaplica el diario
+        applied = session.recovered_changes
+        session.compact()
+        return applied
+    finally:
+        session.close()
+
+
+class WorkbookSession:
+    """
+    Workbook compartido por todas las acciones de la aplicación.
+
+    Uso:
+        session = WorkbookSession("inventario_hospital_v1.xlsx")
+        ws = session.sheet("Equipos de Cómputo")
+        ws.cell(row=5, column=3, value="PC-URG-01")
+        session.save()
+
+    Con journal=True, save() solo anexa al diario y compact() escribe el
+    Excel (al estar inactiva la aplicación o al cerrar).
+    """
+
+    def __init__(self, excel_path, journal=False):
+        self.excel_path = excel_path
+        self._wb = None
+        self._signature = None
+        self._code_index = {}  # {hoja: {código: fila}}
+        self._allocators = {}  # {hoja: [último consecutivo, primera fila libre]}
+        self.journal = ChangeJournal(journal_path_for(excel_path)) if journal else None
+        self._changes = []     # Celdas modificadas desde el último prepare_save()
+        self._unsaved = []     # Celdas que aún no están en el Excel en disco
+        self.conflicts = []    # Avisos de revalidación (códigos reasignados, filas perdidas)
+        self._moved_codes = {}      # {código original: código con el que quedó} al revalidar
+        self._dropped_codes = set()  # Códigos editados que otro técnico eliminó
+        self.last_journal_write = None  # time.monotonic() del último guardado en diario
+        self.recovered_changes = 0      # Celdas reaplicadas desde el diario al cargar
+        self.lock = threading.RLock()        # Estado en memoria (workbook, índices, cambios)
+        self._disk_lock = threading.RLock()  # Escrituras a disco (Excel y diario), una a la vez
+        self._saving = False  # Hay una instantánea del libro serializándose en el hilo escritor
+
+    def _disk_signature(self):
+        """Firma del archivo en disco: (mtime en ns, tamaño en bytes)."""
+        stat = os.stat(self.excel_path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def is_stale(self):
+        """True si el archivo en disco ya no coincide con lo cargado en memoria."""
+        if self._wb is None:
+            return True
+        try:
+            return self._disk_signature() != self._signature
+        except OSError:
+            return True
+
+    def reload(self):
+        """
+        Forzar lectura completa del archivo desde disco.
+
+        Los cambios propios que aún no están en el Excel (diario o guardado
+        en curso) se revalidan y se vuelven a aplicar sobre lo leído.
+        """
+        if not HAS_OPENPYXL:
+            raise RuntimeError("openpyxl no instalado")
+
+        with self.lock:
+            previous = self._wb
+            if self.journal is not None:
+                pending = self.journal.read() if self.journal.exists() else []
+                if pending and self.last_journal_write is None:
+                    self.last_journal_write = time.monotonic()
+            else:
+                pending = self._unsaved
+
+            from openpyxl import load_workbook
+
+            signature = self._disk_signature()
+            self._wb = load_workbook(self.excel_path)
+            self._signature = signature
+            self._changes = []
+            self._unsaved = self._rebase(pending, previous)
+            self.recovered_changes = len(self._unsaved)
+            self._build_code_index()
+            self._allocators = {}
+            return self._wb
+
+    def _rebase(self, changes, previous=None):
+        """
+        Aplicar cambios propios sobre el workbook recién leído, revalidando filas.
+
+        - Fila nueva (escribe el consecutivo): si otro ya ocupó la fila, se
+          mueve a la primera libre con el siguiente consecutivo (y código).
+        - Fila existente: si en esa fila ya no está el código que se editó
+          (previous), se busca el código; si no existe, el cambio se descarta.
+
+        Returns:
+            list: celdas efectivamente aplicadas (con las filas corregidas)
+        """
+        groups = OrderedDict()
+        for sheet_name, row, column, value in changes:
+            groups.setdefault((sheet_name, row), OrderedDict())[column] = value
+
+        allocators = {}
+        applied = []
+        for (sheet_name, row), cells in groups.items():
+            if sheet_name not in self._wb.sheetnames:
+                continue
+            ws = self._wb[sheet_name]
+
+            if CONSECUTIVE_COLUMN in cells:
+                current = ws.cell(row=row, column=CONSECUTIVE_COLUMN).value
+                already_there = all(
+                    _same_value(ws.cell(row=row, column=c).value, v) for c, v in cells.items()
+                )
+                if current is not None and not already_there:
+                    row = self._move_new_row(ws, row, cells, allocators)
+            elif previous is not None and sheet_name in CODE_SHEETS.values() \
+                    and sheet_name in previous.sheetnames:
+                expected = previous[sheet_name].cell(row=row, column=CODE_COLUMN).value
+                current = ws.cell(row=row, column=CODE_COLUMN).value
+                if expected and not _same_value(str(current or '').upper(), str(expected).upper()):
+                    row = self._find_code_in(ws, expected)
+                    if row is None:
+                        self._dropped_codes.add(str(expected).strip().upper())
+                        self.conflicts.append(
+                            f"{sheet_name}: {expected} ya no existe en el Excel; sus cambios no se guardaron"
+                        )
+                        continue
+
+            for column, value in cells.items():
+                ws.cell(row=row, column=column).value = value
+                applied.append((sheet_name, row, column, value))
+        return applied
+
+    def _move_new_row(self, ws, row, cells, allocators):
+        """Reubicar una fila nueva cuya posición ya ocupó otro técnico."""
+        state = allocators.get(ws.title)
+        if state is None:
+            state = allocators[ws.title] = _scan_allocator(ws)
+
+        new_row = state[1]
+        while ws.cell(row=new_row, column=CONSECUTIVE_COLUMN).value is not None:
+            new_row += 1
+        state[1] = new_row + 1
+
+        old_code = cells.get(CODE_COLUMN)
+        if isinstance(cells[CONSECUTIVE_COLUMN], int):
+            state[0] += 1
+            cells[CONSECUTIVE_COLUMN] = state[0]
+            prefix = _prefix_for_sheet(ws.title)
+            if prefix and old_code and str(old_code).upper().startswith(prefix + "-"):
+                cells[CODE_COLUMN] = f"{prefix}-{state[0]:04d}"
+
+        new_code = cells.get(CODE_COLUMN)
+        if old_code and new_code != old_code:
+            self._moved_codes[str(old_code).strip().upper()] = new_code
+            self.conflicts.append(f"{ws.title}: {old_code} ya fue usado por otro equipo → guardado como {new_code}")
+        else:
+            self.conflicts.append(f"{ws.title}: registro movido de la fila {row} a la {new_row} (fila ocupada por otro técnico)")
+        return new_row
+
+    @staticmethod
+    def _find_code_in(ws, codigo):
+        target = str(codigo).strip().upper()
+        for row, (value,) in enumerate(
+            ws.iter_rows(min_row=2, min_col=CODE_COLUMN, max_col=CODE_COLUMN, values_only=True),
+            start=2
+        ):
+            if value and str(value).strip().upper() == target:
+                return row
+        return None
+
+    def take_conflicts(self):
+        """Devolver y limpiar los avisos de revalidación pendientes."""
+        with self.lock:
+            conflicts, self.conflicts = self.conflicts, []
+        return conflicts
+
+    def final_code(self, codigo):
+        """
+        Código con el que quedó un registro propio tras revalidar.
+
+        Una fila nueva reubicada recibe otro código; una fila editada que
+        otro técnico eliminó se descartó (None).
+        """
+        key = str(codigo).strip().upper()
+        with self.lock:
+            if key in self._dropped_codes:
+                return None
+            return self._moved_codes.get(key, codigo)
+
+    @property
+    def workbook(self):
+        """Workbook en memoria (se recarga solo si el archivo cambió en disco)."""
+        with self.lock:
+            if self.is_stale():
+                self.reload()
+        return _TrackedWorkbook(self, self._wb)
+
+    @property
+    def sheetnames(self):
+        return self.workbook.sheetnames
+
+    def sheet(self, sheet_name):
+        """Obtener una hoja por nombre, o None si no existe."""
+        wb = self.workbook
+        if sheet_name not in wb.sheetnames:
+            return None
+        return wb[sheet_name]
+
+    # ------------------------------------------------------------------
+    # Filas completas (ver column_schema)
+    # ------------------------------------------------------------------
+
+    def read_row(self, sheet_name, row, width):
+        """Valores de las columnas 1..width de la fila, como tupla."""
+        ws = self.workbook[sheet_name]._ws
+        with self.lock:
+            for values in ws.iter_rows(min_row=row, max_row=row, max_col=width, values_only=True):
+                return values
+        return (None,) * width
+
+    def write_row(self, sheet_name, row, cells):
+        """Escribir varias celdas de una fila en una llamada ({columna: valor})."""
+        ws = self.workbook[sheet_name]._ws
+        with self.lock:
+            for column, value in cells.items():
+                self._writable_cell(ws, row, column).value = value
+                self._record(sheet_name, row, column, value)
+
+    # ------------------------------------------------------------------
+    # Índice código → fila
+    # ------------------------------------------------------------------
+
+    def _build_code_index(self):
+        """Indexar la columna de código de cada hoja de inventario (sin límite de filas)."""
+        self._code_index = {}
+        for sheet_name in CODE_SHEETS.values():
+            index = {}
+            if sheet_name in self._wb.sheetnames:
+                ws = self._wb[sheet_name]
+                for row, (value,) in enumerate(
+                    ws.iter_rows(min_row=2, min_col=CODE_COLUMN, max_col=CODE_COLUMN, values_only=True),
+                    start=2
+                ):
+                    if value:
+                        index.setdefault(str(value).strip().upper(), row)
+            self._code_index[sheet_name] = index
+
+    def find_code_row(self, sheet_name, codigo):
+        """Fila donde está el código en la hoja, o None si no existe."""
+        self.workbook  # Recargar (y reindexar) si el archivo cambió
+        return self._code_index.get(sheet_name, {}).get(str(codigo).strip().upper())
+
+    def set_code_row(self, sheet_name, codigo, row):
+        """Registrar la fila de un código recién escrito para mantener el índice al día."""
+        self._code_index.setdefault(sheet_name, {})[str(codigo).strip().upper()] = row
+
+    # ------------------------------------------------------------------
+    # Asignador de consecutivos
+    # ------------------------------------------------------------------
+
+    def _allocator(self, sheet_name):
+        """Estado [último consecutivo, primera fila libre] de la hoja (se siembra una vez)."""
+        ws = self.sheet(sheet_name)
+        if sheet_name in self._allocators:
+            return self._allocators[sheet_name]
+
+        state = _scan_allocator(ws) if ws is not None else [0, 2]
+        self._allocators[sheet_name] = state
+        return state
+
+    def next_consecutive(self, sheet_name):
+        """Siguiente consecutivo de la hoja, sin reservarlo."""
+        return self._allocator(sheet_name)[0] + 1
+
+    def next_free_row(self, sheet_name):
+        """Primera fila con la columna de consecutivo vacía, sin reservarla."""
+        return self._allocator(sheet_name)[1]
+
+    def allocate(self, sheet_name):
+        """
+        Reservar el siguiente consecutivo y la primera fila libre de la hoja.
+
+        Returns:
+            tuple: (consecutivo, fila)
+        """
+        state = self._allocator(sheet_name)
+        consecutive = state[0] + 1
+        row = state[1]
+
+        # Avanzar a la siguiente fila libre (normalmente la inmediata)
+        ws = self.sheet(sheet_name)
+        next_row = row + 1
+        if ws is not None:
+            while (next_row <= ws.max_row
+                   and ws.cell(row=next_row, column=CONSECUTIVE_COLUMN).value is not None):
+                next_row += 1
+
+        state[0] = consecutive
+        state[1] = next_row
+        return consecutive, row
+
+    # ------------------------------------------------------------------
+    # Guardado y diario
+    # ------------------------------------------------------------------
+
+    def _writable_cell(self, ws, row, column):
+        """
+        Celda lista para modificar (llamar con self.lock).
+
+        Con un guardado en curso la celda se reemplaza en la hoja por una
+        copia, de modo que la instantánea sigue escribiendo el valor anterior.
+        """
+        cell = ws.cell(row=row, column=column)
+        if self._saving:
+            cell = copy.copy(cell)
+            cell._style = copy.copy(cell._style)
+            ws._cells[(row, column)] = cell
+        return cell
+
+    def _record(self, sheet_name, row, column, value):
+        """Registrar una celda modificada (para el diario y la revalidación)."""
+        change = (sheet_name, row, column, value)
+        self._changes.append(change)
+        self._unsaved.append(change)
+
+    @property
+    def has_pending_changes(self):
+        """True si el diario tiene cambios que aún no están en el Excel."""
+        return self.journal is not None and self.journal.pending > 0
+
+    def prepare_save(self):
+        """
+        Tomar los cambios pendientes y devolver la función que los escribe.
+
+        Se llama en el hilo de la interfaz; la función devuelta puede
+        ejecutarse en otro hilo. En modo diario solo anexa las celdas
+        tomadas; si no, escribe el workbook completo.
+        """
+        if self._wb is None:
+            return lambda: None
+        with self.lock:
+            changes, self._changes = self._changes, []
+        if self.journal is not None:
+            return lambda: self._append_journal(changes)
+        return self._write_workbook
+
+    def save(self):
+        """Persistir los cambios en el hilo actual (ver prepare_save)."""
+        try:
+            self.prepare_save()()
+        except Exception:
+            self.discard()
+            raise
+
+    def _append_journal(self, changes):
+        with self._disk_lock:
+            self.journal.append(changes)
+            self.last_journal_write = time.monotonic()
+
+    def compact(self):
+        """Aplicar al Excel los cambios del diario (un solo guardado) y vaciarlo."""
+        # Sin anexos al diario entre escribir el Excel y vaciarlo
+        with self._disk_lock:
+            if self.journal is None or not self.journal.exists():
+                return False
+            self.workbook  # Cargar y reaplicar el diario si no está en memoria
+            self._write_workbook()
+            self.journal.clear()
+            return True
+
+    def _write_workbook(self):
+        """
+        Escribir el workbook completo en disco bajo el bloqueo del archivo.
+
+        Si otro técnico guardó desde la última lectura, se recarga y se
+        revalidan los cambios propios antes de escribir. La escritura va a
+        un temporal que reemplaza al Excel con os.replace.
+
+        self.lock solo se toma para revalidar y tomar la instantánea del
+        libro, y al final para registrar lo escrito: la espera del bloqueo
+        del archivo, la serialización y la escritura en disco no detienen
+        las lecturas ni las ediciones del hilo de la interfaz.
+        """
+        with self._disk_lock, FileLock(self.excel_path):
+            with self.lock:
+                if self.is_stale():
+                    self.reload()
+                wb = self._wb
+                snapshot = _snapshot_workbook(wb)
+                written = len(self._unsaved)  # Cambios incluidos en la instantánea
+                self._saving = True
+
+            try:
+                atomic_replace(self.excel_path, snapshot.save)
+            except Exception:
+                # Lo que quedó en memoria no coincide con disco: descartarlo
+                self.discard()
+                raise
+            finally:
+                with self.lock:
+                    self._saving = False
+
+            with self.lock:
+                # Si mientras tanto se recargó (o descartó), el nuevo estado ya
+                # revalidó los cambios y la firma se actualiza al volver a leer
+                if self._wb is wb:
+                    self._signature = self._disk_signature()
+                    del self._unsaved[:written]
+
+    def discard(self):
+        """Descartar cambios no guardados; la próxima lectura recarga desde disco."""
+        with self.lock:
+            self._wb = None
+            self._signature = None
+            self._code_index = {}
+            self._allocators = {}
+            self._changes = []
+            self._unsaved = []
+
+    def close(self):
+        """Compactar el diario pendiente y liberar el workbook en memoria."""
+        if self.journal is not None:
+            try:
+                self.compact()
+            except Exception as e:
+                # El diario se conserva y se reaplica la próxima vez
+                print(f"❌ No se pudo compactar el diario: {e}")
+        if self._wb is not None:
+            self._wb.close()
+        self.discard()